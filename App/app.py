@@ -7,23 +7,67 @@ from datetime import datetime, timedelta
 import numpy as np
 import pandas as pd
 import plotly.graph_objs as go
+import asyncio
 import time
 import re
 
 # --- Import custom functions ---
 from optimizer import (
     get_stock_data,
-    generate_covariance_matrix,
-    generate_expected_returns,
+    align_price_data,
+    incremental_moments,
+    warm_start_weights,
     sector_mapping,
     portfolio_return,
     portfolio_volatility,
     optimize_portfolio_max_sharpe,
     optimize_portfolio_min_volatility,
-    optimize_portfolio_target_return,
-    optimize_portfolio_target_risk
+    cla_target_return,
+    check_constraints,
+    cla_target_risk,
+    optimize_portfolio_risk_parity,
+    optimize_portfolio_hrp,
+    optimize_portfolio_cardinality,
+    progressive_frontier,
+    risk_contributions,
+    batch_portfolio_returns,
+    batch_portfolio_volatilities
 )
 
+# --- Import turnover-limited rebalancing ---
+from rebalance import optimize_portfolio_rebalance
+
+# --- Import tax-lot aware rebalancing ---
+from tax_lots import LotLedger, optimize_portfolio_tax_aware
+
+# --- Import Black-Litterman expected returns ---
+from black_litterman import black_litterman_returns
+
+# --- Import the bootstrap-resampled frontier and run manifests ---
+from resampling import resampled_frontier_iter
+from manifest import build_manifest, load_artifact, save_artifact
+
+# --- Import historical stress scenarios ---
+from stress import STRESS_SCENARIOS, stress_test
+
+# --- Import robust mean-variance ---
+from robust import optimize_portfolio_robust
+
+# --- Import benchmark-relative optimizers ---
+from tracking import optimize_portfolio_tracking_error, optimize_portfolio_information_ratio
+
+# --- Import clustered correlation view ---
+from correlation_view import correlation_figure
+
+# --- Import live intraday mode ---
+from live import LivePortfolio, load_replay_bars, replay_quotes, stream_portfolio
+
+# --- Import precomputed moments for the date range presets ---
+from precompute import DATE_RANGE_PRESETS, preset_start_date, load_preset_moments, load_preset_counts
+
+# --- Import tracing spans ---
+import tracing
+
 # --- Import Nifty50 tickers and sectors ---
 from nifty50_dict import nifty50_tickers, nifty50_sectors
 
@@ -46,6 +90,9 @@ company_names = list(nifty50_tickers.keys())
 
 st.set_page_config(page_title="Portfolio Optimizer", layout="wide")
 
+# Each run records into its own tracer, so sessions never see each other's spans
+trace_recorder = tracing.start(st.session_state.get("trace_timings", False))
+
 st.markdown("""
 <h1 style='text-align: center; font-size: 3.5em;'>
     <span style='
@@ -291,20 +338,14 @@ with tab1:
         with col1:
             range_option = st.radio(
                 "Stock Data Date Range",
-                options=["6 Months", "1 Year", "2 Years", "5 Years", "Custom"],
+                options=list(DATE_RANGE_PRESETS) + ["Custom"],
                 horizontal=True,
                 index=0
             )
 
             today = datetime.today()
-            if range_option == "6 Months":
-                start_date = today - timedelta(days=180)
-            elif range_option == "1 Year":
-                start_date = today - timedelta(days=365)
-            elif range_option == "2 Years":
-                start_date = today - timedelta(days=730)
-            elif range_option == "5 Years":
-                start_date = today - timedelta(days=1825)
+            if range_option in DATE_RANGE_PRESETS:
+                start_date = preset_start_date(range_option, today)
             elif range_option == "Custom":
                 start_date = st.date_input("Start Date", value=today - timedelta(days=180))
                 end_date = st.date_input("End Date", value=today)
@@ -315,11 +356,64 @@ with tab1:
                 end_date = today
 
             st.write(f"📅 Selected Date Range: {start_date.strftime('%b %d, %Y')} - {end_date.strftime('%b %d, %Y')}")
+            st.checkbox(
+                "Use only the period where all selected stocks have data",
+                key="common_window",
+                help="By default each pair of stocks uses every day on which both have prices, "
+                     "so one late-listed stock does not shorten the history of the others."
+            )
+            st.checkbox(
+                "Trace Timings",
+                key="trace_timings",
+                help="Time each stage of the Results tab (data fetch, moments, solve, frontier, charts), "
+                     "show a waterfall and save a Chrome trace under Data/traces."
+            )
+            returns_model = st.radio(
+                "Expected Returns",
+                options=["Historical Mean", "Black-Litterman"],
+                horizontal=True,
+                key="returns_model",
+                help="Black-Litterman starts from the returns implied by market-cap weights "
+                     "and tilts them toward your views."
+            )
+            bl_view_table = pd.DataFrame()
+            if returns_model == "Black-Litterman" and st.session_state.stocks:
+                with st.expander("Black-Litterman Views", expanded=False):
+                    st.number_input(
+                        "Market Risk Aversion", min_value=0.5, max_value=10.0,
+                        value=st.session_state.get("risk_aversion", 2.5), step=0.1, key="risk_aversion"
+                    )
+                    stock_names = [stock['name'] for stock in st.session_state.stocks]
+                    # The editor keeps its edits under its key as a delta on this fixed
+                    # base frame; feeding its output back in would apply them twice
+                    if "bl_views_base" not in st.session_state:
+                        st.session_state.bl_views_base = pd.DataFrame({
+                            "Stock": pd.Series(dtype=str),
+                            "Relative To": pd.Series(dtype=str),
+                            "Return (%)": pd.Series(dtype=float),
+                            "Confidence (%)": pd.Series(dtype=float)
+                        })
+                    bl_view_table = st.data_editor(
+                        st.session_state.bl_views_base,
+                        num_rows="dynamic",
+                        use_container_width=True,
+                        column_config={
+                            "Stock": st.column_config.SelectboxColumn(options=stock_names, required=True),
+                            "Relative To": st.column_config.SelectboxColumn(
+                                options=stock_names,
+                                help="Leave empty for an absolute view; otherwise 'Stock outperforms this by Return'."
+                            ),
+                            "Return (%)": st.column_config.NumberColumn(default=10.0, step=0.5),
+                            "Confidence (%)": st.column_config.NumberColumn(min_value=1.0, max_value=100.0, default=50.0)
+                        },
+                        key="bl_views_editor"
+                    )
 
         with col2:
             opt_method = st.selectbox(
                 "Optimization Method",
-                options=["Maximum Sharpe Ratio", "Minimum Volatility", "Target Return", "Target Risk"],
+                options=["Maximum Sharpe Ratio", "Minimum Volatility", "Target Return", "Target Risk", "Risk Parity", "Hierarchical Risk Parity",
+                         "Robust Mean-Variance", "Minimum Tracking Error", "Maximum Information Ratio", "Rebalance"],
                 key="opt_method_select"
             )
             st.session_state["opt_method"] = opt_method  # Always keep this updated
@@ -332,6 +426,136 @@ with tab1:
                 )
             else:
                 target_value = None
+            if opt_method not in ["Risk Parity", "Hierarchical Risk Parity", "Robust Mean-Variance",
+                                  "Minimum Tracking Error", "Maximum Information Ratio", "Rebalance"]:
+                limit_stocks = st.checkbox("Limit Number of Stocks", key="limit_stocks")
+                if limit_stocks:
+                    card_col1, card_col2 = st.columns(2)
+                    with card_col1:
+                        st.number_input(
+                            "Max Number of Stocks", min_value=1, max_value=50,
+                            value=st.session_state.get("max_assets", 10), key="max_assets"
+                        )
+                    with card_col2:
+                        st.number_input(
+                            "Min Position Size (%)", min_value=0.0, max_value=100.0,
+                            value=st.session_state.get("min_position", 2.0), step=0.5, key="min_position"
+                        )
+            if opt_method == "Risk Parity" and st.session_state.stocks:
+                # Relative risk budgets; equal budgets give the equal-risk-contribution portfolio
+                if "risk_budgets" not in st.session_state:
+                    st.session_state.risk_budgets = {}
+                with st.expander("Custom Risk Budgets", expanded=False):
+                    for stock in st.session_state.stocks:
+                        st.session_state.risk_budgets[stock['ticker']] = st.number_input(
+                            f"Risk Budget for {stock['name']}", min_value=0.1, max_value=100.0,
+                            value=st.session_state.risk_budgets.get(stock['ticker'], 1.0), step=0.1,
+                            key=f"budget_{stock['ticker']}"
+                        )
+
+            if opt_method == "Hierarchical Risk Parity":
+                st.checkbox(
+                    "Split by Sector First", key="hrp_sector_split",
+                    help="Divide capital across sectors (within their limits) before clustering stocks inside each sector."
+                )
+
+            if opt_method == "Robust Mean-Variance":
+                rob_col1, rob_col2 = st.columns(2)
+                with rob_col1:
+                    st.number_input(
+                        "Return Uncertainty (std. errors)", min_value=0.0, max_value=10.0,
+                        value=st.session_state.get("robust_uncertainty", 1.0), step=0.25, key="robust_uncertainty",
+                        help="Expected returns are trusted only to within this many standard errors of the mean."
+                    )
+                with rob_col2:
+                    st.number_input(
+                        "Risk Aversion", min_value=0.1, max_value=50.0,
+                        value=st.session_state.get("robust_risk_aversion", 2.5), step=0.1, key="robust_risk_aversion"
+                    )
+
+            if opt_method in ["Minimum Tracking Error", "Maximum Information Ratio"]:
+                # Active weights are measured against Nifty 50 market-cap weights
+                te_col1, te_col2 = st.columns(2)
+                with te_col1:
+                    if opt_method == "Minimum Tracking Error":
+                        st.number_input(
+                            "Target Active Return (%)", min_value=-50.0, max_value=50.0,
+                            value=st.session_state.get("target_active_return", 1.0), step=0.1,
+                            key="target_active_return"
+                        )
+                    st.number_input(
+                        "Max Active Weight per Stock (%)", min_value=0.0, max_value=100.0,
+                        value=st.session_state.get("stock_active_band", 5.0), step=0.5, key="stock_active_band"
+                    )
+                with te_col2:
+                    st.number_input(
+                        "Max Sector Active Weight (%)", min_value=0.0, max_value=100.0,
+                        value=st.session_state.get("sector_active_band", 10.0), step=0.5, key="sector_active_band"
+                    )
+
+            if opt_method == "Rebalance" and st.session_state.stocks:
+                # Hard turnover budget and trade limits around the current holdings
+                reb_col1, reb_col2 = st.columns(2)
+                with reb_col1:
+                    st.number_input(
+                        "Max Turnover (%)", min_value=0.0, max_value=100.0,
+                        value=st.session_state.get("max_turnover", 10.0), step=1.0, key="max_turnover",
+                        help="One-way turnover: the share of the portfolio moved between stocks."
+                    )
+                    st.number_input(
+                        "Min Trade Size (%)", min_value=0.0, max_value=100.0,
+                        value=st.session_state.get("min_trade", 0.5), step=0.1, key="min_trade",
+                        help="Smaller trades are suppressed."
+                    )
+                with reb_col2:
+                    st.number_input(
+                        "Max Trade per Stock (%)", min_value=0.0, max_value=100.0,
+                        value=st.session_state.get("max_trade", 5.0), step=0.5, key="max_trade"
+                    )
+                    st.number_input(
+                        "Risk Aversion", min_value=0.1, max_value=50.0,
+                        value=st.session_state.get("rebalance_risk_aversion", 2.5), step=0.1,
+                        key="rebalance_risk_aversion"
+                    )
+                # Optional tax lots: holdings then come from the selected account's lots
+                lots_file = st.file_uploader(
+                    "Tax Lots (CSV)", type="csv", key="tax_lots_file",
+                    help="Columns: Account, Ticker, Date, Quantity, Cost (per unit). "
+                         "Lots to sell are chosen to minimize STCG/LTCG tax."
+                )
+                if lots_file is not None:
+                    try:
+                        st.session_state.tax_ledger = LotLedger.from_frame(pd.read_csv(lots_file))
+                    except (KeyError, ValueError) as e:
+                        st.error(f"Could not read tax lots: {e}")
+                        st.session_state.tax_ledger = None
+                else:
+                    st.session_state.tax_ledger = None
+                if st.session_state.tax_ledger is not None:
+                    ledger = st.session_state.tax_ledger
+                    st.selectbox("Account", ledger.accounts, key="tax_account")
+                    st.number_input(
+                        "Tax Weight", min_value=0.0, max_value=10.0,
+                        value=st.session_state.get("tax_weight", 1.0), step=0.1, key="tax_weight",
+                        help="Weight on capital-gains tax relative to expected return (0 ignores tax)."
+                    )
+                    st.caption(f"{len(ledger)} lots across {len(ledger.accounts)} accounts; "
+                               "current holdings are taken from the account's lots.")
+                # Current holdings default to the last optimized weights, else equal weight
+                last = st.session_state.get("last_weights")
+                with st.expander("Current Holdings", expanded=False):
+                    if "current_holdings" not in st.session_state:
+                        st.session_state.current_holdings = {}
+                    for stock in st.session_state.stocks:
+                        if last is not None and stock['ticker'] in last.index:
+                            default = float(last.loc[stock['ticker'], 'Weight']) * 100
+                        else:
+                            default = 100.0 / len(st.session_state.stocks)
+                        st.session_state.current_holdings[stock['ticker']] = st.number_input(
+                            f"Current Weight (%) for {stock['name']}", min_value=0.0, max_value=100.0,
+                            value=st.session_state.current_holdings.get(stock['ticker'], default), step=0.5,
+                            key=f"holding_{stock['ticker']}"
+                        )
 
     # --- Section: Optimize Portfolio Button ---
     if st.button("✅ Optimize Portfolio", use_container_width=True):
@@ -353,33 +577,141 @@ with tab2:
         if "stocks" not in st.session_state or not st.session_state.stocks:
             st.info("Please optimize your portfolio first using the 'Optimizer' tab.")
         else:
-            stocks_closed_prices = get_stock_data(
-                [stock['ticker'] for stock in st.session_state.stocks],
-                start_date=start_date,
-                end_date=end_date
-            )
-            if stocks_closed_prices.empty:
+            selected_tickers = [stock['ticker'] for stock in st.session_state.stocks]
+            # Time the results from here; tab 1 spans are dropped
+            if trace_recorder is not None:
+                tracing.reset(trace_recorder)
+            render_stages = tracing.Stages('render')
+            data_window = 'common' if st.session_state.get("common_window", False) else 'pairwise'
+            # Presets are answered from the daily precomputed moments when available
+            precomputed = None
+            if data_window == 'pairwise':
+                precomputed = load_preset_moments(range_option, selected_tickers, today)
+            if precomputed is None:
+                # Adding or removing a stock only fetches/updates that stock's row and column
+                (
+                    st.session_state.moments_cache,
+                    expected_returns,
+                    cov_matrix,
+                    data_issues
+                ) = incremental_moments(
+                    st.session_state.get("moments_cache"),
+                    selected_tickers,
+                    start_date=start_date,
+                    end_date=end_date,
+                    window=data_window
+                )
+            if precomputed is None and len(st.session_state.moments_cache['dates']) == 0:
                 st.error("No stock data available for the selected date range.")
             else:
-                st.session_state.cov_matrix = generate_covariance_matrix(stocks_closed_prices)
-                st.session_state.expected_returns = generate_expected_returns(stocks_closed_prices)
-                sector_map, sector_indices = sector_mapping(tickers=[n['ticker'] for n in st.session_state.stocks],)
+                if precomputed is not None:
+                    st.session_state.expected_returns, st.session_state.cov_matrix = precomputed
+                else:
+                    st.session_state.expected_returns = expected_returns
+                    st.session_state.cov_matrix = cov_matrix
+                    if data_issues:
+                        with st.expander(f"⚠️ Data quality: {len(data_issues)} issue(s) found"):
+                            for issue in data_issues:
+                                st.warning(issue)
+                if st.session_state.get("returns_model") == "Black-Litterman":
+                    # Equilibrium prior from market caps, tilted toward the user's views
+                    ticker_by_name = {stock['name']: stock['ticker'] for stock in st.session_state.stocks}
+                    bl_views = [
+                        {
+                            'asset': ticker_by_name[row["Stock"]],
+                            'relative_to': ticker_by_name.get(row["Relative To"]),
+                            'return': row["Return (%)"] / 100.0,
+                            'confidence': row["Confidence (%)"] / 100.0
+                        }
+                        for _, row in bl_view_table.iterrows()
+                        if row["Stock"] in ticker_by_name and row["Relative To"] != row["Stock"]
+                        and pd.notna(row["Return (%)"]) and pd.notna(row["Confidence (%)"])
+                    ]
+                    try:
+                        st.session_state.expected_returns, st.session_state.cov_matrix = black_litterman_returns(
+                            st.session_state.cov_matrix,
+                            bl_views,
+                            window=(str(start_date)[:10], str(end_date)[:10], data_window),
+                            risk_aversion=st.session_state.get("risk_aversion", 2.5)
+                        )
+                    except ValueError as e:
+                        st.warning(f"Black-Litterman unavailable, using historical means: {e}")
+                if "sector_cache" not in st.session_state:
+                    st.session_state.sector_cache = {}
+                sector_map, sector_indices = sector_mapping(
+                    tickers=[n['ticker'] for n in st.session_state.stocks],
+                    cache=st.session_state.sector_cache
+                )
                 bounds = tuple(
                     (stock['min'] / 100.0, stock['max'] / 100.0)
                     for stock in st.session_state.stocks
                 )
                 opt_method = st.session_state.get("opt_method", "Maximum Sharpe Ratio")
+                # Warm-start from the last optimized weights (padded/renormalized for basket edits)
+                initial_weights = None
+                if "last_weights" in st.session_state:
+                    initial_weights = warm_start_weights(st.session_state.last_weights, selected_tickers, bounds)
 
                 # --- Section: Portfolio Optimization ---
                 portfolio_weights = None
-                if opt_method == "Maximum Sharpe Ratio":
+                cardinality_info = None
+                rebalance_info = None
+                tracking_info = None
+                cardinality_methods = {
+                    "Maximum Sharpe Ratio": "max_sharpe",
+                    "Minimum Volatility": "min_volatility",
+                    "Target Return": "target_return",
+                    "Target Risk": "target_risk"
+                }
+                # Pre-solve check: infeasible limits or targets fail here instead of inside a solver
+                feasibility = check_constraints(
+                    bounds,
+                    sector_constraints=st.session_state.sector_weights,
+                    sector_indices=sector_indices,
+                    expected_returns=st.session_state.expected_returns,
+                    cov_matrix=st.session_state.cov_matrix
+                )
+                return_range, risk_range = feasibility['return_range'], feasibility['risk_range']
+                if feasibility['status'] == 'infeasible':
+                    st.error("The weight limits are infeasible: " + " ".join(feasibility['conflicts']))
+                    if feasibility['repairs']:
+                        st.info("Smallest change that makes them feasible: " + " ".join(feasibility['repairs']))
+                elif (opt_method == "Target Return"
+                      and not return_range[0] - 1e-10 <= st.session_state.get("target_value", 10.0) / 100.0 <= return_range[1] + 1e-10):
+                    st.error(
+                        f"Target return {st.session_state.get('target_value', 10.0):.2f}% is outside the attainable range "
+                        f"{return_range[0]:.2%} to {return_range[1]:.2%}."
+                    )
+                elif (opt_method == "Target Risk"
+                      and not risk_range[0] - 1e-10 <= st.session_state.get("target_value", 10.0) / 100.0 <= risk_range[1] + 1e-10):
+                    st.error(
+                        f"Target risk {st.session_state.get('target_value', 10.0):.2f}% is outside the attainable range "
+                        f"{risk_range[0]:.2%} to {risk_range[1]:.2%}."
+                    )
+                elif st.session_state.get("limit_stocks", False) and opt_method in cardinality_methods:
+                    target = st.session_state.get("target_value", 10.0) / 100.0
+                    portfolio_weights, cardinality_info = optimize_portfolio_cardinality(
+                        expected_returns=st.session_state.expected_returns,
+                        cov_matrix=st.session_state.cov_matrix,
+                        bounds=bounds,
+                        max_assets=int(st.session_state.get("max_assets", 10)),
+                        min_weight=st.session_state.get("min_position", 2.0) / 100.0,
+                        method=cardinality_methods[opt_method],
+                        target=target,
+                        risk_free_rate=risk_free_rate,
+                        sector_constraints=st.session_state.sector_weights,
+                        sector_indices=sector_indices,
+                        exact=len(st.session_state.stocks) <= 15
+                    )
+                elif opt_method == "Maximum Sharpe Ratio":
                     portfolio_weights = optimize_portfolio_max_sharpe(
                         expected_returns=st.session_state.expected_returns,
                         cov_matrix=st.session_state.cov_matrix,
                         bounds=bounds,
                         risk_free_rate=risk_free_rate,
                         sector_constraints=st.session_state.sector_weights,
-                        sector_indices=sector_indices
+                        sector_indices=sector_indices,
+                        initial_weights=initial_weights
                     )   
                 elif opt_method == "Minimum Volatility":
                     portfolio_weights = optimize_portfolio_min_volatility(
@@ -387,39 +719,171 @@ with tab2:
                         cov_matrix=st.session_state.cov_matrix,
                         bounds=bounds,
                         sector_constraints=st.session_state.sector_weights,
-                        sector_indices=sector_indices
+                        sector_indices=sector_indices,
+                        initial_weights=initial_weights
                     )
                 elif opt_method == "Target Return":
                     if 'target_value' not in st.session_state:
                         st.session_state.target_value = 10.0
                     target_return = st.session_state.target_value / 100.0
-                    portfolio_weights = optimize_portfolio_target_return(
+                    # Both targets are read off the cached corner portfolios
+                    try:
+                        portfolio_weights = cla_target_return(
+                            expected_returns=st.session_state.expected_returns,
+                            cov_matrix=st.session_state.cov_matrix,
+                            target_return=target_return,
+                            bounds=bounds,
+                            sector_constraints=st.session_state.sector_weights,
+                            sector_indices=sector_indices
+                        )
+                    except ValueError as e:
+                        st.error(str(e))
+                elif opt_method == "Target Risk":
+                    if 'target_value' not in st.session_state:
+                        st.session_state.target_value = 10.0
+                    target_risk = st.session_state.target_value / 100.0
+                    try:
+                        portfolio_weights = cla_target_risk(
+                            expected_returns=st.session_state.expected_returns,
+                            cov_matrix=st.session_state.cov_matrix,
+                            target_risk=target_risk,
+                            bounds=bounds,
+                            sector_constraints=st.session_state.sector_weights,
+                            sector_indices=sector_indices
+                        )
+                    except ValueError as e:
+                        st.error(str(e))
+                elif opt_method == "Risk Parity":
+                    risk_budgets = [
+                        st.session_state.get("risk_budgets", {}).get(stock['ticker'], 1.0)
+                        for stock in st.session_state.stocks
+                    ]
+                    portfolio_weights = optimize_portfolio_risk_parity(
                         expected_returns=st.session_state.expected_returns,
                         cov_matrix=st.session_state.cov_matrix,
-                        target_return=target_return,
                         bounds=bounds,
+                        risk_budgets=risk_budgets,
                         sector_constraints=st.session_state.sector_weights,
                         sector_indices=sector_indices
                     )
-                elif opt_method == "Target Risk":
-                    if 'target_value' not in st.session_state:
-                        st.session_state.target_value = 10.0
-                    target_risk = st.session_state.target_value / 100.0
-                    portfolio_weights = optimize_portfolio_target_risk(
+                elif opt_method == "Hierarchical Risk Parity":
+                    # The clustering is cached per estimation window; a Black-Litterman
+                    # posterior covariance depends on the views too, so key it by value
+                    hrp_window = (str(start_date)[:10], str(end_date)[:10], data_window)
+                    if st.session_state.get("returns_model") == "Black-Litterman":
+                        hrp_window = None
+                    portfolio_weights = optimize_portfolio_hrp(
+                        expected_returns=st.session_state.expected_returns,
+                        cov_matrix=st.session_state.cov_matrix,
+                        bounds=bounds,
+                        window=hrp_window,
+                        sector_constraints=st.session_state.sector_weights,
+                        sector_indices=sector_indices,
+                        sector_split=st.session_state.get("hrp_sector_split", False)
+                    )
+                elif opt_method == "Robust Mean-Variance":
+                    # Standard errors use each stock's own observation count for the
+                    # window the moments came from (preset file or incremental cache)
+                    moments_cache = st.session_state.get("moments_cache")
+                    preset_counts = (load_preset_counts(range_option, selected_tickers, today)
+                                     if precomputed is not None else None)
+                    if preset_counts is not None:
+                        num_observations = preset_counts
+                    elif (precomputed is None and moments_cache is not None
+                          and moments_cache['key'] == (str(start_date)[:10], str(end_date)[:10], data_window)
+                          and moments_cache['tickers'] == selected_tickers):
+                        num_observations = np.diag(moments_cache['moments']['count'])
+                    else:
+                        num_observations = max(int(np.busday_count(str(start_date)[:10], str(end_date)[:10])), 1)
+                    try:
+                        portfolio_weights = optimize_portfolio_robust(
+                            expected_returns=st.session_state.expected_returns,
+                            cov_matrix=st.session_state.cov_matrix,
+                            bounds=bounds,
+                            num_observations=num_observations,
+                            uncertainty=st.session_state.get("robust_uncertainty", 1.0),
+                            risk_aversion=st.session_state.get("robust_risk_aversion", 2.5),
+                            sector_constraints=st.session_state.sector_weights,
+                            sector_indices=sector_indices
+                        )
+                    except ValueError as e:
+                        st.error(str(e))
+                elif opt_method in ["Minimum Tracking Error", "Maximum Information Ratio"]:
+                    active_limits = dict(
+                        expected_returns=st.session_state.expected_returns,
+                        cov_matrix=st.session_state.cov_matrix,
+                        bounds=bounds,
+                        active_bands=st.session_state.get("stock_active_band", 5.0) / 100.0,
+                        sector_active_bands=st.session_state.get("sector_active_band", 10.0) / 100.0,
+                        sector_constraints=st.session_state.sector_weights,
+                        sector_indices=sector_indices
+                    )
+                    try:
+                        if opt_method == "Minimum Tracking Error":
+                            portfolio_weights, tracking_info = optimize_portfolio_tracking_error(
+                                target_active_return=st.session_state.get("target_active_return", 1.0) / 100.0,
+                                **active_limits
+                            )
+                        else:
+                            portfolio_weights, tracking_info = optimize_portfolio_information_ratio(**active_limits)
+                    except ValueError as e:
+                        st.error(str(e))
+                    if tracking_info is not None and portfolio_weights is None:
+                        st.error("No portfolio meets the active return target within the active-weight bands and weight bounds.")
+                elif opt_method == "Rebalance" and st.session_state.get("tax_ledger") is not None:
+                    # Latest close of each name values the lots
+                    recent = get_stock_data(selected_tickers, start_date=datetime.today() - timedelta(days=10),
+                                            end_date=datetime.today())
+                    try:
+                        portfolio_weights, rebalance_info = optimize_portfolio_tax_aware(
+                            expected_returns=st.session_state.expected_returns,
+                            cov_matrix=st.session_state.cov_matrix,
+                            ledger=st.session_state.tax_ledger,
+                            account=st.session_state.get("tax_account"),
+                            prices=recent.ffill().iloc[-1],
+                            bounds=bounds,
+                            as_of=datetime.today(),
+                            max_turnover=st.session_state.get("max_turnover", 10.0) / 100.0,
+                            trade_limits=st.session_state.get("max_trade", 5.0) / 100.0,
+                            min_trade=st.session_state.get("min_trade", 0.5) / 100.0,
+                            risk_aversion=st.session_state.get("rebalance_risk_aversion", 2.5),
+                            tax_weight=st.session_state.get("tax_weight", 1.0),
+                            sector_constraints=st.session_state.sector_weights,
+                            sector_indices=sector_indices
+                        )
+                    except ValueError as e:
+                        st.error(str(e))
+                    if rebalance_info is not None and portfolio_weights is None:
+                        st.error("No rebalance satisfies the turnover budget, trade limits and weight bounds for this account.")
+                elif opt_method == "Rebalance":
+                    portfolio_weights, rebalance_info = optimize_portfolio_rebalance(
                         expected_returns=st.session_state.expected_returns,
                         cov_matrix=st.session_state.cov_matrix,
-                        target_risk=target_risk,
+                        current_weights=st.session_state.get("current_holdings", {}),
                         bounds=bounds,
+                        max_turnover=st.session_state.get("max_turnover", 10.0) / 100.0,
+                        trade_limits=st.session_state.get("max_trade", 5.0) / 100.0,
+                        min_trade=st.session_state.get("min_trade", 0.5) / 100.0,
+                        risk_aversion=st.session_state.get("rebalance_risk_aversion", 2.5),
                         sector_constraints=st.session_state.sector_weights,
                         sector_indices=sector_indices
                     )
+                    if rebalance_info['status'] == 'infeasible':
+                        st.error("No rebalance satisfies the turnover budget, trade limits and weight bounds.")
                 else:
                     st.info("No optimization method selected.")
 
+                if cardinality_info is not None and cardinality_info['status'] == 'infeasible':
+                    st.error("No portfolio satisfies the stock count and minimum position size limits.")
+                    portfolio_weights = None
+
                 # --- Section: Results Display ---
                 if portfolio_weights is not None:
+                    st.session_state.last_weights = portfolio_weights
                     # Gradient heading helper
                     def gradient_heading(text, font_size="2em"):
+                        # Each results section is timed from its heading to the next
+                        render_stages.next(text)
                         st.markdown(
                             f"""
                             <h3 style='
@@ -468,6 +932,46 @@ with tab2:
                     port_vol = portfolio_volatility(weights, st.session_state.cov_matrix)
                     sharpe_ratio = (port_return - risk_free_rate) / port_vol
 
+                    if cardinality_info is not None:
+                        st.caption(
+                            f"Stock limit search: {cardinality_info['status']}, "
+                            f"optimality gap {cardinality_info['gap']*100:.2f}% "
+                            f"({cardinality_info['n_solves']} solves in {cardinality_info['elapsed']:.2f}s)"
+                        )
+
+                    if tracking_info is not None:
+                        st.caption(
+                            f"vs Nifty 50: tracking error {tracking_info['tracking_error']*100:.2f}%, "
+                            f"active return {tracking_info['active_return']*100:.2f}%, "
+                            f"information ratio {tracking_info['information_ratio']:.2f}"
+                        )
+
+                    if rebalance_info is not None:
+                        st.caption(
+                            f"Rebalance: one-way turnover {rebalance_info['turnover']*100:.2f}%"
+                            + (" (minimum trade size relaxed to stay feasible)"
+                               if rebalance_info['status'] == 'min_trade_relaxed' else "")
+                        )
+                        trades = rebalance_info['trades'][rebalance_info['trades'].abs() > 1e-6]
+                        if not trades.empty:
+                            with st.expander(f"Trades ({len(trades)})"):
+                                st.dataframe(
+                                    pd.DataFrame({
+                                        "Company": [company_names[tickers.index(t)] for t in trades.index],
+                                        "Trade (%)": trades.values * 100
+                                    }, index=trades.index).style.format({"Trade (%)": "{:+.2f}%"}),
+                                    use_container_width=True
+                                )
+                        lot_sales = rebalance_info.get('lot_sales')
+                        if lot_sales is not None and not lot_sales.empty:
+                            with st.expander(f"Lots Sold ({len(lot_sales)}), estimated tax ₹{rebalance_info['tax']:,.0f}"):
+                                st.dataframe(
+                                    lot_sales.drop(columns='Account').style.format(
+                                        {"Quantity": "{:,.0f}", "Cost": "₹{:,.2f}", "Sold": "{:,.2f}", "Tax": "₹{:,.0f}"}
+                                    ),
+                                    use_container_width=True
+                                )
+
                     # Display metrics centered using a flexbox div, full width, light gray boxes
                     gradient_heading("Portfolio Metrics")
                     # Add a visible subtitle below the heading
@@ -678,6 +1182,70 @@ with tab2:
                         hide_index=True
                     )
 
+                    # Risk Contribution by Company
+                    gradient_heading("Risk Contribution by Company")
+                    st.markdown(
+                        "<div style='color:#bbb; font-size:1.05em; margin-bottom: 0.5em;'>"
+                        "Each stock's share of total portfolio volatility."
+                        "</div>",
+                        unsafe_allow_html=True
+                    )
+                    risk_contrib = risk_contributions(weights, st.session_state.cov_matrix) * 100
+                    rc_fig = go.Figure(
+                        data=[
+                            go.Bar(
+                                x=company_names,
+                                y=risk_contrib,
+                                text=[f"{rc:.2f}%" for rc in risk_contrib],
+                                textposition="auto",
+                                marker_color="#FFA726",
+                                width=0.5
+                            )
+                        ]
+                    )
+                    rc_fig.update_layout(
+                        xaxis_title="Company",
+                        yaxis_title="Risk Contribution (%)",
+                        template="plotly_dark",
+                        height=400,
+                        margin=dict(l=30, r=10, t=40, b=40),
+                        xaxis=dict(tickangle=90)
+                    )
+                    st.plotly_chart(rc_fig, use_container_width=True)
+
+                    # Correlation Structure
+                    gradient_heading("Correlation Structure")
+                    st.markdown(
+                        "<div style='color:#bbb; font-size:1.05em; margin-bottom: 0.5em;'>"
+                        "Stocks ordered by hierarchical clustering; zoom out to sector averages or in to one sector."
+                        "</div>",
+                        unsafe_allow_html=True
+                    )
+                    corr_col1, corr_col2 = st.columns(2)
+                    with corr_col1:
+                        corr_level = st.radio("View", ["Stocks", "Sectors"], horizontal=True, key="corr_level")
+                    with corr_col2:
+                        corr_sector = st.selectbox(
+                            "Zoom to Sector", ["All"] + sorted({sector_map[t] or 'Unknown' for t in tickers}),
+                            key="corr_sector", disabled=corr_level == "Sectors"
+                        )
+                    corr_tickers = tickers
+                    if corr_level == "Stocks" and corr_sector != "All":
+                        corr_tickers = [t for t in tickers if (sector_map[t] or 'Unknown') == corr_sector]
+                    corr_window = (str(start_date)[:10], str(end_date)[:10], data_window)
+                    if st.session_state.get("returns_model") == "Black-Litterman":
+                        corr_window = None
+                    st.plotly_chart(
+                        correlation_figure(
+                            st.session_state.cov_matrix.loc[corr_tickers, corr_tickers],
+                            sector_map=sector_map,
+                            level=corr_level.lower(),
+                            window=corr_window,
+                            names=dict(zip(tickers, company_names))
+                        ),
+                        use_container_width=True
+                    )
+
 
                     # Efficient Frontier (Optimized Curve)
                     gradient_heading("Efficient Frontier (Optimized Curve)")
@@ -687,34 +1255,38 @@ with tab2:
                         "</div>",
                         unsafe_allow_html=True
                     )
-                    min_ret = 0
-                    max_ret = 0.60
-                    target_returns = np.linspace(min_ret, max_ret, 500)
-                    ef_curve_vols, ef_curve_rets, ef_curve_weights = [], [], []
-
-                    for tr in target_returns:
-                        try:
-                            weights_curve = optimize_portfolio_target_return(
-                                expected_returns=st.session_state.expected_returns,
-                                cov_matrix=st.session_state.cov_matrix,
-                                bounds=bounds,
-                                sector_constraints=st.session_state.sector_weights,
-                                sector_indices=sector_indices,
-                                target_return=tr
-                            )
-                            w = weights_curve['Weight']
-                            r = portfolio_return(w, st.session_state.expected_returns)
-                            v = portfolio_volatility(w, st.session_state.cov_matrix)
-                            ef_curve_vols.append(v)
-                            ef_curve_rets.append(r)
-                            ef_curve_weights.append(w)
-                        except Exception:
-                            continue
-
-                    # Convert to arrays
-                    ef_curve_vols = np.array(ef_curve_vols)
-                    ef_curve_rets = np.array(ef_curve_rets)
-                    ef_curve_weights = np.array(ef_curve_weights)
+                    # Coarse curve first, then refined where it bends; each pass
+                    # replaces the chart. Changing an input reruns the script,
+                    # which stops this loop at the next chart update.
+                    ef_placeholder = st.empty()
+                    ef_curve_weights = []
+                    for frontier in progressive_frontier(
+                        expected_returns=st.session_state.expected_returns,
+                        cov_matrix=st.session_state.cov_matrix,
+                        bounds=bounds,
+                        sector_constraints=st.session_state.sector_weights,
+                        sector_indices=sector_indices
+                    ):
+                        ef_curve_weights = frontier['weights']
+                        if not frontier['done']:
+                            ef_placeholder.plotly_chart(go.Figure(
+                                go.Scatter(
+                                    x=frontier['volatilities'], y=frontier['returns'],
+                                    mode='lines+markers', line=dict(color="#10B981", width=3), marker=dict(size=6),
+                                    hovertemplate="<b>Return:</b> %{y:.2%}<br><b>Volatility:</b> %{x:.2%}<extra></extra>",
+                                    name="Efficient Frontier (Optimized)"
+                                ),
+                                layout=dict(
+                                    xaxis_title="Volatility (Risk)", yaxis_title="Expected Return",
+                                    title=f"Efficient Frontier (refining, {len(ef_curve_weights)} points)",
+                                    template="plotly_dark", height=700
+                                )
+                            ), use_container_width=True)
+
+                    # Evaluate every frontier portfolio in one batched pass
+                    ef_curve_weights = np.array(ef_curve_weights).reshape(-1, len(tickers))
+                    ef_curve_rets = batch_portfolio_returns(ef_curve_weights, st.session_state.expected_returns)
+                    ef_curve_vols = batch_portfolio_volatilities(ef_curve_weights, st.session_state.cov_matrix)
 
                     # Build hover text showing portfolio weights
                     hover_texts = []
@@ -778,9 +1350,213 @@ with tab2:
                         height=700
                     )
 
-                    st.plotly_chart(ef_fig, use_container_width=True)
+                    ef_placeholder.plotly_chart(ef_fig, use_container_width=True)
+
+                    # Resampled Efficient Frontier
+                    gradient_heading("Resampled Efficient Frontier")
+                    st.markdown(
+                        "<div style='color:#bbb; font-size:1.05em; margin-bottom: 0.5em;'>"
+                        "Frontier averaged over block-bootstrapped return histories, "
+                        "less sensitive to estimation error in the inputs."
+                        "</div>",
+                        unsafe_allow_html=True
+                    )
+                    rs_col1, rs_col2 = st.columns(2)
+                    with rs_col1:
+                        num_samples = st.number_input("Bootstrap Samples", min_value=50, max_value=2000, value=500, step=50)
+                    with rs_col2:
+                        block_length = st.number_input("Block Length (days)", min_value=1, max_value=120, value=20)
+                    resample_key = (
+                        tuple(tickers), str(start_date)[:10], str(end_date)[:10], data_window, bounds,
+                        str(st.session_state.sector_weights), int(num_samples), int(block_length)
+                    )
+                    if st.button("🔁 Run Resampled Frontier", use_container_width=True):
+                        st.session_state.moments_cache, _, _, _ = incremental_moments(
+                            st.session_state.get("moments_cache"),
+                            tickers,
+                            start_date=start_date,
+                            end_date=end_date,
+                            window=data_window
+                        )
+                        # Identical runs (same inputs, data and seed) are loaded from disk
+                        resample_manifest = build_manifest(
+                            "resampled_frontier",
+                            {
+                                "tickers": tickers,
+                                "window": [str(start_date)[:10], str(end_date)[:10], data_window],
+                                "bounds": bounds,
+                                "sector_constraints": st.session_state.sector_weights,
+                                "num_samples": int(num_samples),
+                                "block_length": int(block_length)
+                            },
+                            data=st.session_state.moments_cache['returns'],
+                            seed=0
+                        )
+                        cached = load_artifact(resample_manifest)
+                        if cached is not None:
+                            st.session_state.resampled = {"key": resample_key, "weights": cached['weights']}
+                        else:
+                            progress_bar = st.progress(0.0, text="Resampling...")
+                            resample_chart = st.empty()
+                            resample_start = time.perf_counter()
+                            for partial in resampled_frontier_iter(
+                                st.session_state.moments_cache['returns'],
+                                bounds,
+                                num_samples=int(num_samples),
+                                block_length=int(block_length),
+                                sector_constraints=st.session_state.sector_weights,
+                                sector_indices=sector_indices,
+                                seed=resample_manifest['seed']
+                            ):
+                                progress_bar.progress(
+                                    partial['completed'] / partial['total'],
+                                    text=f"Resampling... {partial['completed']}/{partial['total']} samples"
+                                )
+                                if partial['weights'] is not None:
+                                    st.session_state.resampled = {"key": resample_key, "weights": partial['weights']}
+                                    resample_chart.line_chart(pd.DataFrame({
+                                        "Return": batch_portfolio_returns(partial['weights'], st.session_state.expected_returns),
+                                        "Volatility": batch_portfolio_volatilities(partial['weights'], st.session_state.cov_matrix)
+                                    }), x="Volatility", y="Return")
+                            if partial['weights'] is not None:
+                                save_artifact(
+                                    resample_manifest,
+                                    {"weights": partial['weights']},
+                                    outputs={"solved": partial['solved'], "seconds": time.perf_counter() - resample_start}
+                                )
+                            progress_bar.empty()
+                            resample_chart.empty()
+
+                    if st.session_state.get("resampled", {}).get("key") == resample_key:
+                        rs_weights = st.session_state.resampled["weights"]
+                        rs_rets = batch_portfolio_returns(rs_weights, st.session_state.expected_returns)
+                        rs_vols = batch_portfolio_volatilities(rs_weights, st.session_state.cov_matrix)
+                        rs_hover = [
+                            f"<b>Return:</b> {rs_rets[k]*100:.2f}%<br><b>Volatility:</b> {rs_vols[k]*100:.2f}%<br>" +
+                            "<br>".join([
+                                f"{company_names[i]} ({tickers[i]}): {w[i]*100:.2f}%"
+                                for i in range(len(tickers)) if w[i] > 0.01
+                            ])
+                            for k, w in enumerate(rs_weights)
+                        ]
+                        rs_fig = go.Figure()
+                        rs_fig.add_trace(go.Scatter(
+                            x=ef_curve_vols, y=ef_curve_rets, mode='lines',
+                            line=dict(color="#10B981", width=2, dash="dot"),
+                            name="Efficient Frontier (Optimized)", hoverinfo="skip"
+                        ))
+                        rs_fig.add_trace(go.Scatter(
+                            x=rs_vols, y=rs_rets, mode='lines+markers',
+                            line=dict(color="#A78BFA", width=3), marker=dict(size=7),
+                            text=rs_hover, hoverinfo="text", name="Resampled Frontier"
+                        ))
+                        rs_fig.update_layout(
+                            xaxis_title="Volatility (Risk)",
+                            yaxis_title="Expected Return",
+                            template="plotly_dark",
+                            height=550
+                        )
+                        st.plotly_chart(rs_fig, use_container_width=True)
+
+                    # Historical Stress Scenarios
+                    gradient_heading("Historical Stress Scenarios")
+                    st.markdown(
+                        "<div style='color:#bbb; font-size:1.05em; margin-bottom: 0.5em;'>"
+                        "How these portfolios would have fared through past Indian market stress periods."
+                        "</div>",
+                        unsafe_allow_html=True
+                    )
+                    stress_key = tuple(tickers)
+                    if st.session_state.get("stress_history", {}).get("key") != stress_key:
+                        earliest = min(start for start, _ in STRESS_SCENARIOS.values())
+                        history = get_stock_data(tickers, start_date=earliest, end_date=datetime.today())
+                        aligned_history = align_price_data(history, tickers)
+                        st.session_state.stress_history = {
+                            "key": stress_key,
+                            "returns": aligned_history['returns'],
+                            "dates": aligned_history['dates']
+                        }
+                    stress_portfolios = np.vstack([
+                        portfolio_weights['Weight'].values,
+                        np.ones(len(tickers)) / len(tickers),
+                        ef_curve_weights[np.argmax((ef_curve_rets - risk_free_rate) / ef_curve_vols)],
+                        ef_curve_weights[np.argmin(ef_curve_vols)]
+                    ]) if len(ef_curve_weights) else np.vstack([
+                        portfolio_weights['Weight'].values,
+                        np.ones(len(tickers)) / len(tickers)
+                    ])
+                    stress_names = ["Your Portfolio", "Equal Weight", "Max Sharpe", "Min Volatility"][:len(stress_portfolios)]
+                    stress = stress_test(
+                        stress_portfolios,
+                        st.session_state.stress_history["returns"],
+                        st.session_state.stress_history["dates"],
+                        portfolio_names=stress_names
+                    )
+                    if stress['period_return'].empty:
+                        st.info("No stress scenarios fall inside the available price history.")
+                    else:
+                        stress_tabs = st.tabs(["Period Return", "Max Drawdown", "Worst Day"])
+                        for stress_tab, metric in zip(stress_tabs, ['period_return', 'max_drawdown', 'worst_day']):
+                            with stress_tab:
+                                st.dataframe(
+                                    (stress[metric] * 100).style.format("{:.2f}%"),
+                                    use_container_width=True
+                                )
+
+                    # Live Intraday Mode
+                    gradient_heading("Live Intraday Mode")
+                    st.markdown(
+                        "<div style='color:#bbb; font-size:1.05em; margin-bottom: 0.5em;'>"
+                        "Marks your portfolio to a replayed quote feed (Data/raw_data.csv). "
+                        "Names without quotes stay at their starting value."
+                        "</div>",
+                        unsafe_allow_html=True
+                    )
+                    live_col1, live_col2 = st.columns(2)
+                    with live_col1:
+                        live_rate = st.number_input("Replay Speed (quotes/sec, 0 = max)", min_value=0, max_value=100000, value=2000, step=500)
+                    with live_col2:
+                        live_value = st.number_input("Portfolio Value (₹)", min_value=1000.0, value=1_000_000.0, step=10000.0)
+                    if st.button("Start Live Replay"):
+                        live_metrics = st.empty()
+                        live_chart = st.empty()
+
+                        def show_live(snapshot):
+                            with live_metrics.container():
+                                m1, m2, m3, m4 = st.columns(4)
+                                m1.metric("Value", f"₹{snapshot['value']:,.0f}", f"{snapshot['return']*100:.2f}%")
+                                m2.metric("P&L", f"₹{snapshot['pnl']:,.0f}")
+                                m3.metric(
+                                    "Realized Vol (ann.)",
+                                    f"{snapshot['realized_volatility']*100:.2f}%" if snapshot['sessions'] > 1 else "—",
+                                    help="Annualized from close-to-close session returns; the replayed "
+                                         "open/high/low ticks within each day are not used."
+                                )
+                                m4.metric("Drift from Target", f"{snapshot['drift']*100:.2f}%")
+                                st.caption(f"{snapshot['ticks']:,} quotes over {snapshot['sessions']:,} completed sessions, "
+                                           f"as of {snapshot['timestamp']}")
+                            live_chart.bar_chart(pd.DataFrame({
+                                "Target": portfolio_weights['Weight'].values,
+                                "Live": snapshot['weights'].values
+                            }, index=company_names))
+
+                        asyncio.run(stream_portfolio(
+                            replay_quotes(load_replay_bars(), rate=live_rate or None),
+                            LivePortfolio(portfolio_weights['Weight'], live_value),
+                            on_update=show_live,
+                            interval=0.25
+                        ))
                 else:
                     st.info("Portfolio optimization did not return any results.")
+
+            # --- Section: Timing Waterfall ---
+            render_stages.close()
+            recorded = tracing.spans(trace_recorder) if trace_recorder is not None else []
+            if recorded:
+                trace_path = tracing.export_chrome_trace(recorded)
+                with st.expander("⏱️ Timing Waterfall", expanded=False):
+                    st.plotly_chart(tracing.waterfall_figure(recorded), use_container_width=True)
+                    st.caption(f"Chrome trace saved to {trace_path} (open in chrome://tracing or ui.perfetto.dev).")
     else:
         st.info("Please optimize your portfolio first using the 'Optimizer' tab.")
 
@@ -0,0 +1,486 @@
+# =========================
+# Optimizer Benchmarks
+# =========================
+# Run from the App/ folder:  python benchmarks.py
+# Uses a seeded synthetic one-factor return panel so timings are comparable
+# across machines without a network connection.
+
+import asyncio
+import json
+import os
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+
+from stress import stress_test, rolling_windows
+from resampling import resampled_frontier
+from black_litterman import black_litterman_returns
+from rebalance import optimize_portfolio_rebalance, rebalance_accounts
+from simulation import simulate_frontier
+from live import LivePortfolio, replay_quotes, stream_portfolio
+from tracking import optimize_portfolio_tracking_error, optimize_portfolio_information_ratio
+from nifty50_dict import nifty50_tickers
+import tracing
+from correlation_view import correlation_figure
+from robust import optimize_portfolio_robust
+from tax_lots import LotLedger, optimize_portfolio_tax_aware, rebalance_ledger
+from optimizer import (
+    portfolio_volatility,
+    neg_sharpe_ratio,
+    batch_sharpe_ratios,
+    pairwise_moments,
+    optimize_portfolio_max_sharpe,
+    optimize_portfolio_risk_parity,
+    optimize_portfolio_hrp,
+    _linkage_cache,
+    optimize_portfolio_cardinality,
+    optimize_portfolio_target_risk,
+    optimize_portfolio_target_return,
+    progressive_frontier,
+    critical_line,
+    _cla_cache,
+    cla_target_return,
+    cla_target_risk,
+    frontier_range,
+    check_constraints
+)
+
+
+def synthetic_returns(num_assets=50, num_days=750, seed=0):
+    """
+    Build a seeded one-factor daily return panel.
+
+    Args:
+        num_assets (int): Number of assets.
+        num_days (int): Number of daily observations.
+        seed (int): Random seed.
+
+    Returns:
+        pd.DataFrame: num_days x num_assets daily returns.
+    """
+    rng = np.random.default_rng(seed)
+    tickers = [f"STOCK{i}" for i in range(num_assets)]
+    market = rng.normal(0.0004, 0.01, size=(num_days, 1))
+    betas = rng.uniform(0.5, 1.5, size=num_assets)
+    idio = rng.normal(0.0, 1.0, size=(num_days, num_assets)) * rng.uniform(0.005, 0.02, num_assets)
+    return pd.DataFrame(market * betas + idio + rng.normal(0.0002, 0.0003, num_assets), columns=tickers)
+
+
+def synthetic_moments(num_assets=50, num_days=750, seed=0):
+    """
+    Build annualized expected returns and covariance from a seeded one-factor model.
+
+    Args:
+        num_assets (int): Number of assets.
+        num_days (int): Number of daily observations.
+        seed (int): Random seed.
+
+    Returns:
+        tuple: (expected_returns, cov_matrix) as pd.Series and pd.DataFrame.
+    """
+    returns = synthetic_returns(num_assets, num_days, seed)
+    return returns.mean() * 252, returns.cov() * 252
+
+
+def timeit(func, repeat=5):
+    """Return the best wall time in milliseconds and the last result of func()."""
+    best = np.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1e3, result
+
+
+def bench_risk_parity():
+    expected_returns, cov_matrix = synthetic_moments(50)
+    bounds = tuple((0.0, 1.0) for _ in range(50))
+    ms, _ = timeit(lambda: optimize_portfolio_risk_parity(expected_returns, cov_matrix, bounds))
+    print(f"Risk parity, N=50:                       {ms:8.2f} ms")
+    bounds = tuple((0.015, 0.025) for _ in range(50))
+    ms, _ = timeit(lambda: optimize_portfolio_risk_parity(expected_returns, cov_matrix, bounds))
+    print(f"Risk parity, N=50, binding bounds:       {ms:8.2f} ms")
+
+
+def bench_cardinality():
+    expected_returns, cov_matrix = synthetic_moments(50)
+    bounds = tuple((0.0, 1.0) for _ in range(50))
+    for method in ['min_volatility', 'max_sharpe']:
+        ms, (_, info) = timeit(lambda: optimize_portfolio_cardinality(
+            expected_returns, cov_matrix, bounds, max_assets=10, min_weight=0.02,
+            method=method, risk_free_rate=0.06
+        ), repeat=1)
+        print(f"Cardinality {method}, N=50 K=10: {ms:8.2f} ms  "
+              f"gap={info['gap']:.2%} solves={info['n_solves']}")
+    expected_returns, cov_matrix = expected_returns.iloc[:12], cov_matrix.iloc[:12, :12]
+    bounds = tuple((0.0, 1.0) for _ in range(12))
+    ms, (_, info) = timeit(lambda: optimize_portfolio_cardinality(
+        expected_returns, cov_matrix, bounds, max_assets=4, min_weight=0.02,
+        method='min_volatility', exact=True, time_limit=30.0
+    ), repeat=1)
+    print(f"Cardinality exact B&B, N=12 K=4:         {ms:8.2f} ms  "
+          f"gap={info['gap']:.2%} status={info['status']}")
+
+
+def bench_target_risk():
+    expected_returns, cov_matrix = synthetic_moments(50)
+    bounds = tuple((0.0, 1.0) for _ in range(50))
+    ms, frontier = timeit(lambda: frontier_range(expected_returns, cov_matrix, bounds))
+    print(f"Frontier end points, N=50:               {ms:8.2f} ms")
+    low, high = frontier['min_volatility'], frontier['max_return_volatility']
+    for target in np.linspace(low, high, 5)[1:-1]:
+        ms, _ = timeit(lambda: optimize_portfolio_target_risk(expected_returns, cov_matrix, target, bounds), repeat=3)
+        print(f"Target risk {target:.2%}, N=50:            {ms:8.2f} ms")
+
+
+def bench_batched_kernels():
+    expected_returns, cov_matrix = synthetic_moments(50)
+    mu, cov = expected_returns.values, cov_matrix.values
+    weights = np.random.default_rng(1).random((100_000, 50))
+    weights /= weights.sum(axis=1, keepdims=True)
+
+    ms, _ = timeit(lambda: [portfolio_volatility(w, cov_matrix) for w in weights[:10_000]], repeat=1)
+    print(f"Volatility loop (pandas cov), M=10k:     {ms:8.2f} ms")
+    ms, _ = timeit(lambda: [portfolio_volatility(w, cov) for w in weights[:10_000]], repeat=1)
+    print(f"Volatility loop (ndarray cov), M=10k:    {ms:8.2f} ms")
+    ms, _ = timeit(lambda: batch_sharpe_ratios(weights, mu, cov, 0.06))
+    print(f"Batched NumPy kernel, M=100k:            {ms:8.2f} ms")
+
+    w = weights[0]
+    ms, _ = timeit(lambda: [neg_sharpe_ratio(w, expected_returns, cov_matrix, 0.06) for _ in range(1000)])
+    print(f"neg_sharpe_ratio x1000 (pandas):         {ms:8.2f} ms")
+    ms, _ = timeit(lambda: [neg_sharpe_ratio(w, mu, cov, 0.06) for _ in range(1000)])
+    print(f"neg_sharpe_ratio x1000 (ndarray):        {ms:8.2f} ms")
+    bounds = tuple((0.0, 1.0) for _ in range(50))
+    ms, _ = timeit(lambda: optimize_portfolio_max_sharpe(expected_returns, cov_matrix, bounds, 0.06), repeat=3)
+    print(f"Max Sharpe SLSQP, N=50:                  {ms:8.2f} ms")
+
+
+def bench_stress():
+    rng = np.random.default_rng(2)
+    dates = pd.bdate_range("2020-01-01", periods=1250)
+    returns = rng.normal(0.0004, 0.012, size=(1250, 50))
+    weights = rng.random((500, 50))
+    weights /= weights.sum(axis=1, keepdims=True)
+    windows = rolling_windows(dates, length=60, step=24)
+    ms, result = timeit(lambda: stress_test(weights, returns, dates, windows), repeat=3)
+    print(f"Stress test, 500 portfolios x {len(result['period_return'])} windows: {ms:8.2f} ms")
+
+
+def bench_resampling():
+    returns = synthetic_returns(50)
+    bounds = tuple((0.0, 1.0) for _ in range(50))
+    ms, _ = timeit(lambda: resampled_frontier(returns, bounds, num_samples=50, workers=0), repeat=1)
+    print(f"Resampled frontier, B=50 N=50, serial:   {ms:8.2f} ms")
+    ms, _ = timeit(lambda: resampled_frontier(returns, bounds, num_samples=500), repeat=1)
+    print(f"Resampled frontier, B=500 N=50, pool:    {ms:8.2f} ms")
+
+
+def bench_black_litterman():
+    _, cov_matrix = synthetic_moments(50)
+    tickers = list(cov_matrix.index)
+    market_caps = pd.Series(np.random.default_rng(3).uniform(5e4, 1.5e6, 50), index=tickers)
+    for num_views in [5, 20]:
+        views = [
+            {'asset': tickers[i], 'relative_to': tickers[i + 25] if i % 2 else None,
+             'return': 0.02 * (i % 4), 'confidence': 0.5}
+            for i in range(num_views)
+        ]
+        ms, _ = timeit(lambda: black_litterman_returns(cov_matrix, views, ('bench',), market_caps))
+        print(f"Black-Litterman posterior, N=50 k={num_views}:  {ms:8.2f} ms")
+
+
+def bench_rebalance():
+    expected_returns, cov_matrix = synthetic_moments(50)
+    bounds = tuple((0.0, 0.2) for _ in range(50))
+    rng = np.random.default_rng(4)
+    current = rng.random(50)
+    ms, (_, info) = timeit(lambda: optimize_portfolio_rebalance(
+        expected_returns, cov_matrix, current / current.sum(), bounds,
+        max_turnover=0.10, trade_limits=0.03, min_trade=0.005
+    ))
+    print(f"Rebalance, N=50, 10% turnover:           {ms:8.2f} ms  turnover={info['turnover']:.2%}")
+    accounts = pd.DataFrame(rng.random((300, 50)), columns=expected_returns.index)
+    ms, _ = timeit(lambda: rebalance_accounts(
+        expected_returns, cov_matrix, accounts, bounds,
+        max_turnover=0.10, trade_limits=0.03, min_trade=0.005
+    ), repeat=1)
+    print(f"Rebalance, 300 accounts x N=50:          {ms:8.2f} ms")
+
+
+def bench_simulation():
+    expected_returns, cov_matrix = synthetic_moments(50)
+    for simulations in [1_000_000, 10_000_000]:
+        ms, reducer = timeit(lambda: simulate_frontier(expected_returns, cov_matrix, 0.06, simulations, seed=0), repeat=1)
+        print(f"Streaming simulation, {simulations // 1_000_000}M portfolios:  {ms:8.2f} ms  "
+              f"max Sharpe={reducer.max_sharpe['sharpe']:.3f}")
+    ms, parallel = timeit(lambda: simulate_frontier(expected_returns, cov_matrix, 0.06, 1_000_000, seed=0, workers=2), repeat=1)
+    serial = simulate_frontier(expected_returns, cov_matrix, 0.06, 1_000_000, seed=0)
+    identical = serial.sums == parallel.sums and np.array_equal(serial.envelope_weights, parallel.envelope_weights, equal_nan=True)
+    print(f"Streaming simulation, 1M, 2 workers:     {ms:8.2f} ms  bit-identical={identical}")
+
+
+def bench_progressive_frontier():
+    expected_returns, cov_matrix = synthetic_moments(50)
+    bounds = tuple((0, 1) for _ in range(50))
+    start = time.perf_counter()
+    first = None
+    for frontier in progressive_frontier(expected_returns, cov_matrix, bounds):
+        first = first or (time.perf_counter() - start) * 1e3
+    total = (time.perf_counter() - start) * 1e3
+    print(f"Progressive frontier, first curve:        {first:8.2f} ms  ({len(frontier['returns'])} points in {total:.0f} ms)")
+
+    # Reference: independent equality-constrained solves at every 10th refined target
+    targets = frontier['returns'][::10]
+    ms, reference = timeit(lambda: np.array([
+        optimize_portfolio_target_return(expected_returns, cov_matrix, target, bounds)['Weight'].values
+        for target in targets
+    ]), repeat=1)
+    gap = np.abs(np.sqrt(np.einsum('ij,jk,ik->i', reference, cov_matrix.values, reference))
+                 - frontier['volatilities'][::10]).max()
+    print(f"Target-return solves, {len(targets)} points:       {ms:8.2f} ms  max vol gap={gap:.1e}")
+
+
+def bench_live():
+    returns = synthetic_returns(50, 2000)
+    close = 100 * np.exp(returns.cumsum())
+    bars = {'Open': close.shift(1).fillna(100.0), 'Close': close}
+    weights = pd.Series(1 / 50, index=close.columns)
+    snapshots = []
+    portfolio = LivePortfolio(weights, 1e7)
+    start = time.perf_counter()
+    final = asyncio.run(stream_portfolio(replay_quotes(bars), portfolio, on_update=snapshots.append, interval=0.05))
+    seconds = time.perf_counter() - start
+    print(f"Live replay, 50 names, {final['ticks']} ticks:   {seconds * 1e3:8.2f} ms  "
+          f"{final['ticks'] / seconds:,.0f} ticks/s  ({len(snapshots)} UI updates)")
+    # Close-to-close realized vol should match the daily portfolio returns of the
+    # buy-and-hold replay, whatever the intrabar path
+    values = (close / close.iloc[0] * weights * 1e7).sum(axis=1)
+    expected = np.sqrt(252 * (np.log(values).diff().dropna() ** 2).mean())
+    print(f"Live realized vol vs daily closes:       {final['realized_volatility']:.4f} vs {expected:.4f}  "
+          f"({final['sessions']} sessions)")
+
+
+def bench_critical_line():
+    expected_returns, cov_matrix = synthetic_moments(50)
+    bounds = tuple((0, 0.3) for _ in range(50))
+    _cla_cache.clear()
+    ms, corners = timeit(lambda: critical_line(expected_returns, cov_matrix, bounds), repeat=1)
+    print(f"Critical line, {len(corners['returns'])} corner portfolios:     {ms:8.2f} ms")
+    target = float(np.median(corners['volatilities']))
+    ms, _ = timeit(lambda: cla_target_risk(expected_returns, cov_matrix, target, bounds))
+    print(f"CLA target-risk query (cached):          {ms:8.2f} ms")
+    ms, _ = timeit(lambda: optimize_portfolio_target_risk(expected_returns, cov_matrix, target, bounds), repeat=1)
+    print(f"Target-risk frontier search:             {ms:8.2f} ms")
+    target = float(np.median(corners['returns']))
+    ms, _ = timeit(lambda: cla_target_return(expected_returns, cov_matrix, target, bounds))
+    print(f"CLA target-return query (cached):        {ms:8.2f} ms")
+    ms, _ = timeit(lambda: optimize_portfolio_target_return(expected_returns, cov_matrix, target, bounds), repeat=1)
+    print(f"Target-return SLSQP solve:               {ms:8.2f} ms")
+
+
+def bench_hrp():
+    for n in [50, 500]:
+        # Short window: the sample covariance of 500 names is singular
+        expected_returns, cov_matrix = synthetic_moments(n, num_days=120)
+        bounds = tuple((0, 1) for _ in range(n))
+        _linkage_cache.clear()
+        cold, _ = timeit(lambda: optimize_portfolio_hrp(expected_returns, cov_matrix, bounds, window=('bench', n)), repeat=1)
+        ms, weights = timeit(lambda: optimize_portfolio_hrp(expected_returns, cov_matrix, bounds, window=('bench', n)))
+        print(f"HRP, {n} assets (cond={np.linalg.cond(cov_matrix.values):.0e}):  {ms:8.2f} ms  "
+              f"cold {cold:.2f} ms  max weight={weights['Weight'].max():.3f}")
+
+
+def bench_tracking():
+    tickers = list(nifty50_tickers.values())
+    expected_returns, cov_matrix = synthetic_moments(len(tickers))
+    expected_returns.index = tickers
+    cov_matrix.index = cov_matrix.columns = tickers
+    bounds = tuple((0, 0.15) for _ in tickers)
+    sector_indices = {'A': list(range(10)), 'B': list(range(10, 25)), 'C': list(range(25, 50))}
+    limits = dict(active_bands=0.02, sector_active_bands=0.05, sector_indices=sector_indices)
+    ms, (_, info) = timeit(lambda: optimize_portfolio_tracking_error(
+        expected_returns, cov_matrix, bounds, target_active_return=0.01, **limits))
+    print(f"Min tracking error, 50 assets:           {ms:8.2f} ms  TE={info['tracking_error']:.4f}")
+    ms, (_, info) = timeit(lambda: optimize_portfolio_information_ratio(expected_returns, cov_matrix, bounds, **limits))
+    print(f"Max information ratio, 50 assets:        {ms:8.2f} ms  IR={info['information_ratio']:.3f}")
+
+
+def bench_correlation_view():
+    for n in [50, 500]:
+        _, cov_matrix = synthetic_moments(n, num_days=250)
+        sector_map = {ticker: f"Sector {i % 11}" for i, ticker in enumerate(cov_matrix.index)}
+        for level in ['stocks', 'sectors']:
+            ms, payload = timeit(lambda: correlation_figure(cov_matrix, sector_map, level, window=('bench', n)).to_json())
+            print(f"Correlation view, {n} assets, {level:<8}  {ms:8.2f} ms  payload {len(payload) / 1024:.0f} KB")
+
+
+def bench_precision():
+    """float32 vs float64: speed and memory, with the error of each path checked against a bound."""
+    def report(label, error, bound, ms64=None, ms32=None, mb64=None, mb32=None):
+        timing = "" if ms64 is None else (f"float64 {ms64:8.2f} ms {mb64:7.1f} MB | "
+                                          f"float32 {ms32:8.2f} ms {mb32:7.1f} MB | ")
+        print(f"{label:<30} {timing}max error {error:.1e} (bound {bound:.0e}) {'ok' if error <= bound else 'EXCEEDED'}")
+
+    # Moments of a 500-asset panel with a missing block
+    returns = synthetic_returns(500, 1500).to_numpy().copy()
+    returns[:100, :50] = np.nan
+    ms64, m64 = timeit(lambda: pairwise_moments(returns))
+    ms32, m32 = timeit(lambda: pairwise_moments(returns, 'float32'))
+    error = np.abs(m32['cov'] - m64['cov']).max() / np.abs(m64['cov']).max()
+    report("Pairwise moments, N=500", error, 1e-5, ms64, ms32, returns.nbytes / 2**20, returns.nbytes / 2**21)
+
+    # Batched evaluation of 200k portfolios over 500 assets
+    expected_returns, cov_matrix = synthetic_moments(500)
+    weights = np.random.default_rng(1).random((200_000, 500))
+    weights /= weights.sum(axis=1, keepdims=True)
+    weights32 = weights.astype(np.float32)
+    ms64, (r64, v64, s64) = timeit(lambda: batch_sharpe_ratios(weights, expected_returns, cov_matrix, 0.06), repeat=1)
+    ms32, (r32, v32, s32) = timeit(lambda: batch_sharpe_ratios(weights32, expected_returns, cov_matrix, 0.06,
+                                                               precision='float32'), repeat=1)
+    report("Batched volatility, 200k x 500", np.abs(v32 / v64 - 1).max(), 1e-5,
+           ms64, ms32, weights.nbytes / 2**20, weights32.nbytes / 2**20)
+    report("Batched Sharpe, 200k x 500", np.abs(s32 - s64).max(), 1e-5)
+
+    # Optimized weights from float32 moments
+    returns = synthetic_returns(50, 750)
+    bounds = tuple((0.0, 0.3) for _ in range(50))
+    tickers = returns.columns
+    optimized = []
+    for precision in ['float64', 'float32']:
+        moments = pairwise_moments(returns.to_numpy(), precision)
+        mu = pd.Series(moments['mean'], index=tickers)
+        cov = pd.DataFrame(moments['cov'], index=tickers, columns=tickers)
+        optimized.append(frontier_range(mu, cov, bounds)['min_volatility_weights'])
+    report("Min-volatility weights, N=50", np.abs(optimized[0] - optimized[1]).max(), 1e-4)
+
+
+def bench_robust():
+    expected_returns, cov_matrix = synthetic_moments(50)
+    bounds = tuple((0, 0.2) for _ in range(50))
+    sector_indices = {'A': list(range(10)), 'B': list(range(10, 25))}
+    sector_constraints = {'A': {'min': 10, 'max': 20}, 'B': {'min': 20, 'max': 40}}
+    for uncertainty in [0.0, 1.0, 3.0]:
+        ms, weights = timeit(lambda: optimize_portfolio_robust(expected_returns, cov_matrix, bounds, 750, uncertainty,
+                                                               sector_constraints=sector_constraints,
+                                                               sector_indices=sector_indices))
+        print(f"Robust MVO SOCP, kappa={uncertainty:.0f}:               {ms:8.2f} ms  "
+              f"holdings={(weights['Weight'] > 1e-4).sum()}")
+
+
+def bench_tax_lots():
+    expected_returns, cov_matrix = synthetic_moments(50)
+    tickers = list(expected_returns.index)
+    bounds = tuple((0.0, 0.2) for _ in range(50))
+    rng = np.random.default_rng(5)
+    num_lots = 20_000
+    prices = pd.Series(rng.uniform(100, 3000, 50), index=tickers)
+    lots = pd.DataFrame({
+        'Account': rng.integers(0, 300, num_lots),
+        'Ticker': rng.choice(tickers, num_lots),
+        'Date': pd.Timestamp('2024-10-01') + pd.to_timedelta(rng.integers(0, 730, num_lots), 'D'),
+        'Quantity': rng.integers(1, 200, num_lots).astype(float),
+    })
+    lots['Cost'] = prices.reindex(lots['Ticker']).values * rng.uniform(0.6, 1.4, num_lots)
+    as_of = '2026-10-01'
+
+    ms, ledger = timeit(lambda: LotLedger.from_frame(lots))
+    print(f"Lot ledger, 20k lots x 300 accounts:     {ms:8.2f} ms")
+    ms, _ = timeit(lambda: ledger.tax_per_unit(prices, as_of))
+    print(f"Tax per unit, all lots:                  {ms:8.2f} ms")
+
+    account = ledger.accounts[0]
+    ms, (_, info) = timeit(lambda: optimize_portfolio_tax_aware(
+        expected_returns, cov_matrix, ledger, account, prices, bounds, as_of, max_turnover=0.10))
+    # No name may be both bought and sold
+    sold_names = set(info['lot_sales']['Ticker'])
+    washed = sum(ticker in sold_names for ticker in info['trades'].index[info['trades'] > 0])
+    print(f"Tax-aware rebalance, 1 account:          {ms:8.2f} ms  lots sold={len(info['lot_sales'])}  "
+          f"bought and sold={washed}")
+    ms, (_, summary) = timeit(lambda: rebalance_ledger(
+        expected_returns, cov_matrix, ledger, prices, bounds, as_of, max_turnover=0.10), repeat=1)
+    _, blind = rebalance_ledger(expected_returns, cov_matrix, ledger, prices, bounds, as_of,
+                                max_turnover=0.10, tax_weight=0.0)
+    print(f"Tax-aware rebalance, 300 accounts:       {ms:8.2f} ms  "
+          f"feasible={(summary['status'] == 'optimal').sum()}  "
+          f"tax={summary['tax'].sum():,.0f} (tax-blind {blind['tax'].sum():,.0f})")
+
+
+def bench_feasibility():
+    expected_returns, cov_matrix = synthetic_moments(50)
+    sector_indices = {'A': list(range(10)), 'B': list(range(10, 25)), 'C': list(range(25, 50))}
+    cases = {
+        'feasible': (tuple((0.0, 0.1) for _ in range(50)), {'A': {'min': 10, 'max': 40}}),
+        'mins > 100%': (tuple((0.03, 0.1) for _ in range(50)), None),
+        'sector conflict': (tuple((0.0, 0.1) for _ in range(50)),
+                            {'A': {'min': 50, 'max': 60}, 'B': {'min': 40, 'max': 60}, 'C': {'min': 20, 'max': 40}}),
+    }
+    for name, (bounds, sectors) in cases.items():
+        ms, result = timeit(lambda: check_constraints(bounds, sectors, sector_indices, expected_returns))
+        repaired = ''
+        if result['status'] == 'infeasible':
+            fixed = check_constraints(result['repaired_bounds'], result['repaired_sector_constraints'], sector_indices)
+            repaired = f"  repairs={len(result['repairs'])}  repaired feasible={fixed['status'] == 'feasible'}"
+        print(f"Feasibility check, {name + ':':<17}    {ms:8.2f} ms  {result['status']}{repaired}")
+
+    bounds, sectors = cases['feasible']
+    ms, result = timeit(lambda: check_constraints(bounds, sectors, sector_indices, expected_returns, cov_matrix))
+    frontier = frontier_range(expected_returns, cov_matrix, bounds, sectors, sector_indices)
+    low, high = result['risk_range']
+    print(f"Feasibility check with risk range:       {ms:8.2f} ms  {low:.2%} to {high:.2%}  "
+          f"(frontier {frontier['min_volatility']:.2%} to {frontier['max_return_volatility']:.2%})")
+
+
+def bench_tracing():
+    @tracing.traced('bench')
+    def noop():
+        return None
+
+    calls = 200_000
+    for enabled in (False, True):
+        tracing.start(enabled)
+        start = time.perf_counter()
+        for _ in range(calls):
+            noop()
+        ns = (time.perf_counter() - start) / calls * 1e9
+        print(f"Traced call, tracing {'on' if enabled else 'off'}:          {ns:8.0f} ns per call")
+
+    expected_returns, cov_matrix = synthetic_moments(50)
+    bounds = tuple((0.0, 0.2) for _ in range(50))
+    recorder = tracing.start()
+    with tracing.span('pipeline', 'app'):
+        check_constraints(bounds, expected_returns=expected_returns)
+        optimize_portfolio_max_sharpe(expected_returns, cov_matrix, bounds, 0.06)
+        for _ in progressive_frontier(expected_returns, cov_matrix, bounds, initial_points=10, max_points=20):
+            pass
+    path = os.path.join(tempfile.mkdtemp(), "trace.json")
+    tracing.export_chrome_trace(tracing.spans(recorder), path)
+    with open(path) as f:
+        events = json.load(f)['traceEvents']
+    tracing.start(False)
+    print(f"Chrome trace of a small pipeline:        {len(events)} spans  "
+          + ", ".join(f"{e['name']}={e['dur'] / 1000:.1f}ms" for e in events))
+
+
+if __name__ == "__main__":
+    bench_risk_parity()
+    bench_cardinality()
+    bench_target_risk()
+    bench_batched_kernels()
+    bench_stress()
+    bench_resampling()
+    bench_black_litterman()
+    bench_rebalance()
+    bench_simulation()
+    bench_progressive_frontier()
+    bench_live()
+    bench_critical_line()
+    bench_hrp()
+    bench_tracking()
+    bench_correlation_view()
+    bench_precision()
+    bench_robust()
+    bench_tax_lots()
+    bench_feasibility()
+    bench_tracing()
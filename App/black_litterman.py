@@ -0,0 +1,159 @@
+# =========================
+# Black-Litterman Expected Returns
+# =========================
+# Replaces raw historical means with a Black-Litterman posterior: implied
+# equilibrium returns from the covariance and market-cap weights, blended
+# with user views. The prior is cached per (universe, window) and every
+# solve goes through a Cholesky factorization of the small views matrix,
+# never an explicit inverse.
+
+import os
+import numpy as np
+import pandas as pd
+from scipy.linalg import cho_factor, cho_solve
+
+from tracing import traced
+
+# Market capitalizations (INR crore) of the Nifty 50 constituents
+MARKET_CAPS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Data", "market_caps.csv")
+
+_market_caps = {}
+_prior_cache = {}
+
+
+def load_market_caps(path=MARKET_CAPS_FILE):
+    """
+    Read market capitalizations from the local data file.
+
+    Args:
+        path (str): CSV with 'Ticker' and 'MarketCap' columns.
+
+    Returns:
+        pd.Series: Market cap indexed by ticker.
+    """
+    if path not in _market_caps:
+        caps = pd.read_csv(path)
+        _market_caps[path] = caps.set_index('Ticker')['MarketCap'].astype(float)
+    return _market_caps[path]
+
+
+def market_cap_weights(tickers, market_caps=None):
+    """
+    Market-cap weights of the selected universe.
+
+    Args:
+        tickers (list): Ticker symbols.
+        market_caps (pd.Series): Market cap by ticker (default load_market_caps()).
+
+    Returns:
+        pd.Series: Weights summing to one, indexed by ticker.
+
+    Raises:
+        ValueError: If a ticker has no market cap on file.
+    """
+    market_caps = load_market_caps() if market_caps is None else market_caps
+    missing = [ticker for ticker in tickers if ticker not in market_caps.index]
+    if missing:
+        raise ValueError(f"No market cap on file for: {', '.join(missing)}")
+    caps = market_caps.reindex(tickers)
+    return caps / caps.sum()
+
+
+def equilibrium_prior(cov_matrix, window, market_caps=None, risk_aversion=2.5):
+    """
+    Implied equilibrium returns pi = delta * Sigma @ w_mkt, cached per
+    (universe, window).
+
+    Args:
+        cov_matrix (pd.DataFrame): Annualized covariance matrix.
+        window (tuple): Identifies the estimation window, e.g.
+            (start_date, end_date, 'pairwise'); part of the cache key.
+        market_caps (pd.Series): Market cap by ticker (default load_market_caps()).
+        risk_aversion (float): Market risk aversion delta.
+
+    Returns:
+        dict: 'market_weights' and 'implied_returns' as pd.Series.
+    """
+    tickers = list(cov_matrix.index)
+    key = (tuple(tickers), tuple(window), float(risk_aversion), market_caps is None)
+    if key not in _prior_cache:
+        weights = market_cap_weights(tickers, market_caps)
+        implied = risk_aversion * np.asarray(cov_matrix, dtype=float) @ weights.values
+        if len(_prior_cache) >= 32:
+            _prior_cache.clear()
+        _prior_cache[key] = {
+            'market_weights': weights,
+            'implied_returns': pd.Series(implied, index=tickers),
+        }
+    return _prior_cache[key]
+
+
+def views_to_matrices(views, tickers, tau_cov):
+    """
+    Build the pick matrix P, view returns Q and view uncertainty Omega.
+
+    Each view is a dict with 'asset', an optional 'relative_to' (for
+    "asset outperforms relative_to by return"), 'return' (annual, as a
+    fraction) and 'confidence' in (0, 1]. Omega is diagonal with
+    omega_k = (1 - c_k) / c_k * p_k' (tau Sigma) p_k, so a view held with
+    50% confidence is as uncertain as the prior along that direction.
+
+    Args:
+        views (list): View dicts.
+        tickers (list): Ticker order of the covariance matrix.
+        tau_cov (np.ndarray): tau * Sigma.
+
+    Returns:
+        tuple: (P, Q, omega) with shapes (k, N), (k,) and (k,).
+    """
+    position = {ticker: i for i, ticker in enumerate(tickers)}
+    P = np.zeros((len(views), len(tickers)))
+    Q = np.zeros(len(views))
+    confidence = np.zeros(len(views))
+    for k, view in enumerate(views):
+        P[k, position[view['asset']]] = 1.0
+        if view.get('relative_to'):
+            P[k, position[view['relative_to']]] -= 1.0
+        Q[k] = view['return']
+        confidence[k] = np.clip(view.get('confidence', 0.5), 1e-6, 1.0)
+    prior_var = np.einsum('ij,jk,ik->i', P, tau_cov, P)
+    omega = np.maximum((1.0 - confidence) / confidence, 1e-8) * prior_var
+    return P, Q, omega
+
+
+@traced('moments')
+def black_litterman_returns(cov_matrix, views, window, market_caps=None, risk_aversion=2.5, tau=0.05):
+    """
+    Black-Litterman posterior expected returns and covariance.
+
+    With A = P (tau Sigma) P' + Omega factored once by Cholesky,
+        mu  = pi + (tau Sigma) P' A^-1 (Q - P pi)
+        Cov = Sigma + tau Sigma - (tau Sigma) P' A^-1 P (tau Sigma)
+    which costs O(N^2 k + k^3) for k views instead of inverting N x N matrices.
+
+    Args:
+        cov_matrix (pd.DataFrame): Annualized covariance matrix.
+        views (list): View dicts (see views_to_matrices); empty gives the prior.
+        window (tuple): Estimation window, used to cache the prior.
+        market_caps (pd.Series): Market cap by ticker (default load_market_caps()).
+        risk_aversion (float): Market risk aversion delta.
+        tau (float): Scaling of the prior uncertainty.
+
+    Returns:
+        tuple: (expected_returns, cov_matrix) as pd.Series and pd.DataFrame.
+    """
+    tickers = list(cov_matrix.index)
+    cov = np.asarray(cov_matrix, dtype=float)
+    pi = equilibrium_prior(cov_matrix, window, market_caps, risk_aversion)['implied_returns'].values
+    tau_cov = tau * cov
+    posterior_mean, posterior_cov = pi, cov + tau_cov
+    if views:
+        P, Q, omega = views_to_matrices(views, tickers, tau_cov)
+        tau_cov_pt = tau_cov @ P.T
+        factor = cho_factor(P @ tau_cov_pt + np.diag(omega))
+        posterior_mean = pi + tau_cov_pt @ cho_solve(factor, Q - P @ pi)
+        posterior_cov = posterior_cov - tau_cov_pt @ cho_solve(factor, tau_cov_pt.T)
+    return (
+        pd.Series(posterior_mean, index=tickers),
+        pd.DataFrame(posterior_cov, index=tickers, columns=tickers),
+    )
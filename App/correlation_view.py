@@ -0,0 +1,143 @@
+# =========================
+# Clustered Correlation View
+# =========================
+# Interactive correlation heatmap that scales to large universes. Assets
+# are ordered by the cached HRP linkage so correlated names sit together;
+# the matrix is block-averaged down to at most max_size x max_size cells
+# before it is sent to the browser, or aggregated to sector blocks for the
+# zoomed-out view. Values are rounded to keep the plot payload small.
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objs as go
+
+from optimizer import hrp_order
+
+
+def correlation_from_covariance(cov_matrix):
+    """
+    Args:
+        cov_matrix (pd.DataFrame): Covariance matrix.
+
+    Returns:
+        pd.DataFrame: Correlation matrix with the same labels.
+    """
+    cov = np.asarray(cov_matrix, dtype=float)
+    std = np.sqrt(np.clip(np.diag(cov), 1e-18, None))
+    corr = np.clip(cov / np.outer(std, std), -1.0, 1.0)
+    np.fill_diagonal(corr, 1.0)
+    return pd.DataFrame(corr, index=cov_matrix.index, columns=cov_matrix.columns)
+
+
+def _block_average(matrix, groups):
+    """Mean of matrix over every (group_i, group_j) block, via one-hot products."""
+    membership = np.zeros((len(groups), matrix.shape[0]))
+    for g, items in enumerate(groups):
+        membership[g, items] = 1.0 / len(items)
+    return membership @ matrix @ membership.T
+
+
+def downsample_correlation(corr, max_size=120):
+    """
+    Block-average an (ordered) correlation matrix to at most max_size rows.
+
+    Consecutive assets are grouped, which on a cluster-ordered matrix keeps
+    the block structure visible.
+
+    Args:
+        corr (pd.DataFrame): Correlation matrix, already ordered.
+        max_size (int): Maximum rows/columns of the result.
+
+    Returns:
+        tuple: (matrix, labels, members)
+            matrix (np.ndarray): Downsampled correlations.
+            labels (list): Axis label per row ('first .. last' for groups).
+            members (list): Tickers in each row.
+    """
+    tickers = list(corr.index)
+    if len(tickers) <= max_size:
+        return corr.to_numpy(), tickers, [[ticker] for ticker in tickers]
+    groups = np.array_split(np.arange(len(tickers)), max_size)
+    matrix = _block_average(corr.to_numpy(), groups)
+    members = [[tickers[i] for i in items] for items in groups]
+    labels = [m[0] if len(m) == 1 else f"{m[0]} .. {m[-1]}" for m in members]
+    return matrix, labels, members
+
+
+def sector_correlation(corr, sector_map):
+    """
+    Average correlation between and within sectors.
+
+    Sectors appear in the order of their first member in corr. The diagonal
+    block of a sector averages only distinct pairs, so a sector of one stock
+    shows 1.
+
+    Args:
+        corr (pd.DataFrame): Correlation matrix.
+        sector_map (dict): ticker -> sector.
+
+    Returns:
+        tuple: (matrix, sectors, members) as in downsample_correlation.
+    """
+    tickers = list(corr.index)
+    sectors = list(dict.fromkeys(sector_map.get(ticker) or 'Unknown' for ticker in tickers))
+    groups = [[i for i, t in enumerate(tickers) if (sector_map.get(t) or 'Unknown') == sector] for sector in sectors]
+    values = corr.to_numpy()
+    matrix = _block_average(values, groups)
+    for g, items in enumerate(groups):
+        k = len(items)
+        if k > 1:
+            matrix[g, g] = (values[np.ix_(items, items)].sum() - k) / (k * (k - 1))
+        else:
+            matrix[g, g] = 1.0
+    return matrix, sectors, [[tickers[i] for i in items] for items in groups]
+
+
+def correlation_figure(cov_matrix, sector_map=None, level='stocks', max_size=120, window=None, names=None):
+    """
+    Plotly heatmap of the clustered correlation matrix.
+
+    Args:
+        cov_matrix (pd.DataFrame): Covariance matrix.
+        sector_map (dict): ticker -> sector; needed for level='sectors'.
+        level (str): 'stocks' (clustered, downsampled to max_size) or
+            'sectors' (sector blocks).
+        max_size (int): Maximum cells per axis sent to the browser.
+        window (tuple): Estimation window, used to cache the clustering.
+        names (dict): Optional ticker -> display name for unaggregated rows.
+
+    Returns:
+        go.Figure: Heatmap figure.
+    """
+    order = hrp_order(cov_matrix, window)
+    corr = correlation_from_covariance(cov_matrix).iloc[order, order]
+    if level == 'sectors':
+        matrix, labels, members = sector_correlation(corr, sector_map or {})
+        title = "Average Correlation by Sector"
+    else:
+        matrix, labels, members = downsample_correlation(corr, max_size)
+        title = "Correlation (clustered" + (f", {len(corr)} stocks in {len(labels)} blocks)" if len(labels) < len(corr) else ")")
+
+    # Hover text comes from the axis labels only; per-cell custom data would
+    # grow the payload with the square of the matrix size
+    names = names or {}
+    if level != 'sectors':
+        labels = [names.get(m[0], m[0]) if len(m) == 1 else label for m, label in zip(members, labels)]
+
+    fig = go.Figure(go.Heatmap(
+        z=np.round(matrix, 3),
+        x=labels,
+        y=labels,
+        zmin=-1, zmax=1,
+        colorscale="RdBu_r",
+        hovertemplate="%{y}<br>vs %{x}<br><b>Correlation:</b> %{z:.2f}<extra></extra>",
+        colorbar=dict(title="ρ")
+    ))
+    fig.update_layout(
+        title=title,
+        template="plotly_dark",
+        height=700,
+        xaxis=dict(showticklabels=len(labels) <= 60, tickangle=-45),
+        yaxis=dict(showticklabels=len(labels) <= 60, autorange="reversed")
+    )
+    return fig
@@ -0,0 +1,258 @@
+# =========================
+# Live Intraday Mode
+# =========================
+# Tracks an optimized portfolio against a streaming price feed. A source is
+# any async iterable of (timestamp, ticker, price) quotes; replay_quotes
+# replays the OHLC bars in Data/raw_data.csv as a stand-in for a broker
+# feed. Each tick updates portfolio value and the online (Welford) return
+# estimators in O(1); the O(N) views (weights, drift) are computed only when
+# a throttled snapshot is taken for the UI. Sessions are the calendar days
+# of the quote timestamps: intraday realized variance restarts each session,
+# and realized volatility is estimated from session-to-session returns so
+# the synthetic open-high-low-close path of a replayed bar does not bias it.
+
+import asyncio
+import math
+import os
+import time
+import numpy as np
+import pandas as pd
+
+RAW_DATA_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Data", "raw_data.csv")
+
+# Intraday order of the prices within one daily bar
+BAR_FIELDS = ('Open', 'High', 'Low', 'Close')
+
+
+def load_replay_bars(path=RAW_DATA_FILE):
+    """
+    Read a yfinance-style OHLCV download (two header rows: field, ticker).
+
+    Args:
+        path (str): CSV path.
+
+    Returns:
+        dict: field -> pd.DataFrame of prices (dates x tickers) for the
+            fields in BAR_FIELDS that are present.
+    """
+    raw = pd.read_csv(path, header=[0, 1], index_col=0, skiprows=[2], parse_dates=True)
+    return {field: raw[field].astype(float) for field in BAR_FIELDS if field in raw.columns.get_level_values(0)}
+
+
+async def replay_quotes(bars=None, rate=None, batch=1000):
+    """
+    Replay daily bars as a quote stream.
+
+    Every bar becomes one quote per field (open, high, low, close) per
+    ticker, in that order, stamped with the bar date.
+
+    Args:
+        bars (dict): field -> prices DataFrame, as from load_replay_bars
+            (default: Data/raw_data.csv).
+        rate (float): Quotes per second; None replays as fast as possible.
+        batch (int): Quotes between yields to the event loop when unthrottled.
+
+    Yields:
+        tuple: (timestamp, ticker, price).
+    """
+    bars = load_replay_bars() if bars is None else bars
+    fields = [field for field in BAR_FIELDS if field in bars] or list(bars)
+    tickers = list(bars[fields[0]].columns)
+    dates = bars[fields[0]].index
+    # (dates, fields, tickers) so quotes come out in time order
+    values = np.stack([bars[field].reindex(columns=tickers).to_numpy(dtype=float) for field in fields], axis=1)
+
+    step = 1 if rate is None else max(1, int(rate // 100))
+    start = time.monotonic()
+    sent = 0
+    for d, date in enumerate(dates):
+        for row in values[d]:
+            for ticker, price in zip(tickers, row.tolist()):
+                if price != price:  # NaN: no quote for this name
+                    continue
+                yield date, ticker, price
+                sent += 1
+                if rate is None:
+                    if sent % batch == 0:
+                        await asyncio.sleep(0)
+                elif sent % step == 0:
+                    await asyncio.sleep(max(0.0, start + sent / rate - time.monotonic()))
+
+
+class LivePortfolio:
+    """
+    Buy-and-hold portfolio marked to a stream of quotes.
+
+    Each name is bought at its target weight of the starting value on its
+    first quote; until then it is carried at cost. Per tick, the portfolio
+    value moves by shares * price change and the tick log return feeds
+    Welford estimators for the portfolio and for the ticked name. When the
+    quote date changes, the finished session's log return is added to the
+    close-to-close realized variance and the intraday sum restarts.
+
+    Args:
+        weights (pd.Series): Target weights indexed by ticker.
+        value (float): Starting portfolio value.
+    """
+
+    def __init__(self, weights, value=1.0):
+        self.tickers = list(weights.index)
+        self.position = {ticker: i for i, ticker in enumerate(self.tickers)}
+        self.target = np.asarray(weights, dtype=float)
+        self.initial_value = float(value)
+        n = len(self.tickers)
+
+        # Plain lists: per-tick updates touch one element, where Python
+        # floats are much faster than NumPy scalars
+        self.sleeves = (self.target * value).tolist()
+        self.shares = [0.0] * n
+        self.prices = [math.nan] * n
+        self.value = float(value)
+        self.ticks = 0
+        self.timestamp = None
+
+        # Session state: current day, value at its start, completed session returns
+        self.session = None
+        self.session_open = float(value)
+        self.session_count, self.session_sum_squares = 0, 0.0
+
+        # Welford state: portfolio tick returns, then per asset
+        self.count, self.mean, self.m2, self.sum_squares = 0, 0.0, 0.0, 0.0
+        self.asset_count = [0] * n
+        self.asset_mean = [0.0] * n
+        self.asset_m2 = [0.0] * n
+
+    def update(self, ticker, price, timestamp=None):
+        """
+        Apply one quote.
+
+        Args:
+            ticker (str): Ticker of the quote; names outside the portfolio are ignored.
+            price (float): Traded price.
+            timestamp: Quote time, kept for display.
+        """
+        i = self.position.get(ticker)
+        if i is None or not price > 0:
+            return
+        self.ticks += 1
+        # Feeds reuse one timestamp object per bar, so the date is only
+        # looked up when it changes
+        if timestamp is not self.timestamp and timestamp is not None:
+            self._roll_session(timestamp)
+        self.timestamp = timestamp
+        last = self.prices[i]
+        self.prices[i] = price
+        if last != last:
+            # First quote: buy the sleeve at this price
+            self.shares[i] = self.sleeves[i] / price
+            return
+
+        old_value = self.value
+        self.value = old_value + self.shares[i] * (price - last)
+        if self.value <= 0:
+            return
+        self._welford_portfolio(math.log(self.value / old_value))
+
+        r = math.log(price / last)
+        n = self.asset_count[i] + 1
+        delta = r - self.asset_mean[i]
+        self.asset_mean[i] += delta / n
+        self.asset_m2[i] += delta * (r - self.asset_mean[i])
+        self.asset_count[i] = n
+
+    def _roll_session(self, timestamp):
+        day = timestamp.date() if hasattr(timestamp, 'date') else timestamp
+        if day == self.session:
+            return
+        if self.session is not None and self.session_open > 0 and self.value > 0:
+            r = math.log(self.value / self.session_open)
+            self.session_count += 1
+            self.session_sum_squares += r * r
+        self.session = day
+        self.session_open = self.value
+        self.sum_squares = 0.0
+
+    def _welford_portfolio(self, r):
+        self.count += 1
+        delta = r - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (r - self.mean)
+        self.sum_squares += r * r
+
+    def resync(self):
+        """Recompute the value from holdings, clearing accumulated rounding."""
+        shares = np.array(self.shares)
+        prices = np.array(self.prices)
+        priced = np.isfinite(prices)
+        held = np.where(priced, shares * np.where(priced, prices, 0.0), self.sleeves)
+        self.value = float(held.sum())
+        return held
+
+    def snapshot(self):
+        """
+        Current metrics, O(N).
+
+        Returns:
+            dict: 'timestamp', 'ticks', 'value', 'pnl', 'return',
+                'tick_volatility' (std of portfolio tick log returns),
+                'realized_volatility' (annualized, from the log returns of
+                completed sessions, close to close), 'session_volatility'
+                (sqrt of summed squared tick returns in the current session,
+                not annualized; for replayed bars it follows the synthetic
+                open-high-low-close path and overstates the true figure),
+                'sessions' (completed sessions), 'drift' (one-way turnover back to target),
+                'weights' (pd.Series) and 'asset_volatility' (pd.Series of
+                per-name tick-return std).
+        """
+        held = self.resync()
+        weights = held / self.value
+        counts = np.array(self.asset_count)
+        asset_var = np.divide(np.array(self.asset_m2), counts - 1, out=np.full(len(counts), np.nan), where=counts > 1)
+        return {
+            'timestamp': self.timestamp,
+            'ticks': self.ticks,
+            'value': self.value,
+            'pnl': self.value - self.initial_value,
+            'return': self.value / self.initial_value - 1.0,
+            'tick_volatility': math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else math.nan,
+            'realized_volatility': (math.sqrt(252.0 * self.session_sum_squares / self.session_count)
+                                    if self.session_count else math.nan),
+            'session_volatility': math.sqrt(self.sum_squares),
+            'sessions': self.session_count,
+            'drift': 0.5 * float(np.abs(weights - self.target).sum()),
+            'weights': pd.Series(weights, index=self.tickers),
+            'asset_volatility': pd.Series(np.sqrt(asset_var), index=self.tickers),
+        }
+
+
+async def stream_portfolio(source, portfolio, on_update=None, interval=0.25, max_ticks=None):
+    """
+    Feed a quote source into a LivePortfolio, pushing throttled snapshots.
+
+    Args:
+        source: Async iterable of (timestamp, ticker, price).
+        portfolio (LivePortfolio): Portfolio to update.
+        on_update (callable): Called with a snapshot at most every
+            `interval` seconds and once at the end.
+        interval (float): Minimum seconds between on_update calls.
+        max_ticks (int): Stop after this many quotes.
+
+    Returns:
+        dict: Final snapshot.
+    """
+    update = portfolio.update
+    clock = time.monotonic
+    next_push = clock() + interval
+    received = 0
+    async for timestamp, ticker, price in source:
+        update(ticker, price, timestamp)
+        received += 1
+        if on_update is not None and clock() >= next_push:
+            on_update(portfolio.snapshot())
+            next_push = clock() + interval
+        if max_ticks is not None and received >= max_ticks:
+            break
+    snapshot = portfolio.snapshot()
+    if on_update is not None:
+        on_update(snapshot)
+    return snapshot
@@ -0,0 +1,138 @@
+# =========================
+# Run Manifests and Reproducible Random Streams
+# =========================
+# A manifest records everything a random run depends on: what was run, its
+# inputs (tickers, window, parameters), a hash of the input data and the
+# seed. Random numbers come from SeedSequence children indexed by chunk,
+# never by worker, so a run is bit-identical however it is parallelized.
+# Artifacts are saved under the manifest hash and reused when the same run
+# is requested again.
+
+import hashlib
+import json
+import os
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+ARTIFACT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Data", "artifacts")
+
+
+def data_hash(data):
+    """
+    SHA-256 of an array or DataFrame, including shape, dtype and labels.
+
+    Args:
+        data (np.ndarray, pd.Series or pd.DataFrame): Input data.
+
+    Returns:
+        str: Hex digest.
+    """
+    digest = hashlib.sha256()
+    if isinstance(data, (pd.Series, pd.DataFrame)):
+        digest.update(json.dumps([str(label) for label in data.index]).encode())
+        if isinstance(data, pd.DataFrame):
+            digest.update(json.dumps([str(label) for label in data.columns]).encode())
+        data = data.to_numpy()
+    values = np.ascontiguousarray(data)
+    digest.update(f"{values.shape}{values.dtype}".encode())
+    digest.update(values.tobytes())
+    return digest.hexdigest()
+
+
+def _jsonable(value):
+    """Convert NumPy scalars/arrays and tuples so inputs serialize canonically."""
+    if isinstance(value, dict):
+        return {str(k): _jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(v) for v in value]
+    if isinstance(value, np.ndarray):
+        return _jsonable(value.tolist())
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (datetime, pd.Timestamp)):
+        return value.isoformat()
+    return value
+
+
+def build_manifest(kind, inputs, data=None, seed=0):
+    """
+    Describe a reproducible run.
+
+    Args:
+        kind (str): Name of the computation, e.g. 'resampled_frontier'.
+        inputs (dict): Tickers, window and parameters of the run.
+        data (np.ndarray or pd.DataFrame): Input data, recorded by hash.
+        seed (int): Root seed of the run.
+
+    Returns:
+        dict: 'kind', 'inputs', 'data_hash', 'seed', 'numpy' (version) and
+            'hash', the SHA-256 of everything else.
+    """
+    manifest = {
+        'kind': kind,
+        'inputs': _jsonable(inputs),
+        'data_hash': None if data is None else data_hash(data),
+        'seed': int(seed),
+        'numpy': np.__version__,
+    }
+    manifest['hash'] = hashlib.sha256(json.dumps(manifest, sort_keys=True).encode()).hexdigest()
+    return manifest
+
+
+def spawn_streams(seed, count):
+    """
+    Independent random streams for chunks 0..count-1 of a run.
+
+    Chunk i always gets child i of SeedSequence(seed), so results do not
+    depend on how chunks are distributed across workers.
+
+    Args:
+        seed (int): Root seed.
+        count (int): Number of chunks.
+
+    Returns:
+        list: np.random.SeedSequence children.
+    """
+    return np.random.SeedSequence(seed).spawn(count)
+
+
+def load_artifact(manifest, directory=ARTIFACT_DIR):
+    """
+    Load the arrays saved for a manifest.
+
+    Args:
+        manifest (dict): Manifest from build_manifest.
+        directory (str): Artifact folder.
+
+    Returns:
+        dict or None: name -> np.ndarray, or None if the run was never saved.
+    """
+    path = os.path.join(directory, f"{manifest['hash']}.npz")
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as data:
+        return {key: data[key] for key in data.files}
+
+
+def save_artifact(manifest, arrays, outputs=None, directory=ARTIFACT_DIR):
+    """
+    Save a run's arrays and its manifest (with recorded outputs) under the
+    manifest hash.
+
+    Args:
+        manifest (dict): Manifest from build_manifest.
+        arrays (dict): name -> np.ndarray to save.
+        outputs (dict): Summary of the outputs (counts, timings, ...) for the record.
+        directory (str): Artifact folder.
+
+    Returns:
+        str: Path of the saved .npz file.
+    """
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{manifest['hash']}.npz")
+    np.savez(path, **arrays)
+    record = dict(manifest, outputs=_jsonable(outputs or {}), created=datetime.now().isoformat())
+    with open(os.path.join(directory, f"{manifest['hash']}.json"), "w") as f:
+        json.dump(record, f, indent=2, sort_keys=True)
+    return path
@@ -1,15 +1,24 @@
+import time
 import yfinance as yf 
 import numpy as np
 import pandas as pd 
-from scipy.optimize import minimize
+from scipy.optimize import minimize, linprog
+from scipy.cluster.hierarchy import linkage, leaves_list
+from scipy.spatial.distance import squareform
 from collections import defaultdict
 import matplotlib.pyplot as plt
 import seaborn as sb
 import plotly.graph_objs as go
 import plotly.io as pio
 from nifty50_dict import nifty50_sectors  # add this import
+from tracing import traced
+
+# Storage precision of the moments, simulation and batched-evaluation paths.
+# 'float32' halves memory traffic; sums that need it still accumulate in float64.
+PRECISIONS = {'float64': np.float64, 'float32': np.float32}
 
 # Stock Data Fetching and Processing Functions
+@traced('fetch')
 def get_stock_data(tickers, start_date, end_date):
     """
     Fetch historical closing price data for the given tickers and date range.
@@ -20,25 +29,35 @@ def get_stock_data(tickers, start_date, end_date):
         end_date (str or datetime): End date for data.
 
     Returns:
-        pd.DataFrame: DataFrame of closing prices (columns: tickers, index: dates).
+        pd.DataFrame: DataFrame of closing prices (columns: tickers in the
+            requested order, index: dates).
     """
     data = yf.download(tickers, start=start_date, end=end_date)['Close']
-    return data
+    if isinstance(data, pd.Series):
+        data = data.to_frame(name=tickers[0])
+    return data.reindex(columns=tickers)
 
-def sector_mapping(tickers):
+@traced('fetch')
+def sector_mapping(tickers, cache=None):
     """
     Map stock tickers to their respective sectors using yfinance info.
 
     Args:
         tickers (list): List of ticker symbols.
+        cache (dict): Optional ticker -> sector dict; only tickers missing from
+            it are looked up, and new lookups are stored in it.
 
     Returns:
         tuple: (sector_map, sector_indices)
             sector_map (dict): ticker -> sector
             sector_indices (dict): sector -> list of indices in tickers
     """
+    cache = {} if cache is None else cache
+    for ticker in tickers:
+        if ticker not in cache:
+            cache[ticker] = yf.Ticker(ticker).info.get('sector')
     sector_map = {
-        ticker: yf.Ticker(ticker).info.get('sector') for ticker in tickers
+        ticker: cache[ticker] for ticker in tickers
     }
     
     sector_indices = defaultdict(list)
@@ -74,34 +93,311 @@ def get_sector_to_tickers(tickers):
         sector_to_tickers['Unknown'] = unknowns
     return sector_to_tickers
 
-def generate_expected_returns(closed_prices):
+# Data Alignment and Missing-Data Handling
+def _longest_run(mask):
+    """Length of the longest run of True values in each column of a 2D boolean array."""
+    if mask.shape[0] == 0:
+        return np.zeros(mask.shape[1], dtype=int)
+    idx = np.arange(mask.shape[0])[:, None]
+    last_false = np.maximum.accumulate(np.where(~mask, idx, -1), axis=0)
+    return (idx - last_false).max(axis=0)
+
+@traced('moments')
+def align_price_data(closed_prices, tickers=None, window='pairwise', max_gap=5, min_observations=60, extreme_return=0.4):
+    """
+    Align a multi-ticker price panel and track where each ticker has data.
+
+    Short internal gaps (holidays, one-off missing quotes) are forward-filled up
+    to `max_gap` days; prices before a ticker's first or after its last quote
+    stay missing. With window='pairwise' every ticker keeps its own history and
+    moments use pairwise-complete observations. With window='common' the panel
+    is cut to the largest window in which every ticker has data.
+
+    Args:
+        closed_prices (pd.DataFrame): DataFrame of closing prices.
+        tickers (list): Column order to enforce (default: the frame's columns).
+        window (str): 'pairwise' or 'common'.
+        max_gap (int): Longest internal gap, in rows, that is forward-filled.
+        min_observations (int): Fewer returns than this is flagged.
+        extreme_return (float): Absolute daily return above this is flagged.
+
+    Returns:
+        dict: 'tickers', 'dates' (return dates), 'returns' (C-contiguous T x N
+            float64 array, NaN where missing), 'valid_ranges' (DataFrame with
+            first/last date, observations and missing days per ticker),
+            'window' and 'issues' (list of data-quality messages).
+    """
+    if isinstance(closed_prices, pd.Series):
+        closed_prices = closed_prices.to_frame()
+    tickers = list(closed_prices.columns) if tickers is None else list(tickers)
+    prices = closed_prices.reindex(columns=tickers).sort_index()
+    issues = []
+
+    raw = prices.to_numpy(dtype=float)
+    valid = ~np.isnan(raw)
+    has_data = valid.any(axis=0)
+    if len(raw):
+        first = np.where(has_data, valid.argmax(axis=0), -1)
+        last = np.where(has_data, len(raw) - 1 - valid[::-1].argmax(axis=0), -1)
+    else:
+        first = last = np.full(len(tickers), -1)
+    rows = np.arange(len(raw))[:, None]
+    in_range = (rows >= first) & (rows <= last)
+    internal_missing = in_range & ~valid
+    longest_gap = _longest_run(internal_missing)
+
+    filled = prices.ffill(limit=max_gap, limit_area='inside').to_numpy(dtype=float)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        returns = filled[1:] / filled[:-1] - 1
+    dates = prices.index[1:]
+
+    if window == 'common' and has_data.all():
+        start, end = first.max(), last.min()
+        if start < end:
+            keep = np.zeros(len(returns), dtype=bool)
+            keep[start:end] = True
+            keep &= ~np.isnan(returns).any(axis=1)
+            returns, dates = returns[keep], dates[keep]
+        else:
+            issues.append("No common window covers every ticker; falling back to pairwise-complete data.")
+            window = 'pairwise'
+    elif window == 'common':
+        window = 'pairwise'
+    returns = np.ascontiguousarray(returns)
+
+    observations = (~np.isnan(returns)).sum(axis=0)
+    zero_run = _longest_run(returns == 0)
+    extremes = (np.abs(np.nan_to_num(returns)) > extreme_return).sum(axis=0)
+    span_start = prices.index[0] if len(prices) else None
+    span_end = prices.index[-1] if len(prices) else None
+    for i, ticker in enumerate(tickers):
+        if not has_data[i]:
+            issues.append(f"{ticker}: no price data in the selected range.")
+            continue
+        if first[i] > max_gap:
+            issues.append(f"{ticker}: data starts {prices.index[first[i]]:%Y-%m-%d}, after the range start {span_start:%Y-%m-%d} (late listing?).")
+        if last[i] < len(raw) - 1 - max_gap:
+            issues.append(f"{ticker}: data ends {prices.index[last[i]]:%Y-%m-%d}, before the range end {span_end:%Y-%m-%d} (suspended or delisted?).")
+        if longest_gap[i] > max_gap:
+            issues.append(f"{ticker}: missing {longest_gap[i]} consecutive days inside its history.")
+        if zero_run[i] >= 10:
+            issues.append(f"{ticker}: price unchanged for {zero_run[i]} consecutive days (stale quotes?).")
+        if extremes[i]:
+            issues.append(f"{ticker}: {extremes[i]} daily moves above {extreme_return:.0%} (check for splits or bad ticks).")
+        if observations[i] < min_observations:
+            issues.append(f"{ticker}: only {observations[i]} daily returns available.")
+
+    valid_ranges = pd.DataFrame({
+        'first_date': [prices.index[f] if f >= 0 else pd.NaT for f in first],
+        'last_date': [prices.index[l] if l >= 0 else pd.NaT for l in last],
+        'observations': observations,
+        'missing': internal_missing.sum(axis=0),
+    }, index=tickers)
+
+    return {
+        'tickers': tickers,
+        'dates': dates,
+        'returns': returns,
+        'valid_ranges': valid_ranges,
+        'window': window,
+        'issues': issues,
+    }
+
+@traced('moments')
+def pairwise_moments(returns, precision='float64'):
+    """
+    Pairwise-complete sums, cross-products and annualized mean/covariance.
+
+    For each pair of tickers only the days on which both returns exist are
+    used. Computed with three matrix products over the whole panel.
+
+    Args:
+        returns (np.ndarray): T x N daily returns, NaN where missing.
+        precision (str): 'float64', or 'float32' to hold the panel and the
+            matrix products in single precision; means and the covariance
+            are then still combined in float64.
+
+    Returns:
+        dict: 'count' (pairwise observation counts), 'pair_sum' (sum of the row
+            ticker's returns over days where the column ticker is also valid),
+            'cross' (sum of return cross-products), 'mean' (annualized expected
+            returns) and 'cov' (annualized pairwise-complete covariance).
+    """
+    dtype = PRECISIONS[precision]
+    returns = np.asarray(returns, dtype=dtype)
+    valid = ~np.isnan(returns)
+    filled = np.where(valid, returns, dtype(0))
+    mask = valid.astype(dtype)
+
+    count = mask.T @ mask
+    pair_sum = filled.T @ mask
+    cross = filled.T @ filled
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = filled.sum(axis=0, dtype=np.float64) / valid.sum(axis=0) * 252
+    return {
+        'count': count,
+        'pair_sum': pair_sum,
+        'cross': cross,
+        'mean': mean,
+        'cov': _pairwise_cov(count, pair_sum, cross),
+    }
+
+def _pairwise_cov(count, pair_sum, cross):
+    """Annualized covariance from pairwise counts, sums and cross-products (in float64)."""
+    count = np.asarray(count, dtype=np.float64)
+    pair_sum = np.asarray(pair_sum, dtype=np.float64)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return (np.asarray(cross, dtype=np.float64) - pair_sum * pair_sum.T / count) / (count - 1) * 252
+
+def generate_expected_returns(closed_prices, window='pairwise'):
     """
     Calculate annualized expected returns from daily closing prices.
 
     Args:
         closed_prices (pd.DataFrame): DataFrame of closing prices.
+        window (str): 'pairwise' (each ticker's own history) or 'common'
+            (largest window covering every ticker).
 
     Returns:
         pd.Series: Expected annualized returns for each ticker.
     """
-    returns = closed_prices.pct_change().dropna()
-    expected_returns = returns.mean()
-    expected_returns = expected_returns * 252 
-    return expected_returns
+    aligned = align_price_data(closed_prices, window=window)
+    expected_returns = pairwise_moments(aligned['returns'])['mean']
+    return pd.Series(expected_returns, index=aligned['tickers'])
 
-def generate_covariance_matrix(closed_prices):
+def generate_covariance_matrix(closed_prices, window='pairwise'):
     """
     Calculate annualized covariance matrix from daily closing prices.
 
     Args:
         closed_prices (pd.DataFrame): DataFrame of closing prices.
+        window (str): 'pairwise' (pairwise-complete observations) or 'common'
+            (largest window covering every ticker).
 
     Returns:
         pd.DataFrame: Annualized covariance matrix.
     """
-    returns = closed_prices.pct_change().dropna()
-    covariance_matrix = returns.cov() * 252 
-    return covariance_matrix
+    aligned = align_price_data(closed_prices, window=window)
+    covariance_matrix = pairwise_moments(aligned['returns'])['cov']
+    return pd.DataFrame(covariance_matrix, index=aligned['tickers'], columns=aligned['tickers'])
+
+# Incremental Moment Updates
+def _append_asset_moments(moments, returns, new_returns):
+    """
+    Grow pairwise moments by one asset: only the new row/column is computed,
+    an O(T x N) pass over the cached returns.
+    """
+    valid = ~np.isnan(returns)
+    filled = np.where(valid, returns, 0.0)
+    mask = valid.astype(float)
+    new_mask = (~np.isnan(new_returns)).astype(float)
+    new_filled = np.where(new_mask > 0, new_returns, 0.0)
+
+    def grow(matrix, row, col, corner):
+        n = matrix.shape[0]
+        out = np.empty((n + 1, n + 1))
+        out[:n, :n] = matrix
+        out[n, :n] = row
+        out[:n, n] = col
+        out[n, n] = corner
+        return out
+
+    count = grow(moments['count'], new_mask @ mask, mask.T @ new_mask, new_mask @ new_mask)
+    pair_sum = grow(moments['pair_sum'], new_filled @ mask, filled.T @ new_mask, new_filled @ new_mask)
+    cross_row = new_filled @ filled
+    cross = grow(moments['cross'], cross_row, cross_row, new_filled @ new_filled)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        new_mean = new_filled.sum() / new_mask.sum() * 252
+    return {
+        'count': count,
+        'pair_sum': pair_sum,
+        'cross': cross,
+        'mean': np.append(moments['mean'], new_mean),
+        'cov': _pairwise_cov(count, pair_sum, cross),
+    }
+
+def _select_asset_moments(moments, idx):
+    """Keep (and reorder) the assets at positions idx by sub-matrix extraction."""
+    grid = np.ix_(idx, idx)
+    return {
+        'count': moments['count'][grid],
+        'pair_sum': moments['pair_sum'][grid],
+        'cross': moments['cross'][grid],
+        'mean': moments['mean'][idx],
+        'cov': moments['cov'][grid],
+    }
+
+@traced('moments')
+def incremental_moments(cache, tickers, start_date, end_date, window='pairwise'):
+    """
+    Return moments for `tickers`, reusing a cache built for the same date range.
+
+    Removed tickers are dropped by sub-matrix extraction and each added ticker
+    is fetched on its own and appended as one new row/column, so editing a
+    basket by one stock costs one download and an O(T x N) update instead of a
+    full refetch and recomputation. Anything else (new date range, 'common'
+    window) rebuilds the cache from scratch.
+
+    Args:
+        cache (dict or None): Cache returned by a previous call.
+        tickers (list): Selected ticker symbols.
+        start_date (str or datetime): Start date for data.
+        end_date (str or datetime): End date for data.
+        window (str): 'pairwise' or 'common' (see align_price_data).
+
+    Returns:
+        tuple: (cache, expected_returns, cov_matrix, issues)
+            cache (dict): Updated cache to pass to the next call.
+            expected_returns (pd.Series): Annualized expected returns.
+            cov_matrix (pd.DataFrame): Annualized covariance matrix.
+            issues (list): Data-quality messages for newly fetched tickers.
+    """
+    key = (str(start_date)[:10], str(end_date)[:10], window)
+    issues = []
+    if cache is None or cache['key'] != key or window != 'pairwise':
+        prices = get_stock_data(tickers, start_date=start_date, end_date=end_date)
+        aligned = align_price_data(prices, tickers, window=window)
+        cache = {
+            'key': key,
+            'tickers': list(tickers),
+            'dates': prices.index,
+            'returns': aligned['returns'],
+            'moments': pairwise_moments(aligned['returns']),
+        }
+        issues = aligned['issues']
+    else:
+        keep = [i for i, ticker in enumerate(cache['tickers']) if ticker in tickers]
+        if len(keep) < len(cache['tickers']):
+            cache = dict(cache,
+                         tickers=[cache['tickers'][i] for i in keep],
+                         returns=np.ascontiguousarray(cache['returns'][:, keep]),
+                         moments=_select_asset_moments(cache['moments'], keep))
+        added = [ticker for ticker in tickers if ticker not in cache['tickers']]
+        if added:
+            prices = get_stock_data(added, start_date=start_date, end_date=end_date)
+            aligned = align_price_data(prices.reindex(cache['dates']), added)
+            issues = aligned['issues']
+            moments, returns = cache['moments'], cache['returns']
+            for i, ticker in enumerate(added):
+                moments = _append_asset_moments(moments, returns, aligned['returns'][:, i])
+                returns = np.column_stack([returns, aligned['returns'][:, i]])
+            cache = dict(cache, tickers=cache['tickers'] + added, returns=returns, moments=moments)
+
+    position = {ticker: i for i, ticker in enumerate(cache['tickers'])}
+    order = [position[ticker] for ticker in tickers]
+    if order != list(range(len(order))):
+        cache = dict(cache,
+                     tickers=list(tickers),
+                     returns=np.ascontiguousarray(cache['returns'][:, order]),
+                     moments=_select_asset_moments(cache['moments'], order))
+    moments = cache['moments']
+    return (
+        cache,
+        pd.Series(moments['mean'], index=list(tickers)),
+        pd.DataFrame(moments['cov'], index=list(tickers), columns=list(tickers)),
+        issues,
+    )
 
 def portfolio_return(weights, expected_returns):
     """
@@ -114,7 +410,7 @@ def portfolio_return(weights, expected_returns):
     Returns:
         float: Portfolio expected return.
     """
-    return np.dot(weights, expected_returns)
+    return np.dot(np.asarray(weights), np.asarray(expected_returns))
 
 def portfolio_volatility(weights, cov_matrix):
     """
@@ -127,7 +423,8 @@ def portfolio_volatility(weights, cov_matrix):
     Returns:
         float: Portfolio volatility.
     """
-    return np.sqrt(np.dot(weights.T, np.dot(cov_matrix, weights)))
+    weights = np.asarray(weights)
+    return np.sqrt(weights @ np.asarray(cov_matrix) @ weights)
 
 def neg_sharpe_ratio(weights, expected_returns, cov_matrix, risk_free_rate):
     """
@@ -146,6 +443,68 @@ def neg_sharpe_ratio(weights, expected_returns, cov_matrix, risk_free_rate):
     port_vol = portfolio_volatility(weights, cov_matrix)
     return -(port_return - risk_free_rate) / port_vol
 
+# Batched Portfolio Evaluation
+def batch_portfolio_returns(weights, expected_returns, precision='float64'):
+    """
+    Expected returns of many portfolios at once.
+
+    Args:
+        weights (np.ndarray): Weight matrix of shape (M, N), one portfolio per row.
+        expected_returns (pd.Series or np.ndarray): Expected returns of length N.
+        precision (str): 'float64' or 'float32' for the weights and returns.
+
+    Returns:
+        np.ndarray: Portfolio returns of length M (float64).
+    """
+    dtype = PRECISIONS[precision]
+    returns = np.asarray(weights, dtype=dtype) @ np.asarray(expected_returns, dtype=dtype)
+    return returns.astype(np.float64, copy=False)
+
+def batch_portfolio_volatilities(weights, cov_matrix, precision='float64'):
+    """
+    Volatilities of many portfolios at once.
+
+    Computes sqrt(diag(W Σ Wᵀ)) row by row without forming the M x M product.
+    In float32 mode W Σ is a single-precision matrix product and each row's
+    quadratic form is summed in float64.
+
+    Args:
+        weights (np.ndarray): Weight matrix of shape (M, N), one portfolio per row.
+        cov_matrix (pd.DataFrame or np.ndarray): Covariance matrix (N x N).
+        precision (str): 'float64' or 'float32' for the weights and covariance.
+
+    Returns:
+        np.ndarray: Portfolio volatilities of length M (float64).
+    """
+    dtype = PRECISIONS[precision]
+    weights = np.ascontiguousarray(weights, dtype=dtype)
+    cov = np.ascontiguousarray(cov_matrix, dtype=dtype)
+    if weights.ndim == 1:
+        weights = weights[None, :]
+    if dtype is np.float64:
+        return np.sqrt(np.einsum('ij,ij->i', weights @ cov, weights))
+    projected = weights @ cov
+    projected *= weights
+    return np.sqrt(projected.sum(axis=1, dtype=np.float64))
+
+def batch_sharpe_ratios(weights, expected_returns, cov_matrix, risk_free_rate, precision='float64'):
+    """
+    Returns, volatilities and Sharpe ratios of many portfolios at once.
+
+    Args:
+        weights (np.ndarray): Weight matrix of shape (M, N), one portfolio per row.
+        expected_returns (pd.Series or np.ndarray): Expected returns of length N.
+        cov_matrix (pd.DataFrame or np.ndarray): Covariance matrix (N x N).
+        risk_free_rate (float): Risk-free rate.
+        precision (str): 'float64' or 'float32' (see batch_portfolio_volatilities).
+
+    Returns:
+        tuple: (returns, volatilities, sharpe_ratios) as np.ndarray of length M.
+    """
+    returns = batch_portfolio_returns(weights, expected_returns, precision)
+    volatilities = batch_portfolio_volatilities(weights, cov_matrix, precision)
+    return returns, volatilities, (returns - risk_free_rate) / volatilities
+
 def generate_Sector_constraints(sector_constraints, sector_indices):
     """
     Generate sector weight constraints for optimizer.
@@ -202,8 +561,33 @@ def transform_weights_to_df(weights, tickers):
     """
     return pd.DataFrame({'Weight': weights}, index=tickers)
 
+def warm_start_weights(previous_weights, tickers, bounds):
+    """
+    Initial weights for a re-solve after the basket changed.
+
+    Previous weights are carried over by ticker, new tickers start at zero,
+    removed tickers are dropped, and the result is clipped to the bounds and
+    renormalized to sum to 1.
+
+    Args:
+        previous_weights (pd.DataFrame or pd.Series): Previous weights indexed by ticker.
+        tickers (list): Current ticker symbols.
+        bounds (tuple): Bounds for weights.
+
+    Returns:
+        np.ndarray: Initial weights, or equal weights if nothing carries over.
+    """
+    if isinstance(previous_weights, pd.DataFrame):
+        previous_weights = previous_weights['Weight']
+    weights = previous_weights.reindex(tickers).fillna(0.0).to_numpy(dtype=float)
+    weights = np.clip(weights, [b[0] for b in bounds], [b[1] for b in bounds])
+    if weights.sum() <= 0:
+        return np.ones(len(tickers)) / len(tickers)
+    return weights / weights.sum()
+
 # Portfolio Optimization Functions
-def optimize_portfolio_max_sharpe(expected_returns, cov_matrix, bounds, risk_free_rate=0.0, sector_constraints=None, sector_indices=None):
+@traced('solve')
+def optimize_portfolio_max_sharpe(expected_returns, cov_matrix, bounds, risk_free_rate=0.0, sector_constraints=None, sector_indices=None, initial_weights=None):
     """
     Optimize portfolio for maximum Sharpe ratio.
 
@@ -214,6 +598,7 @@ def optimize_portfolio_max_sharpe(expected_returns, cov_matrix, bounds, risk_fre
         risk_free_rate (float): Risk-free rate.
         sector_constraints (dict): Sector constraints.
         sector_indices (dict): Sector indices.
+        initial_weights (np.ndarray): Warm start (default equal weights).
 
     Returns:
         pd.DataFrame: Optimized weights DataFrame.
@@ -221,11 +606,12 @@ def optimize_portfolio_max_sharpe(expected_returns, cov_matrix, bounds, risk_fre
     constraints = {'type': 'eq', 'fun': lambda x: np.sum(x) - 1}
     sector_cons = generate_Sector_constraints(sector_constraints, sector_indices)
     all_constraints = [constraints] + sector_cons
-    initial_weights = np.ones(len(expected_returns)) / len(expected_returns)
+    if initial_weights is None:
+        initial_weights = np.ones(len(expected_returns)) / len(expected_returns)
     result = minimize(
         neg_sharpe_ratio,
         initial_weights,
-        args=(expected_returns, cov_matrix, risk_free_rate),
+        args=(expected_returns.values, np.asarray(cov_matrix), risk_free_rate),
         method='SLSQP',
         bounds=bounds,
         constraints=all_constraints
@@ -233,7 +619,8 @@ def optimize_portfolio_max_sharpe(expected_returns, cov_matrix, bounds, risk_fre
     return transform_weights_to_df(result.x, expected_returns.index.tolist())
 
 
-def optimize_portfolio_min_volatility(expected_returns, cov_matrix, bounds, sector_constraints=None, sector_indices=None):
+@traced('solve')
+def optimize_portfolio_min_volatility(expected_returns, cov_matrix, bounds, sector_constraints=None, sector_indices=None, initial_weights=None):
     """
     Optimize portfolio for minimum volatility.
 
@@ -243,6 +630,7 @@ def optimize_portfolio_min_volatility(expected_returns, cov_matrix, bounds, sect
         bounds (tuple): Bounds for weights.
         sector_constraints (dict): Sector constraints.
         sector_indices (dict): Sector indices.
+        initial_weights (np.ndarray): Warm start (default equal weights).
 
     Returns:
         pd.DataFrame: Optimized weights DataFrame.
@@ -250,11 +638,12 @@ def optimize_portfolio_min_volatility(expected_returns, cov_matrix, bounds, sect
     constraints = {'type': 'eq', 'fun': lambda x: np.sum(x) - 1}
     sector_cons = generate_Sector_constraints(sector_constraints, sector_indices)
     all_constraints = [constraints] + sector_cons
-    initial_weights = np.ones(len(expected_returns)) / len(expected_returns)
+    if initial_weights is None:
+        initial_weights = np.ones(len(expected_returns)) / len(expected_returns)
     result = minimize(
         portfolio_volatility,
         initial_weights,
-        args=(cov_matrix,),
+        args=(np.asarray(cov_matrix),),
         method='SLSQP',
         bounds=bounds,
         constraints=all_constraints
@@ -262,7 +651,8 @@ def optimize_portfolio_min_volatility(expected_returns, cov_matrix, bounds, sect
     return transform_weights_to_df(result.x, expected_returns.index.tolist())
 
 
-def optimize_portfolio_target_return(expected_returns, cov_matrix, target_return, bounds, sector_constraints=None, sector_indices=None):
+@traced('solve')
+def optimize_portfolio_target_return(expected_returns, cov_matrix, target_return, bounds, sector_constraints=None, sector_indices=None, initial_weights=None):
     """
     Optimize portfolio for minimum volatility given a target return.
 
@@ -273,21 +663,23 @@ def optimize_portfolio_target_return(expected_returns, cov_matrix, target_return
         bounds (tuple): Bounds for weights.
         sector_constraints (dict): Sector constraints.
         sector_indices (dict): Sector indices.
+        initial_weights (np.ndarray): Warm start (default equal weights).
 
     Returns:
         pd.DataFrame: Optimized weights DataFrame.
     """
     constraints = [
         {'type': 'eq', 'fun': lambda x: np.sum(x) - 1}, 
-        {'type': 'eq', 'fun': lambda x: portfolio_return(x, expected_returns) - target_return}
+        {'type': 'eq', 'fun': lambda x, mu=expected_returns.values: portfolio_return(x, mu) - target_return}
     ]
     sector_cons = generate_Sector_constraints(sector_constraints, sector_indices)
     all_constraints = constraints + sector_cons
-    initial_weights= np.ones(len(expected_returns)) / len(expected_returns)
+    if initial_weights is None:
+        initial_weights = np.ones(len(expected_returns)) / len(expected_returns)
     result = minimize(
         portfolio_volatility,
         initial_weights,
-        args=(cov_matrix,),
+        args=(np.asarray(cov_matrix),),
         method='SLSQP',
         bounds=bounds,
         constraints=all_constraints
@@ -295,10 +687,239 @@ def optimize_portfolio_target_return(expected_returns, cov_matrix, target_return
     return transform_weights_to_df(result.x, expected_returns.index.tolist())
 
 
-def optimize_portfolio_target_risk(expected_returns, cov_matrix, target_risk, bounds, sector_constraints=None, sector_indices=None):
+def _sector_matrix(num_assets, sector_constraints, sector_indices):
+    """
+    Express sector min/max limits as linear inequalities A_ub @ w <= b_ub.
+
+    Args:
+        num_assets (int): Number of assets.
+        sector_constraints (dict): sector -> {'min': float, 'max': float} in percent.
+        sector_indices (dict): sector -> list of indices.
+
+    Returns:
+        tuple: (A_ub, b_ub) as np.ndarray.
+    """
+    rows, rhs = [], []
+    if sector_constraints and sector_indices:
+        for sector, indices in sector_indices.items():
+            if sector in sector_constraints:
+                row = np.zeros(num_assets)
+                row[list(indices)] = 1.0
+                rows.append(row)
+                rhs.append(sector_constraints[sector].get("max", 100) / 100.0)
+                rows.append(-row)
+                rhs.append(-sector_constraints[sector].get("min", 0) / 100.0)
+    return np.array(rows).reshape(-1, num_assets), np.array(rhs)
+
+def _min_variance_weights(cov, bounds, A_ub, b_ub, mu=None, min_return=None, x0=None, exact=False):
+    """
+    Minimum-variance weights subject to full investment, bounds, linear sector
+    limits and optionally mu @ w >= min_return (mu @ w == min_return if
+    exact). The objective and all constraints are given analytic gradients
+    so SLSQP solves the QP directly.
+    """
+    n = cov.shape[0]
+    constraints = [{'type': 'eq', 'fun': lambda x: np.sum(x) - 1, 'jac': lambda x: np.ones(n)}]
+    if len(b_ub):
+        constraints.append({'type': 'ineq', 'fun': lambda x: b_ub - A_ub @ x, 'jac': lambda x: -A_ub})
+    if min_return is not None:
+        constraints.append({'type': 'eq' if exact else 'ineq', 'fun': lambda x: mu @ x - min_return, 'jac': lambda x: mu})
+    result = minimize(
+        lambda x: x @ cov @ x,
+        np.ones(n) / n if x0 is None else x0,
+        jac=lambda x: 2 * cov @ x,
+        method='SLSQP',
+        bounds=bounds,
+        constraints=constraints,
+        options={'ftol': 1e-14, 'maxiter': 500}
+    )
+    return result.x
+
+@traced('solve')
+def frontier_range(expected_returns, cov_matrix, bounds, sector_constraints=None, sector_indices=None):
+    """
+    Find the end points of the constrained efficient frontier.
+
+    The minimum-volatility end is a QP; the maximum-return end is an LP followed
+    by a QP for the least-risky portfolio earning that return.
+
+    Args:
+        expected_returns (pd.Series): Expected returns.
+        cov_matrix (pd.DataFrame): Covariance matrix.
+        bounds (tuple): Bounds for weights.
+        sector_constraints (dict): Sector constraints.
+        sector_indices (dict): Sector indices.
+
+    Returns:
+        dict: 'status' ('feasible' or 'infeasible'), and when feasible the
+            'min_volatility', 'min_volatility_return', 'max_return' and
+            'max_return_volatility' values with the matching end-point weights.
+    """
+    mu = np.asarray(expected_returns, dtype=float)
+    cov = np.asarray(cov_matrix, dtype=float)
+    n = len(mu)
+    A_ub, b_ub = _sector_matrix(n, sector_constraints, sector_indices)
+    lp = linprog(
+        -mu,
+        A_ub=A_ub if len(b_ub) else None,
+        b_ub=b_ub if len(b_ub) else None,
+        A_eq=np.ones((1, n)),
+        b_eq=[1.0],
+        bounds=bounds,
+        method='highs'
+    )
+    if lp.status != 0:
+        return {'status': 'infeasible'}
+    max_return = -lp.fun
+    min_vol_weights = _min_variance_weights(cov, bounds, A_ub, b_ub)
+    max_ret_weights = _min_variance_weights(cov, bounds, A_ub, b_ub, mu, max_return - 1e-10, x0=lp.x)
+    return {
+        'status': 'feasible',
+        'min_volatility': portfolio_volatility(min_vol_weights, cov),
+        'min_volatility_return': portfolio_return(min_vol_weights, mu),
+        'min_volatility_weights': min_vol_weights,
+        'max_return': max_return,
+        'max_return_volatility': portfolio_volatility(max_ret_weights, cov),
+        'max_return_weights': max_ret_weights,
+    }
+
+# Constraint Feasibility
+def _limit_conflicts(lower, upper, sector_constraints, sector_indices, tickers):
+    """Closed-form conflicts between the stock and sector limits, as messages."""
+    conflicts = [
+        f"{ticker}: minimum {lo:.1%} is above its maximum {hi:.1%}."
+        for ticker, lo, hi in zip(tickers, lower, upper) if lo > hi + 1e-12
+    ]
+    if lower.sum() > 1 + 1e-9:
+        conflicts.append(f"Stock minimums add up to {lower.sum():.1%}, above 100%.")
+    if upper.sum() < 1 - 1e-9:
+        conflicts.append(f"Stock maximums add up to {upper.sum():.1%}, below 100%.")
+    for sector, indices in (sector_indices or {}).items():
+        if not sector_constraints or sector not in sector_constraints:
+            continue
+        sector_min = sector_constraints[sector].get("min", 0) / 100.0
+        sector_max = sector_constraints[sector].get("max", 100) / 100.0
+        indices = list(indices)
+        if sector_min > sector_max + 1e-12:
+            conflicts.append(f"{sector}: sector minimum {sector_min:.1%} is above its maximum {sector_max:.1%}.")
+        if sector_min > upper[indices].sum() + 1e-9:
+            conflicts.append(f"{sector}: sector minimum {sector_min:.1%} is above the sum of its stocks' "
+                             f"maximums ({upper[indices].sum():.1%}).")
+        if sector_max < lower[indices].sum() - 1e-9:
+            conflicts.append(f"{sector}: sector maximum {sector_max:.1%} is below the sum of its stocks' "
+                             f"minimums ({lower[indices].sum():.1%}).")
+    return conflicts
+
+@traced('solve')
+def check_constraints(bounds, sector_constraints=None, sector_indices=None, expected_returns=None, cov_matrix=None,
+                      tickers=None):
+    """
+    Check that the stock and sector limits admit a fully invested portfolio
+    before any optimizer runs, and suggest the smallest relaxation if not.
+
+    Direct conflicts (a minimum above a maximum, minimums summing above 100%,
+    a sector minimum its stocks cannot reach, ...) are found in closed form.
+    Feasibility is then decided by an elastic LP that minimizes the total
+    relaxation of the limits; its nonzero slacks give the repair. With
+    expected returns, two more LPs give the attainable return range, and
+    with a covariance matrix too, the minimum-variance QP and the
+    maximum-return LP vertex give the attainable risk range.
+
+    Args:
+        bounds (tuple): Bounds for weights.
+        sector_constraints (dict): Sector constraints.
+        sector_indices (dict): Sector indices.
+        expected_returns (pd.Series): Optional expected returns for the return range.
+        cov_matrix (pd.DataFrame): Optional covariance matrix for the risk range.
+        tickers (list): Names used in messages (default expected_returns.index).
+
+    Returns:
+        dict: 'status' ('feasible' or 'infeasible'), 'conflicts' (messages),
+            'repairs' (messages naming each limit to relax and its new value),
+            'repaired_bounds' and 'repaired_sector_constraints' (None when
+            feasible), 'return_range' ((min, max), or None when infeasible
+            or without expected returns) and 'risk_range' ((min, max)
+            volatility, or None when infeasible or without both moments).
+    """
+    n = len(bounds)
+    if tickers is None:
+        tickers = list(expected_returns.index) if expected_returns is not None else [f"Stock {i + 1}" for i in range(n)]
+    lower = np.array([b[0] for b in bounds], dtype=float)
+    upper = np.array([b[1] for b in bounds], dtype=float)
+    conflicts = _limit_conflicts(lower, upper, sector_constraints, sector_indices, tickers)
+    A_ub, b_ub = _sector_matrix(n, sector_constraints, sector_indices)
+    sectors = [s for s in (sector_indices or {}) if sector_constraints and s in sector_constraints]
+    k = len(b_ub)
+
+    # Elastic LP over [w, lower slack, upper slack, sector slack]
+    eye = np.eye(n)
+    A_elastic = np.vstack([
+        np.hstack([-eye, -eye, np.zeros((n, n + k))]),
+        np.hstack([eye, np.zeros((n, n)), -eye, np.zeros((n, k))]),
+        np.hstack([A_ub, np.zeros((k, 2 * n)), -np.eye(k)]),
+    ])
+    lp = linprog(
+        np.concatenate([np.zeros(n), np.ones(2 * n + k)]),
+        A_ub=A_elastic,
+        b_ub=np.concatenate([-lower, upper, b_ub]),
+        A_eq=np.concatenate([np.ones(n), np.zeros(2 * n + k)])[None, :],
+        b_eq=[1.0],
+        bounds=[(min(0.0, lo), None) for lo in lower] + [(0, None)] * (2 * n + k),
+        method='highs'
+    )
+    result = {'status': 'feasible', 'conflicts': conflicts, 'repairs': [], 'repaired_bounds': None,
+              'repaired_sector_constraints': None, 'return_range': None, 'risk_range': None}
+    if lp.fun > 1e-9 or conflicts:
+        result['status'] = 'infeasible'
+        if not conflicts:
+            result['conflicts'] = ["The stock and sector limits cannot all be met together."]
+        slack = np.where(lp.x[n:] > 1e-9, lp.x[n:], 0.0)
+        lower_slack, upper_slack, sector_slack = slack[:n], slack[n:2 * n], slack[2 * n:]
+        new_lower, new_upper = lower - lower_slack, upper + upper_slack
+        repairs = [f"Lower {t} minimum from {lo:.1%} to {new:.1%}."
+                   for t, lo, new, s in zip(tickers, lower, new_lower, lower_slack) if s > 0]
+        repairs += [f"Raise {t} maximum from {hi:.1%} to {new:.1%}."
+                    for t, hi, new, s in zip(tickers, upper, new_upper, upper_slack) if s > 0]
+        repaired_sectors = {s: dict(c) for s, c in (sector_constraints or {}).items()}
+        # _sector_matrix emits a (max, min) row pair per constrained sector
+        for j, sector in enumerate(sectors):
+            limits = repaired_sectors[sector]
+            if sector_slack[2 * j] > 0:
+                old = limits.get("max", 100)
+                limits["max"] = float(old + 100.0 * sector_slack[2 * j])
+                repairs.append(f"Raise {sector} maximum from {old / 100:.1%} to {limits['max'] / 100:.1%}.")
+            if sector_slack[2 * j + 1] > 0:
+                old = limits.get("min", 0)
+                limits["min"] = float(old - 100.0 * sector_slack[2 * j + 1])
+                repairs.append(f"Lower {sector} minimum from {old / 100:.1%} to {limits['min'] / 100:.1%}.")
+        result.update(repairs=repairs, repaired_bounds=tuple(zip(new_lower.tolist(), new_upper.tolist())),
+                      repaired_sector_constraints=repaired_sectors)
+        return result
+
+    if expected_returns is not None:
+        mu = np.asarray(expected_returns, dtype=float)
+        ends = [
+            linprog(sign * mu, A_ub=A_ub if k else None, b_ub=b_ub if k else None,
+                    A_eq=np.ones((1, n)), b_eq=[1.0], bounds=bounds, method='highs')
+            for sign in (1.0, -1.0)
+        ]
+        result['return_range'] = (float(ends[0].fun), float(-ends[1].fun))
+        if cov_matrix is not None:
+            cov = np.asarray(cov_matrix, dtype=float)
+            min_vol_weights = _min_variance_weights(cov, bounds, A_ub, b_ub)
+            result['risk_range'] = (float(portfolio_volatility(min_vol_weights, cov)),
+                                    float(portfolio_volatility(ends[1].x, cov)))
+    return result
+
+@traced('solve')
+def optimize_portfolio_target_risk(expected_returns, cov_matrix, target_risk, bounds, sector_constraints=None, sector_indices=None, tol=1e-8, max_iter=50):
     """
     Optimize portfolio for maximum return given a target risk (volatility).
 
+    Rather than imposing the volatility as a nonlinear equality, searches the
+    efficient frontier for the return whose minimum-variance portfolio has the
+    target volatility (bracketed regula falsi between the frontier end points).
+
     Args:
         expected_returns (pd.Series): Expected returns.
         cov_matrix (pd.DataFrame): Covariance matrix.
@@ -306,26 +927,906 @@ def optimize_portfolio_target_risk(expected_returns, cov_matrix, target_risk, bo
         bounds (tuple): Bounds for weights.
         sector_constraints (dict): Sector constraints.
         sector_indices (dict): Sector indices.
+        tol (float): Tolerance on the achieved volatility.
+        max_iter (int): Maximum number of frontier solves.
 
     Returns:
         pd.DataFrame: Optimized weights DataFrame.
+
+    Raises:
+        ValueError: If the constraints are infeasible or the target risk lies
+            outside the attainable frontier volatility range.
     """
-    constraints = [
-        {'type': 'eq', 'fun': lambda x: np.sum(x) - 1}, 
-        {'type': 'eq', 'fun': lambda x: portfolio_volatility(x, cov_matrix) - target_risk}
-    ]
-    sector_cons = generate_Sector_constraints(sector_constraints, sector_indices)
-    all_constraints = constraints + sector_cons
-    initial_weights = np.ones(len(expected_returns)) / len(expected_returns)
-    result = minimize(
-        lambda w, mu: -portfolio_return(w, mu),
-        initial_weights,
-        args=(expected_returns,),
-        method='SLSQP',
+    tickers = expected_returns.index.tolist()
+    frontier = frontier_range(expected_returns, cov_matrix, bounds, sector_constraints, sector_indices)
+    if frontier['status'] == 'infeasible':
+        raise ValueError("Infeasible: the stock and sector weight limits cannot be met together.")
+    low_vol, high_vol = frontier['min_volatility'], frontier['max_return_volatility']
+    if target_risk < low_vol - tol:
+        raise ValueError(
+            f"Infeasible: target risk {target_risk:.2%} is below the minimum attainable volatility of {low_vol:.2%}."
+        )
+    if target_risk > high_vol + tol:
+        raise ValueError(
+            f"Infeasible: target risk {target_risk:.2%} is above the volatility of the maximum-return portfolio ({high_vol:.2%})."
+        )
+    if target_risk <= low_vol + tol:
+        return transform_weights_to_df(frontier['min_volatility_weights'], tickers)
+    if target_risk >= high_vol - tol:
+        return transform_weights_to_df(frontier['max_return_weights'], tickers)
+
+    mu = np.asarray(expected_returns, dtype=float)
+    cov = np.asarray(cov_matrix, dtype=float)
+    A_ub, b_ub = _sector_matrix(len(mu), sector_constraints, sector_indices)
+    lo, f_lo = frontier['min_volatility_return'], low_vol - target_risk
+    hi, f_hi = frontier['max_return'], high_vol - target_risk
+    weights = frontier['min_volatility_weights']
+    side = 0
+    for _ in range(max_iter):
+        r = hi - f_hi * (hi - lo) / (f_hi - f_lo)
+        weights = _min_variance_weights(cov, bounds, A_ub, b_ub, mu, r, x0=weights)
+        f = portfolio_volatility(weights, cov) - target_risk
+        if abs(f) < tol or hi - lo < 1e-12:
+            break
+        # Illinois modification keeps the bracket shrinking from both sides
+        if f < 0:
+            lo, f_lo = r, f
+            if side == -1:
+                f_hi /= 2
+            side = -1
+        else:
+            hi, f_hi = r, f
+            if side == 1:
+                f_lo /= 2
+            side = 1
+    return transform_weights_to_df(weights, tickers)
+
+# Progressive Efficient Frontier
+def _refine_scores(vols, rets):
+    """
+    Estimated chord error of each interval of a piecewise-linear curve.
+
+    The curve is scaled to a unit box; an interval's score is its length
+    times the turning angle at its two ends, which approximates how far the
+    true curve bends away from the straight segment.
+    """
+    x = (vols - vols.min()) / max(np.ptp(vols), 1e-12)
+    y = (rets - rets.min()) / max(np.ptp(rets), 1e-12)
+    dx, dy = np.diff(x), np.diff(y)
+    length = np.hypot(dx, dy)
+    heading = np.arctan2(dy, dx)
+    turn = np.abs(np.angle(np.exp(1j * np.diff(heading))))
+    bend = np.zeros(len(length))
+    bend[:-1] += turn
+    bend[1:] += turn
+    return length * bend / 4
+
+@traced('frontier')
+def progressive_frontier(expected_returns, cov_matrix, bounds, sector_constraints=None, sector_indices=None,
+                         initial_points=20, max_points=500, tol=1e-4):
+    """
+    Efficient frontier computed coarse-to-fine, yielding each refinement.
+
+    Starts with initial_points targets evenly spaced over the feasible
+    return range, then repeatedly bisects the intervals where the curve
+    bends most until the estimated chord error is below tol (in units of
+    the plotted range) or max_points is reached. Each point is a
+    minimum-variance solve at exactly that return, warm-started from its
+    neighbours. Stop iterating to cancel.
+
+    Args:
+        expected_returns (pd.Series): Expected returns.
+        cov_matrix (pd.DataFrame): Covariance matrix.
+        bounds (tuple): Bounds for weights.
+        sector_constraints (dict): Sector constraints.
+        sector_indices (dict): Sector indices.
+        initial_points (int): Points in the first coarse pass.
+        max_points (int): Upper limit on the number of points.
+        tol (float): Target chord error of the piecewise-linear curve.
+
+    Yields:
+        dict: 'returns', 'volatilities' and 'weights' (sorted by return) and
+            'done' (True on the final refinement). Nothing is yielded if the
+            constraints are infeasible.
+    """
+    mu = np.asarray(expected_returns, dtype=float)
+    cov = np.asarray(cov_matrix, dtype=float)
+    n = len(mu)
+    A_ub, b_ub = _sector_matrix(n, sector_constraints, sector_indices)
+    ends = []
+    for sign in (1.0, -1.0):
+        lp = linprog(
+            sign * mu,
+            A_ub=A_ub if len(b_ub) else None,
+            b_ub=b_ub if len(b_ub) else None,
+            A_eq=np.ones((1, n)),
+            b_eq=[1.0],
+            bounds=bounds,
+            method='highs'
+        )
+        if lp.status != 0:
+            return
+        ends.append(lp)
+    low, high = mu @ ends[0].x, mu @ ends[1].x
+    margin = 1e-9 * max(high - low, 1e-12)
+
+    def solve(target, x0):
+        target = min(max(target, low + margin), high - margin)
+        return _min_variance_weights(cov, bounds, A_ub, b_ub, mu, target, x0=x0, exact=True)
+
+    targets = list(np.linspace(low, high, max(min(initial_points, max_points), 2)))
+    weights = [ends[0].x]
+    for target in targets[1:]:
+        weights.append(solve(target, weights[-1]))
+    weights[0] = solve(targets[0], ends[0].x)
+
+    while True:
+        W = np.array(weights)
+        vols = batch_portfolio_volatilities(W, cov)
+        rets = W @ mu
+        scores = _refine_scores(vols, rets)
+        done = len(targets) >= max_points or scores.max() < tol
+        yield {'returns': rets, 'volatilities': vols, 'weights': W, 'done': done}
+        if done:
+            return
+        # Bisect the worst intervals, at most doubling the point count
+        worst = np.argsort(scores)[::-1][:min(len(targets) - 1, max_points - len(targets))]
+        worst = np.sort(worst[scores[worst] >= tol])
+        for i in worst[::-1]:
+            x0 = (weights[i] + weights[i + 1]) / 2
+            midpoint = (targets[i] + targets[i + 1]) / 2
+            targets.insert(i + 1, midpoint)
+            weights.insert(i + 1, solve(midpoint, x0))
+
+# Critical Line Algorithm
+_cla_cache = {}
+
+def _kkt_solve(cov, E, rhs):
+    """Solve the KKT system [[cov, E'], [E, 0]] x = rhs (least squares if singular)."""
+    n, k = cov.shape[0], E.shape[0]
+    kkt = np.block([[cov, E.T], [E, np.zeros((k, k))]])
+    try:
+        return np.linalg.solve(kkt, rhs)
+    except np.linalg.LinAlgError:
+        return np.linalg.lstsq(kkt, rhs, rcond=None)[0]
+
+def _cla_segment(mu, cov, G, h, active):
+    """
+    Solution on the current critical line, linear in lambda:
+    w = w0 + lambda * w1 and multipliers nu = nu0 + lambda * nu1 for the
+    active inequality rows of G w <= h (plus full investment).
+    """
+    n = len(mu)
+    rows = np.flatnonzero(active)
+    E = np.vstack([np.ones((1, n)), G[rows]])
+    rhs = np.zeros((n + len(E), 2))
+    rhs[n:, 0] = np.concatenate([[1.0], h[rows]])
+    rhs[:n, 1] = mu
+    x = _kkt_solve(cov, E, rhs)
+    return x[:n, 0], x[:n, 1], rows, x[n + 1:, 0], x[n + 1:, 1]
+
+def _cla_walk(mu, cov, G, h, active, direction, tol=1e-10, max_steps=None):
+    """
+    Follow the critical lines from lambda = 0 toward +inf (direction 1) or
+    -inf (direction -1), returning the (lambda, weights) corner portfolios.
+    """
+    active = active.copy()
+    lam = 0.0
+    corners = []
+    for _ in range(max_steps or 10 * len(h) + 10):
+        w0, w1, rows, nu0, nu1 = _cla_segment(mu, cov, G, h, active)
+        events = []
+        # An inactive constraint becomes binding
+        inactive = np.flatnonzero(~active)
+        slope = G[inactive] @ w1
+        moving = direction * slope > tol
+        hit = (h[inactive][moving] - G[inactive][moving] @ w0) / slope[moving]
+        events += [(l, i, True) for l, i in zip(hit, inactive[moving]) if direction * (l - lam) > -tol]
+        # An active constraint's multiplier reaches zero and it is released
+        releasing = direction * nu1 < -tol
+        hit = -nu0[releasing] / nu1[releasing]
+        events += [(l, i, False) for l, i in zip(hit, rows[releasing]) if direction * (l - lam) > -tol]
+        if not events:
+            break
+        lam, row, enters = min(events, key=lambda event: direction * event[0])
+        corners.append((lam, w0 + lam * w1))
+        active[row] = enters
+    return corners
+
+@traced('solve')
+def critical_line(expected_returns, cov_matrix, bounds, sector_constraints=None, sector_indices=None):
+    """
+    Corner portfolios of the full constrained mean-variance frontier.
+
+    Solves min w'Σw/2 - lambda mu'w under full investment, bounds and sector
+    limits parametrically in lambda. The solution is linear in lambda
+    between corners, where a constraint becomes binding or is released, so
+    the corners describe the frontier exactly: lambda < 0 is the inefficient
+    lower branch, lambda = 0 the minimum-variance portfolio and lambda > 0
+    the efficient branch up to the maximum-return portfolio. Results are
+    cached per (moments, bounds, sector limits).
+
+    Args:
+        expected_returns (pd.Series): Expected returns.
+        cov_matrix (pd.DataFrame): Covariance matrix.
+        bounds (tuple): Bounds for weights.
+        sector_constraints (dict): Sector constraints.
+        sector_indices (dict): Sector indices.
+
+    Returns:
+        dict: 'lambdas', 'returns', 'volatilities' and 'weights' (one row
+            per corner, sorted by return).
+
+    Raises:
+        ValueError: If the constraints are infeasible.
+    """
+    mu = np.asarray(expected_returns, dtype=float)
+    cov = np.asarray(cov_matrix, dtype=float)
+    n = len(mu)
+    A_ub, b_ub = _sector_matrix(n, sector_constraints, sector_indices)
+    lower = np.array([-np.inf if b[0] is None else b[0] for b in bounds], dtype=float)
+    upper = np.array([np.inf if b[1] is None else b[1] for b in bounds], dtype=float)
+    G = np.vstack([A_ub, -np.eye(n), np.eye(n)])
+    h = np.concatenate([b_ub, -lower, upper])
+    finite = np.isfinite(h)
+    G, h = G[finite], h[finite]
+
+    key = (mu.tobytes(), cov.tobytes(), G.tobytes(), h.tobytes())
+    if key in _cla_cache:
+        return _cla_cache[key]
+
+    feasible = linprog(np.zeros(n), A_ub=G, b_ub=h, A_eq=np.ones((1, n)), b_eq=[1.0],
+                       bounds=(None, None), method='highs')
+    if feasible.status != 0:
+        raise ValueError("Infeasible: the stock and sector weight limits cannot be met together.")
+
+    # Active set of the minimum-variance portfolio, polished so the KKT
+    # conditions hold exactly
+    start = _min_variance_weights(cov, bounds, A_ub, b_ub, x0=feasible.x)
+    active = h - G @ start < 1e-7
+    for _ in range(len(h) + 1):
+        w0, _, rows, nu0, _ = _cla_segment(mu, cov, G, h, active)
+        violation = G @ w0 - h
+        violation[active] = -np.inf
+        if len(nu0) and nu0.min() < -1e-12:
+            active[rows[np.argmin(nu0)]] = False
+        elif violation.max() > 1e-12:
+            active[np.argmax(violation)] = True
+        else:
+            break
+
+    lower_branch = _cla_walk(mu, cov, G, h, active, -1)
+    upper_branch = _cla_walk(mu, cov, G, h, active, 1)
+    corners = lower_branch[::-1] + [(0.0, w0)] + upper_branch
+    lambdas = np.array([lam for lam, _ in corners])
+    weights = np.array([w for _, w in corners])
+    # Drop repeated corners (several constraints changing at the same lambda)
+    keep = np.concatenate([[True], np.abs(np.diff(weights, axis=0)).max(axis=1) > 1e-12])
+    weights = weights[keep]
+    if len(_cla_cache) >= 32:
+        _cla_cache.clear()
+    _cla_cache[key] = {
+        'lambdas': lambdas[keep],
+        'returns': weights @ mu,
+        'volatilities': batch_portfolio_volatilities(weights, cov),
+        'weights': weights,
+    }
+    return _cla_cache[key]
+
+@traced('solve')
+def cla_target_return(expected_returns, cov_matrix, target_return, bounds, sector_constraints=None, sector_indices=None):
+    """
+    Minimum-volatility portfolio for a target return, read off the cached
+    corner portfolios by binary search and linear interpolation.
+
+    Args:
+        expected_returns (pd.Series): Expected returns.
+        cov_matrix (pd.DataFrame): Covariance matrix.
+        target_return (float): Target portfolio return.
+        bounds (tuple): Bounds for weights.
+        sector_constraints (dict): Sector constraints.
+        sector_indices (dict): Sector indices.
+
+    Returns:
+        pd.DataFrame: Optimized weights DataFrame.
+
+    Raises:
+        ValueError: If the constraints are infeasible or the target return
+            is outside the attainable range.
+    """
+    corners = critical_line(expected_returns, cov_matrix, bounds, sector_constraints, sector_indices)
+    rets, weights = corners['returns'], corners['weights']
+    if not rets[0] - 1e-10 <= target_return <= rets[-1] + 1e-10:
+        raise ValueError(
+            f"Infeasible: target return {target_return:.2%} is outside the attainable range "
+            f"{rets[0]:.2%} to {rets[-1]:.2%}."
+        )
+    k = int(np.clip(np.searchsorted(rets, target_return), 1, len(rets) - 1)) if len(rets) > 1 else 0
+    if k == 0 or rets[k] - rets[k - 1] < 1e-14:
+        return transform_weights_to_df(weights[k], expected_returns.index.tolist())
+    t = np.clip((target_return - rets[k - 1]) / (rets[k] - rets[k - 1]), 0.0, 1.0)
+    return transform_weights_to_df(weights[k - 1] + t * (weights[k] - weights[k - 1]), expected_returns.index.tolist())
+
+@traced('solve')
+def cla_target_risk(expected_returns, cov_matrix, target_risk, bounds, sector_constraints=None, sector_indices=None):
+    """
+    Maximum-return portfolio for a target volatility, read off the efficient
+    corner portfolios by binary search; within a segment the variance is
+    quadratic in the interpolation weight and is solved exactly.
+
+    Args:
+        expected_returns (pd.Series): Expected returns.
+        cov_matrix (pd.DataFrame): Covariance matrix.
+        target_risk (float): Target portfolio volatility.
+        bounds (tuple): Bounds for weights.
+        sector_constraints (dict): Sector constraints.
+        sector_indices (dict): Sector indices.
+
+    Returns:
+        pd.DataFrame: Optimized weights DataFrame.
+
+    Raises:
+        ValueError: If the constraints are infeasible or the target risk lies
+            outside the attainable frontier volatility range.
+    """
+    corners = critical_line(expected_returns, cov_matrix, bounds, sector_constraints, sector_indices)
+    efficient = corners['lambdas'] >= 0
+    vols, weights = corners['volatilities'][efficient], corners['weights'][efficient]
+    tickers = expected_returns.index.tolist()
+    if target_risk < vols[0] - 1e-10:
+        raise ValueError(
+            f"Infeasible: target risk {target_risk:.2%} is below the minimum attainable volatility of {vols[0]:.2%}."
+        )
+    if target_risk > vols[-1] + 1e-10:
+        raise ValueError(
+            f"Infeasible: target risk {target_risk:.2%} is above the volatility of the maximum-return portfolio ({vols[-1]:.2%})."
+        )
+    k = int(np.searchsorted(vols, target_risk))
+    if k == 0 or k == len(vols):
+        return transform_weights_to_df(weights[min(k, len(vols) - 1)], tickers)
+    cov = np.asarray(cov_matrix, dtype=float)
+    start, step = weights[k - 1], weights[k] - weights[k - 1]
+    a, b, c = step @ cov @ step, 2 * start @ cov @ step, start @ cov @ start - target_risk ** 2
+    t = (-b + np.sqrt(max(b * b - 4 * a * c, 0.0))) / (2 * a) if a > 0 else 1.0
+    return transform_weights_to_df(start + np.clip(t, 0.0, 1.0) * step, tickers)
+
+# Risk Parity / Risk Budgeting
+def risk_contributions(weights, cov_matrix):
+    """
+    Calculate each asset's share of total portfolio risk.
+
+    Args:
+        weights (np.ndarray or pd.Series): Portfolio weights.
+        cov_matrix (pd.DataFrame or np.ndarray): Covariance matrix.
+
+    Returns:
+        np.ndarray: Percentage risk contributions (sum to 1).
+    """
+    weights = np.asarray(weights, dtype=float)
+    marginal = np.asarray(cov_matrix, dtype=float) @ weights
+    contributions = weights * marginal
+    return contributions / contributions.sum()
+
+def _risk_budget_newton(cov, budgets, scale, lower, upper, x0, tol=1e-12, max_iter=100):
+    """
+    Solve min 0.5 x'Σx - scale * Σ b_i log(x_i) subject to lower <= x <= upper
+    with a projected Newton method. At the optimum every asset off its bounds
+    satisfies x_i (Σx)_i = scale * b_i, i.e. risk contributions follow the budgets.
+    """
+    x = np.clip(x0, lower, upper)
+    scaled_budgets = scale * budgets
+
+    def objective(z):
+        return 0.5 * z @ cov @ z - scaled_budgets @ np.log(z)
+
+    f = objective(x)
+    for _ in range(max_iter):
+        grad = cov @ x - scaled_budgets / x
+        active = ((x <= lower) & (grad > 0)) | ((x >= upper) & (grad < 0))
+        free = ~active
+        if not free.any() or np.max(np.abs(grad[free] * x[free])) < tol:
+            break
+        hess = cov[np.ix_(free, free)] + np.diag(scaled_budgets[free] / x[free] ** 2)
+        step = np.linalg.solve(hess, -grad[free])
+        t = 1.0
+        while True:
+            x_new = x.copy()
+            x_new[free] = np.clip(x[free] + t * step, lower[free], upper[free])
+            f_new = objective(x_new)
+            if f_new <= f + 1e-4 * grad[free] @ (x_new[free] - x[free]) or t < 1e-10:
+                break
+            t *= 0.5
+        x, f = x_new, f_new
+    return x
+
+def _risk_budget_weights(cov, budgets, lower, upper, tol=1e-10, max_iter=100):
+    """
+    Fully invested risk-budget weights within per-asset bounds.
+
+    The unconstrained solution is found once and normalized. If it breaks a
+    bound, the barrier scale is adjusted until the bounded solution sums to 1;
+    without bounds the weights scale with sqrt(scale), which drives the update.
+    """
+    n = len(budgets)
+    x = _risk_budget_newton(cov, budgets, 1.0, np.full(n, 1e-12), np.full(n, np.inf),
+                            np.sqrt(budgets / np.diag(cov)))
+    w = x / x.sum()
+    if np.all(w >= lower - tol) and np.all(w <= upper + tol):
+        return w
+
+    lower = np.maximum(lower, 1e-12)
+    scale = 1.0 / x.sum() ** 2
+    lo_scale, hi_scale = 0.0, np.inf
+    w = np.clip(w, lower, upper)
+    for _ in range(max_iter):
+        w = _risk_budget_newton(cov, budgets, scale, lower, upper, w)
+        total = w.sum()
+        if abs(total - 1.0) < tol:
+            break
+        if total > 1.0:
+            hi_scale = scale
+        else:
+            lo_scale = scale
+        scale = scale / total ** 2
+        if not lo_scale < scale < hi_scale:
+            # Fall back to bisection once the bracket is closed on both sides
+            scale = np.sqrt(lo_scale * hi_scale)
+    return w
+
+@traced('solve')
+def optimize_portfolio_risk_parity(expected_returns, cov_matrix, bounds, risk_budgets=None, sector_constraints=None, sector_indices=None, tol=1e-8, max_iter=100):
+    """
+    Optimize portfolio so each asset contributes its budgeted share of total risk.
+
+    With no budgets this is the equal-risk-contribution portfolio. Solved by
+    Newton's method on the log-barrier formulation rather than SLSQP. Sector
+    constraints are met, where feasible, by rescaling the budgets of the
+    sectors that break their limits and re-solving.
+
+    Args:
+        expected_returns (pd.Series): Expected returns (used for tickers only).
+        cov_matrix (pd.DataFrame): Covariance matrix.
+        bounds (tuple): Bounds for weights.
+        risk_budgets (list or np.ndarray): Relative risk budget per asset (default equal).
+        sector_constraints (dict): Sector constraints.
+        sector_indices (dict): Sector indices.
+        tol (float): Tolerance on sector limits.
+        max_iter (int): Maximum budget-rescaling rounds for sector constraints.
+
+    Returns:
+        pd.DataFrame: Optimized weights DataFrame.
+    """
+    cov = np.asarray(cov_matrix, dtype=float)
+    n = cov.shape[0]
+    budgets = np.ones(n) if risk_budgets is None else np.asarray(risk_budgets, dtype=float)
+    if np.any(budgets <= 0):
+        raise ValueError("Risk budgets must be positive.")
+    budgets = budgets / budgets.sum()
+    lower = np.array([b[0] for b in bounds], dtype=float)
+    upper = np.array([b[1] for b in bounds], dtype=float)
+
+    sector_limits = []
+    if sector_constraints and sector_indices:
+        for sector, indices in sector_indices.items():
+            if sector in sector_constraints:
+                sector_limits.append((
+                    list(indices),
+                    sector_constraints[sector].get("min", 0) / 100.0,
+                    sector_constraints[sector].get("max", 100) / 100.0,
+                ))
+
+    weights = _risk_budget_weights(cov, budgets, lower, upper)
+    for _ in range(max_iter if sector_limits else 0):
+        violated = False
+        for idx, min_inv, max_inv in sector_limits:
+            total = weights[idx].sum()
+            if total > max_inv + tol:
+                budgets[idx] *= (max_inv / total) ** 2
+                violated = True
+            elif total < min_inv - tol:
+                budgets[idx] *= (min_inv / total) ** 2
+                violated = True
+        if not violated:
+            break
+        budgets = budgets / budgets.sum()
+        weights = _risk_budget_weights(cov, budgets, lower, upper)
+    return transform_weights_to_df(weights, expected_returns.index.tolist())
+
+# Hierarchical Risk Parity
+_linkage_cache = {}
+
+def hrp_order(cov_matrix, window=None, method='single'):
+    """
+    Quasi-diagonal asset order from correlation-distance clustering, cached
+    per (universe, window).
+
+    Distances are d_ij = sqrt((1 - rho_ij) / 2); the order is the leaf order
+    of the linkage tree, which places correlated assets next to each other.
+
+    Args:
+        cov_matrix (pd.DataFrame): Covariance matrix.
+        window (tuple): Identifies the estimation window, e.g.
+            (start_date, end_date, 'pairwise'); part of the cache key. When
+            None the covariance values themselves are the key.
+        method (str): scipy linkage method.
+
+    Returns:
+        np.ndarray: Asset positions in quasi-diagonal order.
+    """
+    cov = np.asarray(cov_matrix, dtype=float)
+    key = (tuple(cov_matrix.index), cov.tobytes() if window is None else tuple(window), method)
+    if len(cov) < 3:
+        return np.arange(len(cov))
+    if key not in _linkage_cache:
+        std = np.sqrt(np.clip(np.diag(cov), 1e-18, None))
+        corr = np.clip(cov / np.outer(std, std), -1.0, 1.0)
+        dist = np.sqrt(np.clip((1.0 - corr) / 2.0, 0.0, None))
+        np.fill_diagonal(dist, 0.0)
+        tree = linkage(squareform(dist, checks=False), method=method)
+        if len(_linkage_cache) >= 32:
+            _linkage_cache.clear()
+        _linkage_cache[key] = leaves_list(tree)
+    return _linkage_cache[key]
+
+def _cluster_variance(cov, items):
+    """Variance of the inverse-variance portfolio of a cluster."""
+    sub = cov[np.ix_(items, items)]
+    ivp = 1.0 / np.clip(np.diag(sub), 1e-18, None)
+    ivp /= ivp.sum()
+    return ivp @ sub @ ivp
+
+def _recursive_bisection(cov, order, total, lower, upper):
+    """
+    Split `total` down the ordered list by halves, giving each half weight
+    inversely proportional to its cluster variance. Each split is clipped so
+    both halves can still meet their members' weight bounds.
+    """
+    weights = np.zeros(cov.shape[0])
+    stack = [(np.asarray(order), total)]
+    while stack:
+        items, amount = stack.pop()
+        if len(items) == 1:
+            weights[items[0]] = amount
+            continue
+        left, right = items[:len(items) // 2], items[len(items) // 2:]
+        var_left, var_right = _cluster_variance(cov, left), _cluster_variance(cov, right)
+        share = amount * (1.0 - var_left / (var_left + var_right))
+        share = np.clip(share, max(lower[left].sum(), amount - upper[right].sum()),
+                        min(upper[left].sum(), amount - lower[right].sum()))
+        stack.append((left, share))
+        stack.append((right, amount - share))
+    return weights
+
+def _sector_budgets(variances, low, high, max_iter=100):
+    """
+    Inverse-variance budgets across sectors, clipped to [low, high] with the
+    excess or shortfall redistributed among the unclipped sectors.
+    """
+    raw = 1.0 / np.clip(variances, 1e-18, None)
+    budgets = raw / raw.sum()
+    fixed = np.zeros(len(budgets), dtype=bool)
+    for _ in range(max_iter):
+        clipped = np.clip(budgets, low, high)
+        newly = ~fixed & (clipped != budgets)
+        if not newly.any():
+            break
+        fixed |= newly
+        budgets = clipped
+        free = ~fixed
+        if not free.any():
+            break
+        budgets[free] = raw[free] / raw[free].sum() * (1.0 - budgets[fixed].sum())
+    return budgets
+
+@traced('solve')
+def optimize_portfolio_hrp(expected_returns, cov_matrix, bounds, window=None, sector_constraints=None, sector_indices=None,
+                           sector_split=False, method='single'):
+    """
+    Hierarchical Risk Parity allocation (Lopez de Prado).
+
+    Clusters assets by correlation distance, orders them quasi-diagonally and
+    allocates by recursive bisection. Only cluster variances are used, with
+    no matrix inversion, so it stays stable when the covariance is
+    ill-conditioned. With sector_split, capital is first divided across
+    sectors by inverse cluster variance (clipped to the sector limits) and
+    HRP runs within each sector on the cached global order.
+
+    Args:
+        expected_returns (pd.Series): Expected returns (used for tickers only).
+        cov_matrix (pd.DataFrame): Covariance matrix.
+        bounds (tuple): Bounds for weights.
+        window (tuple): Estimation window, used to cache the linkage tree.
+        sector_constraints (dict): Sector constraints (used with sector_split).
+        sector_indices (dict): Sector indices (default: nifty50_sectors).
+        sector_split (bool): Split by sector before clustering.
+        method (str): scipy linkage method.
+
+    Returns:
+        pd.DataFrame: Optimized weights DataFrame.
+    """
+    tickers = expected_returns.index.tolist()
+    cov = np.asarray(cov_matrix, dtype=float)
+    lower = np.array([b[0] for b in bounds], dtype=float)
+    upper = np.array([b[1] for b in bounds], dtype=float)
+    order = hrp_order(cov_matrix, window, method)
+    if not sector_split:
+        return transform_weights_to_df(_recursive_bisection(cov, order, 1.0, lower, upper), tickers)
+
+    if sector_indices is None:
+        position = {ticker: i for i, ticker in enumerate(tickers)}
+        sector_indices = {
+            sector: [position[t] for t in members]
+            for sector, members in get_sector_to_tickers(tickers).items()
+        }
+    sectors = [sector for sector, members in sector_indices.items() if len(members)]
+    rank = np.empty(len(tickers), dtype=int)
+    rank[order] = np.arange(len(tickers))
+    members = [np.array(sorted(sector_indices[sector], key=lambda i: rank[i])) for sector in sectors]
+    limits = sector_constraints or {}
+    low = np.array([max(limits.get(s, {}).get("min", 0) / 100.0, lower[m].sum()) for s, m in zip(sectors, members)])
+    high = np.array([min(limits.get(s, {}).get("max", 100) / 100.0, upper[m].sum()) for s, m in zip(sectors, members)])
+    budgets = _sector_budgets(np.array([_cluster_variance(cov, m) for m in members]), low, high)
+
+    weights = np.zeros(len(tickers))
+    for items, budget in zip(members, budgets):
+        weights += _recursive_bisection(cov, items, budget, lower, upper)
+    return transform_weights_to_df(weights, tickers)
+
+# Cardinality-Constrained Optimization
+CARDINALITY_METHODS = {
+    'max_sharpe': optimize_portfolio_max_sharpe,
+    'min_volatility': optimize_portfolio_min_volatility,
+    'target_return': optimize_portfolio_target_return,
+    'target_risk': optimize_portfolio_target_risk,
+}
+
+def _objective_value(method, weights, expected_returns, cov_matrix, risk_free_rate):
+    """Objective minimized by each method, used to compare candidate supports."""
+    if method == 'max_sharpe':
+        return neg_sharpe_ratio(weights, expected_returns, cov_matrix, risk_free_rate)
+    if method == 'target_risk':
+        return -portfolio_return(weights, expected_returns)
+    return portfolio_volatility(weights, cov_matrix)
+
+def _objective_gradient(method, weights, expected_returns, cov_matrix, risk_free_rate):
+    """Analytic gradient of _objective_value, used to rank assets to swap in."""
+    sigma_w = cov_matrix @ weights
+    vol = np.sqrt(weights @ sigma_w)
+    if method == 'max_sharpe':
+        ret = expected_returns @ weights
+        return -(expected_returns * vol - (ret - risk_free_rate) * sigma_w / vol) / vol ** 2
+    if method == 'target_risk':
+        return -expected_returns
+    return sigma_w / vol
+
+def _is_feasible(weights, bounds, method, target, expected_returns, cov_matrix, sector_constraints, sector_indices, tol=1e-5):
+    """Check a weight vector against the budget, bounds, sector and target constraints."""
+    lower = np.array([b[0] for b in bounds])
+    upper = np.array([b[1] for b in bounds])
+    if abs(weights.sum() - 1) > tol or np.any(weights < lower - tol) or np.any(weights > upper + tol):
+        return False
+    if sector_constraints and sector_indices:
+        for sector, indices in sector_indices.items():
+            if sector in sector_constraints:
+                total = weights[list(indices)].sum()
+                if total < sector_constraints[sector].get("min", 0) / 100.0 - tol:
+                    return False
+                if total > sector_constraints[sector].get("max", 100) / 100.0 + tol:
+                    return False
+    if method == 'target_return' and abs(portfolio_return(weights, expected_returns) - target) > tol:
+        return False
+    if method == 'target_risk' and abs(portfolio_volatility(weights, cov_matrix) - target) > tol:
+        return False
+    return True
+
+def _solve_relaxed(method, expected_returns, cov_matrix, bounds, target, risk_free_rate, sector_constraints, sector_indices):
+    """Run one of the existing optimizers and score the result (inf if infeasible)."""
+    kwargs = dict(
+        expected_returns=expected_returns,
+        cov_matrix=cov_matrix,
         bounds=bounds,
-        constraints=all_constraints
+        sector_constraints=sector_constraints,
+        sector_indices=sector_indices
     )
-    return transform_weights_to_df(result.x, expected_returns.index.tolist())
+    if method == 'max_sharpe':
+        kwargs['risk_free_rate'] = risk_free_rate
+    elif method == 'target_return':
+        kwargs['target_return'] = target
+    elif method == 'target_risk':
+        kwargs['target_risk'] = target
+    try:
+        weights = CARDINALITY_METHODS[method](**kwargs)['Weight'].values
+    except ValueError:
+        return np.zeros(len(expected_returns)), np.inf
+    mu = expected_returns.values
+    cov = cov_matrix.values
+    if not _is_feasible(weights, bounds, method, target, mu, cov, sector_constraints, sector_indices):
+        return weights, np.inf
+    return weights, _objective_value(method, weights, mu, cov, risk_free_rate)
+
+def _solve_support(support, method, expected_returns, cov_matrix, bounds, min_weight, target, risk_free_rate, sector_constraints, sector_indices):
+    """
+    Solve the continuous problem restricted to the assets in `support`, each held
+    at no less than min_weight. Returns full-length weights and the objective.
+    """
+    support = sorted(support)
+    n = len(expected_returns)
+    position = {asset: k for k, asset in enumerate(support)}
+    sub_bounds = tuple((max(bounds[i][0], min_weight), bounds[i][1]) for i in support)
+    if sum(b[0] for b in sub_bounds) > 1 or sum(b[1] for b in sub_bounds) < 1:
+        return np.zeros(n), np.inf
+    sub_sectors = {}
+    for sector, indices in (sector_indices or {}).items():
+        members = [position[i] for i in indices if i in position]
+        if members:
+            sub_sectors[sector] = members
+        elif sector_constraints and sector_constraints.get(sector, {}).get("min", 0) > 0:
+            return np.zeros(n), np.inf
+    sub_weights, objective = _solve_relaxed(
+        method,
+        expected_returns.iloc[support],
+        cov_matrix.iloc[support, support],
+        sub_bounds,
+        target,
+        risk_free_rate,
+        sector_constraints,
+        sub_sectors
+    )
+    weights = np.zeros(n)
+    weights[support] = sub_weights
+    return weights, objective
+
+def _branch_and_bound(method, expected_returns, cov_matrix, bounds, max_assets, min_weight, target, risk_free_rate,
+                      sector_constraints, sector_indices, forced, incumbent, incumbent_obj, deadline, tol=1e-6):
+    """
+    Depth-first branch-and-bound over include/exclude decisions. Each node solves
+    the continuous relaxation with excluded assets fixed at zero and included
+    assets held at min_weight or more. Stops at the deadline and returns the best
+    feasible weights together with the smallest lower bound still open.
+    """
+    n = len(expected_returns)
+    all_assets = frozenset(range(n))
+    stack = [(frozenset(forced), frozenset(), -np.inf)]
+    n_solves = 0
+    while stack:
+        if time.perf_counter() > deadline:
+            open_bound = min(node[2] for node in stack)
+            return incumbent, incumbent_obj, min(open_bound, incumbent_obj), n_solves, 'time_limit'
+        included, excluded, parent_bound = stack.pop()
+        if parent_bound >= incumbent_obj - tol:
+            continue
+        if len(included) == max_assets:
+            excluded = all_assets - included
+        node_bounds = tuple(
+            (0.0, 0.0) if i in excluded else
+            (max(bounds[i][0], min_weight), bounds[i][1]) if i in included else
+            bounds[i]
+            for i in range(n)
+        )
+        weights, objective = _solve_relaxed(method, expected_returns, cov_matrix, node_bounds, target,
+                                            risk_free_rate, sector_constraints, sector_indices)
+        n_solves += 1
+        if objective >= incumbent_obj - tol:
+            continue
+        held = weights > tol
+        undecided = [i for i in range(n) if held[i] and i not in included and i not in excluded]
+        if held.sum() <= max_assets and all(weights[i] >= min_weight - tol for i in undecided):
+            incumbent, incumbent_obj = np.where(held, weights, 0.0), objective
+            continue
+        if not undecided:
+            continue
+        branch = min(undecided, key=lambda i: weights[i])
+        if len(included) < max_assets:
+            stack.append((included | {branch}, excluded, objective))
+        stack.append((included, excluded | {branch}, objective))
+    return incumbent, incumbent_obj, incumbent_obj, n_solves, 'optimal'
+
+@traced('solve')
+def optimize_portfolio_cardinality(expected_returns, cov_matrix, bounds, max_assets, min_weight=0.02, method='max_sharpe',
+                                   target=None, risk_free_rate=0.0, sector_constraints=None, sector_indices=None,
+                                   exact=False, time_limit=10.0, search_width=3):
+    """
+    Optimize a portfolio holding at most `max_assets` stocks, each at `min_weight` or more.
+
+    Warm-starts from the continuous solution of the chosen method, keeps its
+    largest positions, then improves the selection with a swap/drop local search
+    ranked by the objective gradient. With exact=True, a branch-and-bound search
+    (intended for small universes) then runs until `time_limit` seconds.
+
+    Args:
+        expected_returns (pd.Series): Expected returns.
+        cov_matrix (pd.DataFrame): Covariance matrix.
+        bounds (tuple): Bounds for weights.
+        max_assets (int): Maximum number of stocks held.
+        min_weight (float): Minimum weight of any held stock.
+        method (str): 'max_sharpe', 'min_volatility', 'target_return' or 'target_risk'.
+        target (float): Target return or risk for the target methods.
+        risk_free_rate (float): Risk-free rate.
+        sector_constraints (dict): Sector constraints.
+        sector_indices (dict): Sector indices.
+        exact (bool): Run branch-and-bound after the heuristic.
+        time_limit (float): Time limit in seconds for the whole search.
+        search_width (int): Number of candidates tried on each side of a swap.
+
+    Returns:
+        tuple: (weights_df, info)
+            weights_df (pd.DataFrame): Optimized weights DataFrame.
+            info (dict): objective, lower bound, relative optimality gap, status,
+                number of solves and elapsed seconds.
+    """
+    if method not in CARDINALITY_METHODS:
+        raise ValueError(f"Unsupported method for cardinality constraints: {method}")
+    start = time.perf_counter()
+    deadline = start + time_limit
+    n = len(expected_returns)
+    mu = expected_returns.values
+    cov = cov_matrix.values
+    args = (method, expected_returns, cov_matrix, bounds, min_weight, target, risk_free_rate,
+            sector_constraints, sector_indices)
+
+    forced = {i for i in range(n) if bounds[i][0] > 0}
+    if len(forced) > max_assets:
+        raise ValueError("More stocks have a positive minimum weight than max_assets allows.")
+
+    # Continuous solution: warm start and root lower bound
+    continuous, root_bound = _solve_relaxed(method, expected_returns, cov_matrix, bounds, target,
+                                            risk_free_rate, sector_constraints, sector_indices)
+    n_solves = 1
+
+    # Greedy: keep the largest continuous positions
+    ranked = [i for i in np.argsort(-continuous) if i not in forced]
+    support = frozenset(forced) | frozenset(ranked[:max(max_assets - len(forced), 0)])
+    cache = {}
+
+    def evaluate(candidate):
+        nonlocal n_solves
+        if candidate not in cache:
+            cache[candidate] = _solve_support(candidate, *args)
+            n_solves += 1
+        return cache[candidate]
+
+    best_w, best_obj = evaluate(support)
+
+    # Local search: best-improvement swaps, drops and adds
+    improved = True
+    while improved and time.perf_counter() < deadline:
+        improved = False
+        probe = best_w if np.isfinite(best_obj) else continuous
+        grad = _objective_gradient(method, probe, mu, cov, risk_free_rate)
+        outside = sorted((i for i in range(n) if i not in support), key=lambda i: grad[i])[:search_width]
+        inside = sorted((i for i in support if i not in forced), key=lambda i: probe[i])[:search_width]
+        moves = [support - {d} | {a} for d in inside for a in outside]
+        moves += [support - {d} for d in inside if len(support) > 1]
+        if len(support) < max_assets:
+            moves += [support | {a} for a in outside]
+        for candidate in moves:
+            if time.perf_counter() > deadline:
+                break
+            weights, objective = evaluate(frozenset(candidate))
+            if objective < best_obj - 1e-9:
+                best_w, best_obj, support, improved = weights, objective, frozenset(candidate), True
+
+    bound = root_bound
+    status = 'heuristic'
+    if exact:
+        best_w, best_obj, bound, bb_solves, status = _branch_and_bound(
+            method, expected_returns, cov_matrix, bounds, max_assets, min_weight, target, risk_free_rate,
+            sector_constraints, sector_indices, forced, best_w, best_obj, deadline
+        )
+        n_solves += bb_solves
+    if not np.isfinite(best_obj):
+        status = 'infeasible'
+
+    gap = max(best_obj - bound, 0.0) / max(abs(best_obj), 1e-12) if np.isfinite(best_obj) else np.inf
+    info = {
+        'objective': best_obj,
+        'lower_bound': bound,
+        'gap': gap,
+        'status': status,
+        'n_solves': n_solves,
+        'elapsed': time.perf_counter() - start,
+    }
+    return transform_weights_to_df(best_w, expected_returns.index.tolist()), info
 
 # #Transaction Penalty Optimizers
 
@@ -0,0 +1,164 @@
+# =========================
+# Precomputed Moments for Date Range Presets
+# =========================
+# Run once a day (e.g. from cron) from the App/ folder:  python precompute.py
+# Downloads the full Nifty 50 universe once, then materializes the return
+# sums, cross-products and annualized mean/covariance blocks for every
+# preset in DATE_RANGE_PRESETS. The app then answers any ticker subset by
+# slicing these blocks instead of refetching and recomputing.
+
+import os
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+
+from optimizer import get_stock_data, align_price_data, pairwise_moments
+from nifty50_dict import nifty50_tickers
+from tracing import traced
+
+# Preset label (as shown in the app's date range radio) -> lookback in days
+DATE_RANGE_PRESETS = {
+    "6 Months": 180,
+    "1 Year": 365,
+    "2 Years": 730,
+    "5 Years": 1825,
+}
+
+PRECOMPUTE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Data", "precomputed")
+
+_loaded = {}
+
+
+def preset_start_date(preset, today=None):
+    """
+    Start date of a date range preset, matching the app's relative windows.
+
+    Args:
+        preset (str): Preset label, e.g. "1 Year".
+        today (datetime): Reference date (default now).
+
+    Returns:
+        datetime: Start date of the window.
+    """
+    today = today or datetime.today()
+    return today - timedelta(days=DATE_RANGE_PRESETS[preset])
+
+
+def window_moments(closed_prices):
+    """
+    Sufficient statistics of daily returns over one window.
+
+    Missing prices (late listings, suspensions) are handled pairwise, so one
+    short history does not truncate the others.
+
+    Args:
+        closed_prices (pd.DataFrame): DataFrame of closing prices.
+
+    Returns:
+        dict: 'count', 'pair_sum', 'cross', 'mean' and 'cov' as returned by
+            optimizer.pairwise_moments.
+    """
+    return pairwise_moments(align_price_data(closed_prices)['returns'])
+
+
+def build_preset_moments(tickers=None, today=None, directory=PRECOMPUTE_DIR):
+    """
+    Daily job: fetch the full universe once and save moments for every preset.
+
+    Args:
+        tickers (list): Universe to precompute (default all Nifty 50 tickers).
+        today (datetime): Reference date (default now).
+        directory (str): Output folder.
+
+    Returns:
+        str: Path of the written .npz file.
+    """
+    today = today or datetime.today()
+    tickers = sorted(tickers or nifty50_tickers.values())
+    longest = max(DATE_RANGE_PRESETS, key=DATE_RANGE_PRESETS.get)
+    prices = get_stock_data(tickers, start_date=preset_start_date(longest, today), end_date=today)
+    prices = prices.reindex(columns=tickers)
+
+    arrays = {'tickers': np.array(tickers)}
+    for preset in DATE_RANGE_PRESETS:
+        start = pd.Timestamp(preset_start_date(preset, today).date())
+        for name, value in window_moments(prices[prices.index >= start]).items():
+            arrays[f"{preset}/{name}"] = value
+
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"moments_{today:%Y-%m-%d}.npz")
+    np.savez(path, **arrays)
+    return path
+
+
+def _preset_arrays(preset, tickers, today, directory):
+    """Today's precomputed arrays and the positions of tickers in them, or (None, None)."""
+    if preset not in DATE_RANGE_PRESETS:
+        return None, None
+    today = today or datetime.today()
+    path = os.path.join(directory, f"moments_{today:%Y-%m-%d}.npz")
+    if path not in _loaded:
+        if not os.path.exists(path):
+            return None, None
+        with np.load(path) as data:
+            _loaded.clear()
+            _loaded[path] = {key: data[key] for key in data.files}
+    arrays = _loaded[path]
+
+    position = {ticker: i for i, ticker in enumerate(arrays['tickers'])}
+    if any(ticker not in position for ticker in tickers):
+        return None, None
+    return arrays, np.array([position[ticker] for ticker in tickers])
+
+
+@traced('moments')
+def load_preset_moments(preset, tickers, today=None, directory=PRECOMPUTE_DIR):
+    """
+    Look up expected returns and covariance for a ticker subset and preset.
+
+    Only the k selected entries of the mean vector and the k x k block of the
+    covariance matrix are extracted, so the lookup is O(k^2).
+
+    Args:
+        preset (str): Preset label, e.g. "1 Year".
+        tickers (list): Selected ticker symbols.
+        today (datetime): Reference date (default now).
+        directory (str): Folder holding the precomputed files.
+
+    Returns:
+        tuple or None: (expected_returns, cov_matrix) as pd.Series and
+            pd.DataFrame, or None if today's file is missing or does not cover
+            every ticker.
+    """
+    arrays, idx = _preset_arrays(preset, tickers, today, directory)
+    if arrays is None:
+        return None
+    mean = arrays[f"{preset}/mean"][idx]
+    cov = arrays[f"{preset}/cov"][np.ix_(idx, idx)]
+    if np.isnan(mean).any() or np.isnan(cov).any():
+        return None
+    return (
+        pd.Series(mean, index=tickers),
+        pd.DataFrame(cov, index=tickers, columns=tickers),
+    )
+
+
+def load_preset_counts(preset, tickers, today=None, directory=PRECOMPUTE_DIR):
+    """
+    Daily return observations behind each ticker's precomputed moments.
+
+    Args:
+        Same as load_preset_moments.
+
+    Returns:
+        np.ndarray or None: Observation count per ticker, or None if today's
+            file is missing or does not cover every ticker.
+    """
+    arrays, idx = _preset_arrays(preset, tickers, today, directory)
+    if arrays is None:
+        return None
+    return np.diag(arrays[f"{preset}/count"])[idx]
+
+
+if __name__ == "__main__":
+    print(f"Saved {build_preset_moments()}")
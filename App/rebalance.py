@@ -0,0 +1,237 @@
+# =========================
+# Turnover-Limited Rebalancing
+# =========================
+# Rebalances current holdings toward a mean-variance target under a hard
+# turnover budget, per-name trade limits and a minimum trade size. Trades
+# are split into buy and sell variables (w = w0 + buy - sell), which keeps
+# |trade| linear so the whole problem is a QP with linear constraints. One
+# solver workspace is reused across accounts; only the right-hand side
+# (current weights and trade limits) changes between solves.
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sparse
+import clarabel
+
+from optimizer import _sector_matrix, transform_weights_to_df
+from tracing import traced
+
+# Tiny cost per unit traded so a name is never bought and sold at once
+_TRADE_EPS = 1e-6
+
+# Solved values this close to zero are solver noise
+_SOLVER_TOL = 1e-8
+
+
+class _RebalanceQP:
+    """
+    Rebalance QP over x = [w, buy, sell] for one universe and objective.
+
+        minimize    (risk_aversion / 2) w' Sigma w - mu' w + l2_reg ||w||^2
+                    + cost_rate * sum(buy + sell)
+        subject to  w - buy + sell = w0,  sum(w) = 1
+                    sum(buy + sell) / 2 <= max_turnover
+                    0 <= buy, sell <= trade_limit
+                    lower <= w <= upper,  sector limits on w
+    """
+
+    def __init__(self, mu, cov, bounds, A_sector, b_sector, risk_aversion, l2_reg, cost_rate, max_turnover):
+        n = len(mu)
+        self.n = n
+        zeros, eye = np.zeros((n, n)), np.eye(n)
+        P_w = risk_aversion * cov + 2.0 * l2_reg * eye
+        self.P = np.block([[P_w, zeros, zeros], [zeros, zeros, zeros], [zeros, zeros, zeros]])
+        self.q = np.concatenate([-mu, np.full(2 * n, cost_rate + _TRADE_EPS)])
+
+        lower = np.array([b[0] for b in bounds], dtype=float)
+        upper = np.array([b[1] for b in bounds], dtype=float)
+        self.A_eq = np.vstack([
+            np.hstack([eye, -eye, eye]),
+            np.concatenate([np.ones(n), np.zeros(2 * n)]),
+        ])
+        k = len(b_sector)
+        self.A_ub = np.vstack([
+            np.concatenate([np.zeros(n), np.full(2 * n, 0.5)]),
+            np.hstack([-eye, zeros, zeros]),
+            np.hstack([eye, zeros, zeros]),
+            np.hstack([zeros, -eye, zeros]),
+            np.hstack([zeros, eye, zeros]),
+            np.hstack([zeros, zeros, -eye]),
+            np.hstack([zeros, zeros, eye]),
+            np.hstack([A_sector, np.zeros((k, 2 * n))]),
+        ])
+        self.b_fixed = np.concatenate([[max_turnover], -lower, upper])
+        self.b_sector = b_sector
+        self.solver = None
+
+    def rhs(self, current, trade_limits):
+        """Equality and inequality right-hand sides for one account."""
+        zeros = np.zeros(self.n)
+        b_eq = np.concatenate([current, [1.0]])
+        b_ub = np.concatenate([self.b_fixed, zeros, trade_limits, zeros, trade_limits, self.b_sector])
+        return b_eq, b_ub
+
+    def solve(self, current, trade_limits):
+        """Solve for one account; returns (weights, status)."""
+        b_eq, b_ub = self.rhs(current, trade_limits)
+        b = np.concatenate([b_eq, b_ub])
+        if self.solver is None or not self.solver.is_data_update_allowed():
+            settings = clarabel.DefaultSettings()
+            settings.verbose = False
+            A = sparse.csc_matrix(np.vstack([self.A_eq, self.A_ub]))
+            cones = [clarabel.ZeroConeT(len(b_eq)), clarabel.NonnegativeConeT(len(b_ub))]
+            self.solver = clarabel.DefaultSolver(sparse.csc_matrix(np.triu(self.P)), self.q, A, b, cones, settings)
+        else:
+            self.solver.update(b=b)
+        result = self.solver.solve()
+        status = str(result.status)
+        if status not in ('Solved', 'AlmostSolved'):
+            return None, 'infeasible' if 'Infeasible' in status else 'failed'
+        return np.array(result.x)[:self.n], 'optimal'
+
+
+def _rebalance_one(qp, current, trade_limits, min_trade):
+    """
+    Solve one account, then suppress trades smaller than min_trade.
+
+    Names whose trade falls below min_trade are frozen at their current
+    weight (their trade limit is set to zero) and the QP is re-solved; this
+    repeats until no new name needs freezing, which takes at most N passes.
+    If freezing makes the problem infeasible the last feasible solution is
+    kept, and any trades still below min_trade are reported through the
+    'min_trade_relaxed' status.
+    """
+    weights, status = qp.solve(current, trade_limits)
+    if weights is None or min_trade <= 0:
+        return weights, status
+    limits = trade_limits.copy()
+    while True:
+        trades = np.abs(weights - current)
+        small = (trades > 1e-9) & (trades < min_trade - 1e-9)
+        newly_small = small & (limits > 0)
+        if not newly_small.any():
+            break
+        limits[newly_small] = 0.0
+        frozen, _ = qp.solve(current, limits)
+        if frozen is None:
+            break
+        weights = frozen
+    if small.any():
+        status = 'min_trade_relaxed'
+    return weights, status
+
+
+def _zero_small(x):
+    """Solved values with noise around zero set to exactly zero."""
+    return np.where(np.abs(x) < _SOLVER_TOL, 0.0, x)
+
+
+def _trade_limits(trade_limits, tickers):
+    """Per-name trade limits as an array (scalar, dict or None for no limit)."""
+    if trade_limits is None:
+        return np.full(len(tickers), 1.0)
+    if isinstance(trade_limits, dict):
+        return np.array([trade_limits.get(ticker, 1.0) for ticker in tickers], dtype=float)
+    return np.broadcast_to(np.asarray(trade_limits, dtype=float), (len(tickers),)).copy()
+
+
+def _current_weights(current_weights, tickers):
+    """Current holdings aligned to tickers (missing names are zero) and normalized."""
+    if isinstance(current_weights, pd.DataFrame):
+        current_weights = current_weights['Weight']
+    if isinstance(current_weights, (pd.Series, dict)):
+        current_weights = pd.Series(current_weights).reindex(tickers).fillna(0.0).values
+    current = np.clip(np.asarray(current_weights, dtype=float), 0.0, None)
+    return current / current.sum() if current.sum() > 0 else np.ones(len(tickers)) / len(tickers)
+
+
+@traced('solve')
+def optimize_portfolio_rebalance(expected_returns, cov_matrix, current_weights, bounds, max_turnover=0.10,
+                                 trade_limits=None, min_trade=0.0, risk_aversion=2.5, l2_reg=0.0, cost_rate=0.0,
+                                 sector_constraints=None, sector_indices=None):
+    """
+    Rebalance current holdings toward a mean-variance target under a hard
+    turnover budget.
+
+    Turnover is one-way: half the sum of absolute weight changes, so a 10%
+    budget allows moving 10% of the portfolio from some names to others.
+
+    Args:
+        expected_returns (pd.Series): Expected returns.
+        cov_matrix (pd.DataFrame): Covariance matrix.
+        current_weights (pd.Series, dict, pd.DataFrame or np.ndarray): Current
+            holdings; names not held are zero and the rest is normalized.
+        bounds (tuple): Bounds for weights.
+        max_turnover (float): One-way turnover budget as a fraction.
+        trade_limits (float, dict or np.ndarray): Max absolute trade per name.
+        min_trade (float): Trades smaller than this are suppressed.
+        risk_aversion (float): Weight on variance in the objective.
+        l2_reg (float): L2 penalty on weights; spreads weight across names.
+        cost_rate (float): Linear cost per unit of weight traded.
+        sector_constraints (dict): Sector constraints.
+        sector_indices (dict): Sector indices.
+
+    Returns:
+        tuple: (weights_df, info)
+            weights_df (pd.DataFrame): Target weights, or None if infeasible.
+            info (dict): 'status' ('optimal', 'min_trade_relaxed' or
+                'infeasible'), 'turnover' and 'trades' (pd.Series of weight
+                changes).
+    """
+    tickers = expected_returns.index.tolist()
+    mu = np.asarray(expected_returns, dtype=float)
+    cov = np.asarray(cov_matrix, dtype=float)
+    A_sector, b_sector = _sector_matrix(len(mu), sector_constraints, sector_indices)
+    qp = _RebalanceQP(mu, cov, bounds, A_sector, b_sector, risk_aversion, l2_reg, cost_rate, max_turnover)
+    current = _current_weights(current_weights, tickers)
+    weights, status = _rebalance_one(qp, current, _trade_limits(trade_limits, tickers), min_trade)
+    if weights is None:
+        return None, {'status': 'infeasible', 'turnover': None, 'trades': None}
+    weights = _zero_small(weights)
+    trades = weights - current
+    return transform_weights_to_df(weights, tickers), {
+        'status': status,
+        'turnover': 0.5 * np.abs(trades).sum(),
+        'trades': pd.Series(trades, index=tickers),
+    }
+
+
+def rebalance_accounts(expected_returns, cov_matrix, accounts, bounds, max_turnover=0.10, trade_limits=None,
+                       min_trade=0.0, risk_aversion=2.5, l2_reg=0.0, cost_rate=0.0,
+                       sector_constraints=None, sector_indices=None):
+    """
+    Rebalance many client accounts that share a universe and model.
+
+    The QP matrices are built and factored once; each account only changes
+    the right-hand side.
+
+    Args:
+        accounts (pd.DataFrame): One row of current weights per account,
+            columns are tickers (missing tickers count as zero).
+        Other arguments as in optimize_portfolio_rebalance.
+
+    Returns:
+        tuple: (targets, status)
+            targets (pd.DataFrame): Target weights, one row per account (NaN
+                where infeasible).
+            status (pd.Series): Solve status per account.
+    """
+    tickers = expected_returns.index.tolist()
+    mu = np.asarray(expected_returns, dtype=float)
+    cov = np.asarray(cov_matrix, dtype=float)
+    A_sector, b_sector = _sector_matrix(len(mu), sector_constraints, sector_indices)
+    qp = _RebalanceQP(mu, cov, bounds, A_sector, b_sector, risk_aversion, l2_reg, cost_rate, max_turnover)
+    limits = _trade_limits(trade_limits, tickers)
+    current_all = accounts.reindex(columns=tickers).fillna(0.0)
+
+    targets = np.full((len(accounts), len(tickers)), np.nan)
+    statuses = []
+    for i, row in enumerate(current_all.values):
+        weights, status = _rebalance_one(qp, _current_weights(row, tickers), limits, min_trade)
+        if weights is not None:
+            targets[i] = _zero_small(weights)
+        statuses.append(status)
+    return (
+        pd.DataFrame(targets, index=accounts.index, columns=tickers),
+        pd.Series(statuses, index=accounts.index),
+    )
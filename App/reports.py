@@ -0,0 +1,353 @@
+# =========================
+# Portfolio Analytics Report Pipeline
+# =========================
+# Run from the App/ folder:  python reports.py [--force] [--workers N] [--dpi D]
+# Rebuilds Reports/*.csv and Reports/Charts/*.png from Data/daily_returns.csv
+# without rerunning the notebooks. Comparison metrics for every weight
+# vector are computed in one vectorized pass, charts are rendered in
+# parallel worker processes, and an artifact is only rebuilt when the hash
+# of its inputs (data, parameters and this file's code) has changed.
+
+import argparse
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from scipy.optimize import minimize
+
+from optimizer import (
+    pairwise_moments,
+    neg_sharpe_ratio,
+    transaction_penalty,
+    batch_sharpe_ratios,
+    optimize_portfolio_max_sharpe,
+    optimize_portfolio_min_volatility,
+    optimize_portfolio_risk_parity
+)
+from manifest import build_manifest, data_hash
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+RETURNS_FILE = os.path.join(ROOT_DIR, "Data", "daily_returns.csv")
+REPORTS_DIR = os.path.join(ROOT_DIR, "Reports")
+BUILD_FILE = ".build_hashes.json"
+
+with open(os.path.abspath(__file__), "rb") as _source:
+    CODE_HASH = hashlib.sha256(_source.read()).hexdigest()
+
+
+# Analytics
+def compute_moments(returns):
+    """
+    Annualized expected returns and covariance from daily returns.
+
+    Args:
+        returns (pd.DataFrame): Daily returns, one column per ticker.
+
+    Returns:
+        tuple: (expected_returns, cov_matrix) as pd.Series and pd.DataFrame.
+    """
+    moments = pairwise_moments(returns.to_numpy(dtype=float))
+    tickers = list(returns.columns)
+    return (
+        pd.Series(moments['mean'], index=tickers, name="Mean Annual Return"),
+        pd.DataFrame(moments['cov'], index=tickers, columns=tickers),
+    )
+
+
+def build_portfolios(expected_returns, cov_matrix, risk_free_rate, bounded=(0.05, 0.30)):
+    """
+    Weight vectors compared in the report.
+
+    Args:
+        expected_returns (pd.Series): Expected returns.
+        cov_matrix (pd.DataFrame): Covariance matrix.
+        risk_free_rate (float): Risk-free rate.
+        bounded (tuple): Per-stock (min, max) weight for the bounded variants.
+
+    Returns:
+        pd.DataFrame: One column of weights per portfolio, indexed by ticker.
+    """
+    n = len(expected_returns)
+    free = tuple((0.0, 1.0) for _ in range(n))
+    limits = tuple(bounded for _ in range(n))
+    return pd.DataFrame({
+        "Max Sharpe": optimize_portfolio_max_sharpe(expected_returns, cov_matrix, free, risk_free_rate)['Weight'],
+        "Min Volatility": optimize_portfolio_min_volatility(expected_returns, cov_matrix, free)['Weight'],
+        "Equal Weights": np.ones(n) / n,
+        "Max Sharpe (bounded)": optimize_portfolio_max_sharpe(expected_returns, cov_matrix, limits, risk_free_rate)['Weight'],
+        "Min Volatility (bounded)": optimize_portfolio_min_volatility(expected_returns, cov_matrix, limits)['Weight'],
+        "Risk Parity": optimize_portfolio_risk_parity(expected_returns, cov_matrix, free)['Weight'],
+    }, index=expected_returns.index)
+
+
+def portfolio_metrics(weights, expected_returns, cov_matrix, returns, risk_free_rate):
+    """
+    Comparison metrics for every portfolio in one vectorized pass.
+
+    Args:
+        weights (pd.DataFrame): One column of weights per portfolio.
+        expected_returns (pd.Series): Expected returns.
+        cov_matrix (pd.DataFrame): Covariance matrix.
+        returns (pd.DataFrame): Daily returns used for the realized metrics.
+        risk_free_rate (float): Risk-free rate.
+
+    Returns:
+        tuple: (metrics, cumulative)
+            metrics (pd.DataFrame): Expected return, volatility and Sharpe
+                ratio plus realized annual return, volatility and max
+                drawdown, one row per portfolio.
+            cumulative (pd.DataFrame): Growth of 1 per portfolio over time.
+    """
+    W = weights.to_numpy().T
+    rets, vols, sharpes = batch_sharpe_ratios(W, expected_returns.values, cov_matrix.values, risk_free_rate)
+    daily = np.nan_to_num(returns.to_numpy(dtype=float)) @ W.T
+    growth = np.cumprod(1.0 + daily, axis=0)
+    drawdown = 1.0 - growth / np.maximum.accumulate(np.maximum(growth, 1.0), axis=0)
+    metrics = pd.DataFrame({
+        "Return": rets,
+        "Volatility": vols,
+        "Sharpe Ratio": sharpes,
+        "Realized Return": growth[-1] ** (252 / len(daily)) - 1.0,
+        "Realized Volatility": daily.std(axis=0, ddof=1) * np.sqrt(252),
+        "Max Drawdown": drawdown.max(axis=0),
+    }, index=weights.columns)
+    metrics.index.name = "Portfolio Type"
+    cumulative = pd.DataFrame(growth, index=returns.index, columns=weights.columns)
+    return metrics, cumulative
+
+
+def alpha_sweep(expected_returns, cov_matrix, current_weights, risk_free_rate, alphas, cost_rate=0.005, bounds=(0.05, 0.30)):
+    """
+    Max-Sharpe weights under an increasing transaction-cost penalty
+    (-Sharpe + alpha * sum(cost_rate * |w - current|)), each solve warm
+    started from the previous alpha.
+
+    Args:
+        expected_returns (pd.Series): Expected returns.
+        cov_matrix (pd.DataFrame): Covariance matrix.
+        current_weights (np.ndarray): Current holdings.
+        risk_free_rate (float): Risk-free rate.
+        alphas (list): Penalty scales.
+        cost_rate (float): Cost per unit of weight traded.
+        bounds (tuple): Per-stock (min, max) weight.
+
+    Returns:
+        tuple: (tradeoff, weights)
+            tradeoff (pd.DataFrame): 'Alpha', 'Sharpe Ratio' and 'Turnover'.
+            weights (pd.DataFrame): Weights per alpha.
+    """
+    mu, cov = expected_returns.values, cov_matrix.values
+    n = len(mu)
+    x0 = np.ones(n) / n
+    rows, all_weights = [], []
+    for alpha in alphas:
+        result = minimize(
+            lambda w: neg_sharpe_ratio(w, mu, cov, risk_free_rate) + transaction_penalty(w, current_weights, cost_rate, alpha),
+            x0,
+            method='SLSQP',
+            bounds=tuple(bounds for _ in range(n)),
+            constraints=[{'type': 'eq', 'fun': lambda w: np.sum(w) - 1}]
+        )
+        x0 = result.x
+        rows.append({
+            "Alpha": alpha,
+            "Sharpe Ratio": -neg_sharpe_ratio(result.x, mu, cov, risk_free_rate),
+            "Turnover": transaction_penalty(result.x, current_weights, cost_rate, 1.0),
+        })
+        all_weights.append(result.x)
+    weights = pd.DataFrame(all_weights, columns=expected_returns.index, index=[f"α={a}" for a in alphas])
+    weights.index.name = "Alpha"
+    return pd.DataFrame(rows), weights
+
+
+# Chart rendering (runs in worker processes)
+def _figure():
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def chart_heatmap(cov_matrix, path, dpi):
+    plt = _figure()
+    import seaborn as sb
+    plt.figure(figsize=(10, 7))
+    sb.heatmap(cov_matrix, annot=True, cmap="YlGnBu")
+    plt.title("Annual Covariance Matrix Heatmap")
+    plt.savefig(path, dpi=dpi)
+    plt.close("all")
+
+
+def chart_metric_bar(metrics, column, path, dpi):
+    plt = _figure()
+    plt.figure(figsize=(8, 6))
+    bars = plt.bar(metrics.index, metrics[column], color=plt.cm.tab10.colors[:len(metrics)])
+    plt.bar_label(bars, fmt="%.3f")
+    plt.title(f"Portfolio {column} Comparison")
+    plt.ylabel(column)
+    plt.xlabel("Portfolio Type")
+    plt.xticks(rotation=20, ha="right")
+    plt.tight_layout()
+    plt.savefig(path, dpi=dpi)
+    plt.close("all")
+
+
+def chart_stacked_weights(weights, title, xlabel, path, dpi):
+    plt = _figure()
+    ax = weights.plot(kind="bar", stacked=True, figsize=(10, 6), colormap="tab20")
+    ax.set_ylabel("Weight")
+    ax.set_xlabel(xlabel)
+    ax.set_title(title)
+    ax.legend(title="Stock", bbox_to_anchor=(1.05, 1), loc="upper left")
+    plt.tight_layout()
+    plt.savefig(path, dpi=dpi)
+    plt.close("all")
+
+
+def chart_pie(weights, title, path, dpi):
+    plt = _figure()
+    plt.figure(figsize=(6, 6))
+    shown = weights[weights > 1e-4]
+    plt.pie(shown, labels=shown.index, autopct='%1.1f%%', startangle=140)
+    plt.title(title)
+    plt.axis('equal')
+    plt.savefig(path, dpi=dpi)
+    plt.close("all")
+
+
+def chart_tradeoff(tradeoff, path, dpi):
+    plt = _figure()
+    plt.figure(figsize=(10, 6))
+    plt.plot(tradeoff["Turnover"], tradeoff["Sharpe Ratio"], marker='o', linestyle='--', color='purple')
+    plt.xlabel("Turnover (Transaction Penalty)")
+    plt.ylabel("Sharpe Ratio")
+    plt.title("Trade-off Between Sharpe Ratio and Transaction Cost")
+    plt.grid(True)
+    plt.tight_layout()
+    plt.savefig(path, dpi=dpi)
+    plt.close("all")
+
+
+def chart_cumulative(cumulative, path, dpi):
+    plt = _figure()
+    ax = cumulative.plot(figsize=(12, 6))
+    ax.set_title("Cumulative Returns of Each Portfolio")
+    ax.set_xlabel("Date")
+    ax.set_ylabel("Portfolio Value (Growth of ₹1)")
+    ax.grid(True)
+    plt.tight_layout()
+    plt.savefig(path, dpi=dpi)
+    plt.close("all")
+
+
+def _render(task):
+    function, args, path, dpi = task
+    function(*args, path, dpi)
+    return path
+
+
+# Incremental build
+def _inputs_hash(name, args, dpi):
+    """Hash of an artifact's inputs: its data, parameters, dpi and this file's code."""
+    data = [data_hash(arg) if isinstance(arg, (np.ndarray, pd.Series, pd.DataFrame)) else arg for arg in args]
+    return build_manifest(name, {'args': data, 'dpi': dpi, 'code': CODE_HASH})['hash']
+
+
+def build_reports(returns_file=RETURNS_FILE, reports_dir=REPORTS_DIR, risk_free_rate=0.06, workers=None, dpi=300, force=False):
+    """
+    Rebuild every report table and chart whose inputs changed.
+
+    Args:
+        returns_file (str): Daily returns CSV (dates x tickers).
+        reports_dir (str): Output folder; charts go to its Charts/ subfolder.
+        risk_free_rate (float): Risk-free rate.
+        workers (int): Chart rendering processes (default os.cpu_count()).
+        dpi (int): Chart resolution.
+        force (bool): Rebuild everything regardless of hashes.
+
+    Returns:
+        dict: 'built' and 'skipped' artifact paths and 'seconds' elapsed.
+    """
+    start = time.perf_counter()
+    charts_dir = os.path.join(reports_dir, "Charts")
+    os.makedirs(charts_dir, exist_ok=True)
+    build_file = os.path.join(reports_dir, BUILD_FILE)
+    hashes = {}
+    if os.path.exists(build_file) and not force:
+        with open(build_file) as f:
+            hashes = json.load(f)
+
+    # Analytics
+    returns = pd.read_csv(returns_file, index_col=0, parse_dates=True)
+    expected_returns, cov_matrix = compute_moments(returns)
+    weights = build_portfolios(expected_returns, cov_matrix, risk_free_rate)
+    metrics, cumulative = portfolio_metrics(weights, expected_returns, cov_matrix, returns, risk_free_rate)
+    alphas = [0, 1, 5, 10, 20, 50, 60, 100]
+    current = np.ones(len(expected_returns)) / len(expected_returns)
+    tradeoff, alpha_weights = alpha_sweep(expected_returns, cov_matrix, current, risk_free_rate, alphas)
+    optimal = weights[["Max Sharpe", "Min Volatility"]].add_suffix(" Weight")
+    optimal.index.name = "Stock"
+
+    tables = {
+        "expected_returns.csv": (expected_returns.to_frame(), {}),
+        "cov_matrix.csv": (cov_matrix, {}),
+        "optimal_portfolios.csv": (optimal, {}),
+        "portfolio_comparison.csv": (metrics, {}),
+        "transaction_cost_tradeoff.csv": (tradeoff, {'index': False}),
+        "weights_for_different_alpha.csv": (alpha_weights, {}),
+    }
+    charts = {
+        "Annual_Cov_Matrix_Heatmap.png": (chart_heatmap, (cov_matrix,)),
+        "Portfolio_Return_Comparison_Barplot.png": (chart_metric_bar, (metrics, "Return")),
+        "Portfolio_Volatility_Comparison_Barplot.png": (chart_metric_bar, (metrics, "Volatility")),
+        "Portfolio_SharpeRatio_Comparison_Barplot.png": (chart_metric_bar, (metrics, "Sharpe Ratio")),
+        "Stock_weights_comparison_barplot.png": (chart_stacked_weights, (weights.T, "Stock Weights in Each Portfolio (Stacked Bar)", "Portfolio Type")),
+        "Max_SharpRatio_weight_distribution.png": (chart_pie, (weights["Max Sharpe"], "Portfolio Weights: Max Sharpe Ratio")),
+        "Min_Volatility_weight_distribution.png": (chart_pie, (weights["Min Volatility"], "Portfolio Weights: Min Volatility")),
+        "Tradeof_fBetween_Sharpe_Ratio_and_Transaction_Cost.png": (chart_tradeoff, (tradeoff,)),
+        "Portfolio_Weights_Across_Different_Alpha_Values.png": (chart_stacked_weights, (alpha_weights, "Portfolio Weights Across Different Alpha Values", "Alpha")),
+        "Cumulative_Returns.png": (chart_cumulative, (cumulative,)),
+    }
+
+    built, skipped, new_hashes = [], [], {}
+    for name, (frame, options) in tables.items():
+        path = os.path.join(reports_dir, name)
+        new_hashes[name] = _inputs_hash(name, (frame,), None)
+        if hashes.get(name) == new_hashes[name] and os.path.exists(path):
+            skipped.append(path)
+        else:
+            frame.to_csv(path, **options)
+            built.append(path)
+
+    tasks = []
+    for name, (function, args) in charts.items():
+        path = os.path.join(charts_dir, name)
+        new_hashes[name] = _inputs_hash(name, args, dpi)
+        if hashes.get(name) == new_hashes[name] and os.path.exists(path):
+            skipped.append(path)
+        else:
+            tasks.append((function, args, path, dpi))
+    if tasks:
+        workers = min(workers or os.cpu_count(), len(tasks))
+        if workers <= 1:
+            built += [_render(task) for task in tasks]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                built += list(pool.map(_render, tasks))
+
+    with open(build_file, "w") as f:
+        json.dump(new_hashes, f, indent=2, sort_keys=True)
+    return {'built': built, 'skipped': skipped, 'seconds': time.perf_counter() - start}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild Reports/ tables and charts.")
+    parser.add_argument("--force", action="store_true", help="Rebuild every artifact.")
+    parser.add_argument("--workers", type=int, default=None, help="Chart rendering processes.")
+    parser.add_argument("--dpi", type=int, default=300, help="Chart resolution.")
+    args = parser.parse_args()
+    result = build_reports(workers=args.workers, dpi=args.dpi, force=args.force)
+    print(f"Built {len(result['built'])}, skipped {len(result['skipped'])} unchanged, in {result['seconds']:.2f}s")
@@ -0,0 +1,236 @@
+# =========================
+# Resampled Efficient Frontier
+# =========================
+# Block-bootstraps the daily return panel, re-estimates moments on every
+# sample, solves a constrained frontier per sample and averages the weights
+# rank by rank (point k of every sample frontier is averaged with point k of
+# the others). Samples are solved on a process pool that reads the return
+# panel from shared memory, and partial averages are yielded as chunks
+# finish so the UI can show progress.
+
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+import numpy as np
+import scipy.sparse as sparse
+from scipy.optimize import linprog
+import clarabel
+
+from optimizer import pairwise_moments, _sector_matrix, _min_variance_weights
+from manifest import spawn_streams
+from tracing import traced
+
+# Return panel attached by each pool worker
+_worker_state = {}
+
+
+def block_bootstrap_indices(num_days, block_length, rng):
+    """
+    Row indices of one circular block-bootstrap sample.
+
+    Blocks of consecutive days are drawn with wrap-around, which keeps
+    short-range autocorrelation and volatility clustering inside each block.
+
+    Args:
+        num_days (int): Number of rows in the return panel.
+        block_length (int): Days per block.
+        rng (np.random.Generator): Random generator.
+
+    Returns:
+        np.ndarray: num_days row indices.
+    """
+    block_length = max(1, min(block_length, num_days))
+    num_blocks = -(-num_days // block_length)
+    starts = rng.integers(0, num_days, size=num_blocks)
+    idx = (starts[:, None] + np.arange(block_length)) % num_days
+    return idx.ravel()[:num_days]
+
+
+def _min_variance_path(mu, cov, bounds, A_ub, b_ub, targets):
+    """Min-variance weights for each target return (None for no return floor)."""
+    n = len(mu)
+    lower = np.array([b[0] for b in bounds], dtype=float)
+    upper = np.array([b[1] for b in bounds], dtype=float)
+    P = sparse.csc_matrix(np.triu(cov))
+    A = sparse.csc_matrix(np.vstack([np.ones(n), -np.eye(n), np.eye(n), A_ub, -mu]))
+    b = np.concatenate([[1.0], -lower, upper, b_ub, [0.0]])
+    cones = [clarabel.ZeroConeT(1), clarabel.NonnegativeConeT(len(b) - 1)]
+    settings = clarabel.DefaultSettings()
+    settings.verbose = False
+
+    # One factorization per path; only the return floor changes between targets
+    solver = None
+    weights, x0 = [], None
+    for target in targets:
+        b[-1] = -(mu.min() - 1.0 if target is None else target)
+        if solver is None or not solver.is_data_update_allowed():
+            solver = clarabel.DefaultSolver(P, np.zeros(n), A, b, cones, settings)
+        else:
+            solver.update(b=b)
+        result = solver.solve()
+        if str(result.status) in ('Solved', 'AlmostSolved'):
+            x0 = np.clip(np.array(result.x), lower, upper)
+        else:
+            x0 = _min_variance_weights(cov, bounds, A_ub, b_ub, mu, target, x0=x0)
+        weights.append(x0)
+    return np.array(weights)
+
+
+def frontier_weights(expected_returns, cov_matrix, bounds, A_ub, b_ub, num_points=20):
+    """
+    Weights of num_points portfolios evenly spaced in return along the
+    constrained efficient frontier, from minimum volatility to maximum return.
+
+    Args:
+        expected_returns (np.ndarray): Expected returns.
+        cov_matrix (np.ndarray): Covariance matrix.
+        bounds (tuple): Bounds for weights.
+        A_ub (np.ndarray): Sector rows of A_ub @ w <= b_ub.
+        b_ub (np.ndarray): Sector limits.
+        num_points (int): Number of frontier points.
+
+    Returns:
+        np.ndarray or None: (num_points, N) weights, or None if infeasible.
+    """
+    mu = np.asarray(expected_returns, dtype=float)
+    cov = np.asarray(cov_matrix, dtype=float)
+    n = len(mu)
+    lp = linprog(
+        -mu,
+        A_ub=A_ub if len(b_ub) else None,
+        b_ub=b_ub if len(b_ub) else None,
+        A_eq=np.ones((1, n)),
+        b_eq=[1.0],
+        bounds=bounds,
+        method='highs'
+    )
+    if lp.status != 0:
+        return None
+    max_return = -lp.fun - 1e-10
+
+    min_vol = _min_variance_path(mu, cov, bounds, A_ub, b_ub, [None])[0]
+    targets = np.linspace(mu @ min_vol, max_return, num_points)[1:]
+    return np.vstack([min_vol, _min_variance_path(mu, cov, bounds, A_ub, b_ub, targets)])
+
+
+def _bootstrap_frontiers(returns, seeds, block_length, bounds, A_ub, b_ub, num_points):
+    """
+    Solve the frontier for each bootstrap seed.
+
+    Returns:
+        tuple: (sum of frontier weights over solved samples, solved count).
+    """
+    total = np.zeros((num_points, returns.shape[1]))
+    solved = 0
+    for seed in seeds:
+        rng = np.random.default_rng(seed)
+        sample = returns[block_bootstrap_indices(len(returns), block_length, rng)]
+        moments = pairwise_moments(sample)
+        if np.isnan(moments['mean']).any() or np.isnan(moments['cov']).any():
+            continue
+        weights = frontier_weights(moments['mean'], moments['cov'], bounds, A_ub, b_ub, num_points)
+        if weights is not None:
+            total += weights
+            solved += 1
+    return total, solved
+
+
+def _attach_returns(name, shape, dtype):
+    """Pool initializer: map the shared return panel into this worker."""
+    try:
+        shm = shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=name)
+    _worker_state['shm'] = shm
+    _worker_state['returns'] = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+
+def _worker_frontiers(seeds, block_length, bounds, A_ub, b_ub, num_points):
+    return _bootstrap_frontiers(_worker_state['returns'], seeds, block_length, bounds, A_ub, b_ub, num_points)
+
+
+@traced('frontier')
+def resampled_frontier_iter(returns, bounds, num_samples=500, num_points=20, block_length=20,
+                            sector_constraints=None, sector_indices=None, seed=0, workers=None, chunk_size=10):
+    """
+    Resampled efficient frontier, yielding the running rank-average as
+    chunks of bootstrap samples finish.
+
+    Each sample gets its own child of one SeedSequence and finished chunks
+    are summed in chunk order, so the final weights are bit-identical for
+    any number of workers and any completion order.
+
+    Args:
+        returns (np.ndarray or pd.DataFrame): T x N daily returns, NaN where missing.
+        bounds (tuple): Bounds for weights.
+        num_samples (int): Number of bootstrap samples (B).
+        num_points (int): Frontier points per sample.
+        block_length (int): Bootstrap block length in trading days.
+        sector_constraints (dict): Sector constraints.
+        sector_indices (dict): Sector indices.
+        seed (int): Seed for the bootstrap.
+        workers (int): Pool size; default os.cpu_count(), 0 runs in-process.
+        chunk_size (int): Samples per task.
+
+    Yields:
+        dict: 'completed' (samples processed), 'total' (num_samples),
+            'solved' (samples with a feasible frontier) and 'weights'
+            ((num_points, N) rank-averaged weights, None until one is solved).
+    """
+    data = np.ascontiguousarray(returns, dtype=float)
+    A_ub, b_ub = _sector_matrix(data.shape[1], sector_constraints, sector_indices)
+    seeds = spawn_streams(seed, num_samples)
+    chunks = [seeds[i:i + chunk_size] for i in range(0, num_samples, chunk_size)]
+    args = (block_length, bounds, A_ub, b_ub, num_points)
+    workers = os.cpu_count() if workers is None else workers
+    finished = {}
+
+    def progress(index, result):
+        finished[index] = result
+        total = np.zeros((num_points, data.shape[1]))
+        for i in sorted(finished):
+            total += finished[i][0]
+        solved = sum(result[1] for result in finished.values())
+        return {
+            'completed': sum(len(chunks[i]) for i in finished),
+            'total': num_samples,
+            'solved': solved,
+            'weights': total / solved if solved else None,
+        }
+
+    if workers == 0:
+        for index, chunk in enumerate(chunks):
+            yield progress(index, _bootstrap_frontiers(data, chunk, *args))
+        return
+
+    shm = shared_memory.SharedMemory(create=True, size=max(data.nbytes, 1))
+    try:
+        np.ndarray(data.shape, dtype=data.dtype, buffer=shm.buf)[:] = data
+        with ProcessPoolExecutor(max_workers=workers, initializer=_attach_returns,
+                                 initargs=(shm.name, data.shape, data.dtype)) as pool:
+            futures = {pool.submit(_worker_frontiers, chunk, *args): i for i, chunk in enumerate(chunks)}
+            try:
+                for future in as_completed(futures):
+                    yield progress(futures[future], future.result())
+            finally:
+                for future in futures:
+                    future.cancel()
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def resampled_frontier(returns, bounds, num_samples=500, num_points=20, block_length=20,
+                       sector_constraints=None, sector_indices=None, seed=0, workers=None):
+    """
+    Resampled efficient frontier weights (see resampled_frontier_iter).
+
+    Returns:
+        np.ndarray or None: (num_points, N) rank-averaged weights, or None if
+            no bootstrap sample had a feasible frontier.
+    """
+    result = {'weights': None}
+    for result in resampled_frontier_iter(returns, bounds, num_samples, num_points, block_length,
+                                          sector_constraints, sector_indices, seed, workers):
+        pass
+    return result['weights']
@@ -0,0 +1,243 @@
+# =========================
+# Streaming Monte Carlo Simulation
+# =========================
+# Random-portfolio simulation reduced on the fly. Each block of simulated
+# portfolios is folded into a FrontierReducer that keeps the running
+# max-Sharpe and min-volatility portfolios, the upper frontier envelope
+# (best return per volatility bin) and fixed-bin histograms, so memory is
+# O(bins x assets) however many portfolios are simulated.
+
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+import numpy as np
+import pandas as pd
+
+from optimizer import PRECISIONS, batch_sharpe_ratios
+from manifest import spawn_streams
+
+
+class FrontierReducer:
+    """
+    Online summary of simulated portfolios.
+
+    Bin ranges are fixed up front so that blocks (and reducers from other
+    workers built with the same inputs) combine without rebinning. By default
+    they come from a fixed-seed pilot of uniform random portfolios, widened
+    by half their width on each side; pass `ranges` when simulating from a
+    different weight distribution. Values outside a range are counted in the
+    nearest end bin.
+
+    Args:
+        expected_returns (pd.Series): Expected returns.
+        cov_matrix (pd.DataFrame): Covariance matrix.
+        risk_free_rate (float): Risk-free rate for Sharpe ratios.
+        num_bins (int): Volatility bins of the frontier envelope.
+        hist_bins (int): Bins of each histogram.
+        ranges (dict): Optional (low, high) per 'return', 'volatility' and 'sharpe'.
+        precision (str): 'float64' or 'float32' for the batched evaluation
+            and the stored envelope weights; counts and sums stay exact/float64.
+    """
+
+    def __init__(self, expected_returns, cov_matrix, risk_free_rate=0.0, num_bins=100, hist_bins=50, ranges=None,
+                 precision='float64'):
+        self.tickers = list(expected_returns.index)
+        self.mu = np.asarray(expected_returns, dtype=float)
+        self.cov = np.asarray(cov_matrix, dtype=float)
+        self.risk_free_rate = risk_free_rate
+        self.precision = precision
+        n = len(self.mu)
+
+        ranges = ranges or self._pilot_ranges()
+        self.edges = {name: np.linspace(*ranges[name], hist_bins + 1) for name in ('return', 'volatility', 'sharpe')}
+        self.counts = {name: np.zeros(hist_bins, dtype=np.int64) for name in self.edges}
+        self.envelope_edges = np.linspace(self.edges['volatility'][0], self.edges['volatility'][-1], num_bins + 1)
+
+        self.count = 0
+        self.sums = {name: 0.0 for name in self.edges}
+        self.envelope_return = np.full(num_bins, -np.inf)
+        self.envelope_volatility = np.full(num_bins, np.nan)
+        self.envelope_weights = np.full((num_bins, n), np.nan, dtype=PRECISIONS[precision])
+        self.max_sharpe = {'sharpe': -np.inf, 'return': np.nan, 'volatility': np.nan, 'weights': None}
+        self.min_volatility = {'volatility': np.inf, 'return': np.nan, 'sharpe': np.nan, 'weights': None}
+
+    def _pilot_ranges(self, size=10_000):
+        """Metric ranges of a fixed-seed pilot sample, padded on both sides."""
+        pilot = batch_sharpe_ratios(random_weights(len(self.mu), size, np.random.default_rng(0)),
+                                    self.mu, self.cov, self.risk_free_rate)
+        ranges = {}
+        for name, values in zip(('return', 'volatility', 'sharpe'), pilot):
+            pad = 0.5 * (values.max() - values.min())
+            ranges[name] = (values.min() - pad, values.max() + pad)
+        ranges['volatility'] = (max(ranges['volatility'][0], 0.0), ranges['volatility'][1])
+        return ranges
+
+    @staticmethod
+    def _bin(values, edges):
+        return np.clip(np.searchsorted(edges, values, side='right') - 1, 0, len(edges) - 2)
+
+    def update(self, weights):
+        """
+        Fold one block of simulated portfolios into the summary.
+
+        Args:
+            weights (np.ndarray): (M, N) portfolio weights, one row per portfolio.
+        """
+        weights = np.asarray(weights, dtype=PRECISIONS[self.precision])
+        rets, vols, sharpes = batch_sharpe_ratios(weights, self.mu, self.cov, self.risk_free_rate,
+                                                  precision=self.precision)
+        self.count += len(rets)
+        for name, values in (('return', rets), ('volatility', vols), ('sharpe', sharpes)):
+            self.sums[name] += values.sum()
+            self.counts[name] += np.bincount(self._bin(values, self.edges[name]), minlength=len(self.counts[name]))
+
+        best = np.argmax(sharpes)
+        if sharpes[best] > self.max_sharpe['sharpe']:
+            self.max_sharpe = {'sharpe': sharpes[best], 'return': rets[best], 'volatility': vols[best],
+                               'weights': weights[best].copy()}
+        best = np.argmin(vols)
+        if vols[best] < self.min_volatility['volatility']:
+            self.min_volatility = {'volatility': vols[best], 'return': rets[best], 'sharpe': sharpes[best],
+                                   'weights': weights[best].copy()}
+
+        # Best return per volatility bin: per-bin max in O(M), then one
+        # representative row for each bin that improved
+        bins = self._bin(vols, self.envelope_edges)
+        block_best = np.full(len(self.envelope_return), -np.inf)
+        np.maximum.at(block_best, bins, rets)
+        improved = block_best > self.envelope_return
+        if improved.any():
+            rows = np.flatnonzero(improved[bins] & (rets == block_best[bins]))
+            rows = rows[np.unique(bins[rows], return_index=True)[1]]
+            self.envelope_return[bins[rows]] = rets[rows]
+            self.envelope_volatility[bins[rows]] = vols[rows]
+            self.envelope_weights[bins[rows]] = weights[rows]
+
+    def merge(self, other):
+        """
+        Combine with a reducer built from the same inputs (e.g. another worker's).
+
+        Args:
+            other (FrontierReducer): Reducer to fold in.
+
+        Returns:
+            FrontierReducer: self.
+        """
+        self.count += other.count
+        for name in self.counts:
+            self.counts[name] += other.counts[name]
+            self.sums[name] += other.sums[name]
+        if other.max_sharpe['sharpe'] > self.max_sharpe['sharpe']:
+            self.max_sharpe = dict(other.max_sharpe)
+        if other.min_volatility['volatility'] < self.min_volatility['volatility']:
+            self.min_volatility = dict(other.min_volatility)
+        improved = other.envelope_return > self.envelope_return
+        self.envelope_return[improved] = other.envelope_return[improved]
+        self.envelope_volatility[improved] = other.envelope_volatility[improved]
+        self.envelope_weights[improved] = other.envelope_weights[improved]
+        return self
+
+    def envelope(self):
+        """
+        Upper frontier envelope: the best simulated return in each volatility bin.
+
+        Returns:
+            pd.DataFrame: 'Volatility', 'Return' and 'Sharpe Ratio' plus one
+                weight column per ticker, one row per non-empty bin.
+        """
+        filled = np.isfinite(self.envelope_return)
+        frame = pd.DataFrame({
+            'Volatility': self.envelope_volatility[filled],
+            'Return': self.envelope_return[filled],
+        })
+        frame['Sharpe Ratio'] = (frame['Return'] - self.risk_free_rate) / frame['Volatility']
+        weights = pd.DataFrame(self.envelope_weights[filled], columns=[f"{t} Weight" for t in self.tickers])
+        return pd.concat([frame, weights], axis=1)
+
+    def histograms(self):
+        """
+        Returns:
+            dict: name -> (counts, bin_edges) for 'return', 'volatility' and 'sharpe'.
+        """
+        return {name: (self.counts[name].copy(), self.edges[name]) for name in self.counts}
+
+    def summary(self):
+        """
+        Returns:
+            dict: 'count', 'mean' (per metric), 'max_sharpe' and 'min_volatility'.
+        """
+        return {
+            'count': self.count,
+            'mean': {name: total / self.count if self.count else np.nan for name, total in self.sums.items()},
+            'max_sharpe': self.max_sharpe,
+            'min_volatility': self.min_volatility,
+        }
+
+
+def random_weights(num_assets, size, rng, precision='float64'):
+    """
+    Uniform random weights normalized to sum to one (as in the simulation notebook).
+
+    Args:
+        num_assets (int): Number of assets.
+        size (int): Number of portfolios.
+        rng (np.random.Generator): Random generator.
+        precision (str): 'float64' or 'float32'; row sums accumulate in float64.
+
+    Returns:
+        np.ndarray: (size, num_assets) weights.
+    """
+    dtype = PRECISIONS[precision]
+    weights = rng.random((size, num_assets), dtype=dtype)
+    weights /= weights.sum(axis=1, keepdims=True, dtype=np.float64).astype(dtype)
+    return weights
+
+
+def _simulate_block(stream, size, expected_returns, cov_matrix, risk_free_rate, num_bins, hist_bins, ranges, precision):
+    """Simulate one block from its own stream into a fresh reducer."""
+    reducer = FrontierReducer(expected_returns, cov_matrix, risk_free_rate, num_bins, hist_bins, ranges, precision)
+    reducer.update(random_weights(len(reducer.mu), size, np.random.default_rng(stream), precision))
+    return reducer
+
+
+def simulate_frontier(expected_returns, cov_matrix, risk_free_rate=0.0, simulations=1_000_000,
+                      block_size=100_000, seed=0, num_bins=100, hist_bins=50, workers=0, precision='float64'):
+    """
+    Simulate random portfolios block by block into a FrontierReducer.
+
+    Only one block of weights is alive at a time per process, so memory does
+    not grow with the number of simulations. Block i always draws from child
+    i of SeedSequence(seed) and blocks are folded in order, so the result is
+    bit-identical for any number of workers.
+
+    Args:
+        expected_returns (pd.Series): Expected returns.
+        cov_matrix (pd.DataFrame): Covariance matrix.
+        risk_free_rate (float): Risk-free rate for Sharpe ratios.
+        simulations (int): Number of portfolios to simulate.
+        block_size (int): Portfolios per block.
+        seed (int): Root seed of the run.
+        num_bins (int): Volatility bins of the frontier envelope.
+        hist_bins (int): Bins of each histogram.
+        workers (int): Process pool size; 0 runs in-process.
+        precision (str): 'float64' or 'float32' for the simulated weights and
+            their evaluation. float32 draws a different (equally valid) sample.
+
+    Returns:
+        FrontierReducer: The reducer holding the summary.
+    """
+    reducer = FrontierReducer(expected_returns, cov_matrix, risk_free_rate, num_bins, hist_bins, precision=precision)
+    sizes = [min(block_size, simulations - start) for start in range(0, simulations, block_size)]
+    streams = spawn_streams(seed, len(sizes))
+    if workers == 0:
+        for stream, size in zip(streams, sizes):
+            reducer.update(random_weights(len(reducer.mu), size, np.random.default_rng(stream), precision))
+        return reducer
+
+    ranges = {name: (edges[0], edges[-1]) for name, edges in reducer.edges.items()}
+    block = partial(_simulate_block, expected_returns=expected_returns, cov_matrix=cov_matrix,
+                    risk_free_rate=risk_free_rate, num_bins=num_bins, hist_bins=hist_bins, ranges=ranges,
+                    precision=precision)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for block_reducer in pool.map(block, streams, sizes, chunksize=max(1, len(sizes) // (4 * workers))):
+            reducer.merge(block_reducer)
+    return reducer
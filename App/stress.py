@@ -0,0 +1,122 @@
+# =========================
+# Historical Stress and Scenario Engine
+# =========================
+# Replays portfolios through historical market windows. All portfolios and
+# all windows are evaluated together: one matrix product gives every
+# portfolio's daily returns, and the windows are gathered into a single
+# (windows x days x portfolios) block from which period P&L, max drawdown
+# and worst day are reduced.
+
+import numpy as np
+import pandas as pd
+
+# Named Indian market stress windows: name -> (start, end), inclusive
+STRESS_SCENARIOS = {
+    "COVID-19 Crash (Feb-Mar 2020)": ("2020-02-19", "2020-03-23"),
+    "COVID-19 Recovery (Mar-Dec 2020)": ("2020-03-24", "2020-12-31"),
+    "Russia-Ukraine Shock (Feb-Mar 2022)": ("2022-02-10", "2022-03-08"),
+    "RBI Rate Hikes (May 2022-Feb 2023)": ("2022-05-04", "2023-02-08"),
+    "Adani-Hindenburg Sell-off (Jan-Feb 2023)": ("2023-01-24", "2023-02-28"),
+    "Election Result Day (Jun 2024)": ("2024-06-03", "2024-06-05"),
+    "FII Sell-off (Oct 2024-Feb 2025)": ("2024-09-27", "2025-02-28"),
+}
+
+
+def rolling_windows(dates, length=60, step=20):
+    """
+    Generate overlapping windows over a date index.
+
+    Args:
+        dates (pd.DatetimeIndex): Trading dates.
+        length (int): Window length in trading days.
+        step (int): Days between window starts.
+
+    Returns:
+        dict: name -> (start, end) covering the whole index.
+    """
+    windows = {}
+    for start in range(0, len(dates) - length + 1, step):
+        first, last = dates[start], dates[start + length - 1]
+        windows[f"{first:%Y-%m-%d} to {last:%Y-%m-%d}"] = (first, last)
+    return windows
+
+
+def window_positions(dates, windows):
+    """
+    Map named (start, end) windows to row positions in a date index.
+
+    Windows not fully covered by the index, or with fewer than two trading
+    days, are dropped so a truncated window is never reported as the full one.
+
+    Args:
+        dates (pd.DatetimeIndex): Dates of the return rows.
+        windows (dict): name -> (start, end).
+
+    Returns:
+        tuple: (names, starts, ends) with starts/ends as inclusive row positions.
+    """
+    names, starts, ends = [], [], []
+    for name, (start, end) in windows.items():
+        if len(dates) == 0 or pd.Timestamp(start) < dates[0] or pd.Timestamp(end) > dates[-1]:
+            continue
+        s = dates.searchsorted(pd.Timestamp(start), side='left')
+        e = dates.searchsorted(pd.Timestamp(end), side='right') - 1
+        if e - s >= 1:
+            names.append(name)
+            starts.append(s)
+            ends.append(e)
+    return names, np.array(starts, dtype=int), np.array(ends, dtype=int)
+
+
+def stress_test(weights, returns, dates, windows=None, portfolio_names=None):
+    """
+    Evaluate one or many portfolios over many historical windows at once.
+
+    Missing returns (a stock not yet listed in a window) count as flat days.
+
+    Args:
+        weights (np.ndarray or pd.DataFrame): One weight vector, or an (M, N)
+            matrix with one portfolio per row.
+        returns (np.ndarray or pd.DataFrame): T x N daily returns.
+        dates (pd.DatetimeIndex): Dates of the return rows.
+        windows (dict): name -> (start, end); default STRESS_SCENARIOS.
+        portfolio_names (list): Column labels for the portfolios.
+
+    Returns:
+        dict: 'period_return', 'max_drawdown' and 'worst_day', each a
+            DataFrame with one row per window inside the data and one column
+            per portfolio.
+    """
+    windows = STRESS_SCENARIOS if windows is None else windows
+    W = np.atleast_2d(np.asarray(weights, dtype=float))
+    R = np.nan_to_num(np.asarray(returns, dtype=float))
+    names, starts, ends = window_positions(pd.DatetimeIndex(dates), windows)
+    columns = portfolio_names or [f"Portfolio {i + 1}" for i in range(W.shape[0])]
+    if not names:
+        empty = pd.DataFrame(columns=columns, dtype=float)
+        return {'period_return': empty, 'max_drawdown': empty, 'worst_day': empty}
+
+    # Daily portfolio returns and cumulative log value (row 0 = starting value)
+    daily = R @ W.T
+    log_value = np.vstack([np.zeros(W.shape[0]), np.cumsum(np.log1p(daily), axis=0)])
+
+    # Gather every window into one padded block; padding repeats the last day,
+    # which changes neither the drawdown, the worst day nor the period return
+    length = (ends - starts).max() + 1
+    value_idx = np.minimum(starts[:, None] + np.arange(length + 1), ends[:, None] + 1)
+    day_idx = np.minimum(starts[:, None] + np.arange(length), ends[:, None])
+    window_values = log_value[value_idx]
+
+    period_return = np.expm1(window_values[:, -1] - window_values[:, 0])
+    peak = np.maximum.accumulate(window_values, axis=1)
+    max_drawdown = -np.expm1(-(peak - window_values).max(axis=1))
+    worst_day = daily[day_idx].min(axis=1)
+
+    def frame(values):
+        return pd.DataFrame(values, index=names, columns=columns)
+
+    return {
+        'period_return': frame(period_return),
+        'max_drawdown': frame(max_drawdown),
+        'worst_day': frame(worst_day),
+    }
@@ -0,0 +1,401 @@
+# =========================
+# Tax-Lot Ledger and Tax-Aware Rebalancing
+# =========================
+# Purchase lots are stored as parallel NumPy columns (account, ticker, date,
+# quantity, cost) sorted by (account, ticker, date), with offset arrays that
+# give each account's and each (account, ticker)'s lots as a contiguous
+# slice. Capital-gains tax per unit sold is computed for all lots at once
+# under the Indian listed-equity rules, and the rebalance QP sells lots
+# rather than names: each lot is its own sell variable and the account's
+# tax on their net gains is a convex term in those sales, so the optimizer
+# chooses which lots to sell.
+
+import numpy as np
+import pandas as pd
+
+from optimizer import _sector_matrix, transform_weights_to_df
+from rebalance import _TRADE_EPS, _trade_limits, _zero_small
+from tracking import _solve_qp
+from tracing import traced
+
+# Listed equity (STT paid), Finance Act 2024 rates
+STCG_RATE = 0.20             # held 12 months or less
+LTCG_RATE = 0.125            # held more than 12 months
+LTCG_EXEMPTION = 125_000.0   # long-term gains exempt per financial year (INR)
+LONG_TERM_DAYS = 365
+
+
+class LotLedger:
+    """
+    Columnar ledger of purchase lots for many accounts.
+
+    Args:
+        accounts (list): Account identifiers; lots refer to them by position.
+        tickers (list): Ticker symbols; lots refer to them by position.
+        account (np.ndarray): Account code of each lot.
+        ticker (np.ndarray): Ticker code of each lot.
+        date (np.ndarray): Purchase date of each lot (datetime64[D]).
+        quantity (np.ndarray): Units held in each lot.
+        cost (np.ndarray): Cost basis per unit of each lot.
+    """
+
+    def __init__(self, accounts, tickers, account, ticker, date, quantity, cost):
+        self.accounts = list(accounts)
+        self.tickers = list(tickers)
+        order = np.lexsort((date, ticker, account))
+        self.account = np.asarray(account, dtype=np.int32)[order]
+        self.ticker = np.asarray(ticker, dtype=np.int32)[order]
+        self.date = np.asarray(date, dtype='datetime64[D]')[order]
+        self.quantity = np.asarray(quantity, dtype=float)[order]
+        self.cost = np.asarray(cost, dtype=float)[order]
+        self.group = self.account.astype(np.int64) * len(self.tickers) + self.ticker
+        self.account_offsets = np.searchsorted(self.account, np.arange(len(self.accounts) + 1))
+        self.group_offsets = np.searchsorted(self.group, np.arange(len(self.accounts) * len(self.tickers) + 1))
+
+    @classmethod
+    def from_frame(cls, frame):
+        """
+        Build a ledger from a table of lots.
+
+        Args:
+            frame (pd.DataFrame): Columns 'Account', 'Ticker', 'Date',
+                'Quantity' and 'Cost' (per unit).
+
+        Returns:
+            LotLedger: The ledger.
+        """
+        account, accounts = pd.factorize(frame['Account'], sort=True)
+        ticker, tickers = pd.factorize(frame['Ticker'], sort=True)
+        return cls(accounts, tickers, account, ticker, pd.to_datetime(frame['Date']).values,
+                   frame['Quantity'].values, frame['Cost'].values)
+
+    def __len__(self):
+        return len(self.quantity)
+
+    def to_frame(self, lots=slice(None)):
+        """
+        Args:
+            lots (slice): Lots to include (default all).
+
+        Returns:
+            pd.DataFrame: One row per lot in ledger order, indexed by lot position.
+        """
+        return pd.DataFrame({
+            'Account': np.asarray(self.accounts, dtype=object)[self.account[lots]],
+            'Ticker': np.asarray(self.tickers, dtype=object)[self.ticker[lots]],
+            'Date': self.date[lots],
+            'Quantity': self.quantity[lots],
+            'Cost': self.cost[lots],
+        }, index=np.arange(len(self))[lots])
+
+    def account_slice(self, account):
+        """Slice of the lots held by one account."""
+        i = self.accounts.index(account)
+        return slice(self.account_offsets[i], self.account_offsets[i + 1])
+
+    def lot_prices(self, prices, lots=slice(None)):
+        """Current price of each lot's ticker (NaN where no price is given)."""
+        return pd.Series(prices, dtype=float).reindex(self.tickers).to_numpy()[self.ticker[lots]]
+
+    def market_values(self, prices):
+        """
+        Market value per account and ticker.
+
+        Args:
+            prices (pd.Series or dict): Current price by ticker.
+
+        Returns:
+            pd.DataFrame: Accounts x tickers market values.
+        """
+        values = np.bincount(self.group, weights=self.quantity * np.nan_to_num(self.lot_prices(prices)),
+                             minlength=len(self.accounts) * len(self.tickers))
+        return pd.DataFrame(values.reshape(len(self.accounts), len(self.tickers)),
+                            index=self.accounts, columns=self.tickers)
+
+    def long_term(self, as_of, lots=slice(None)):
+        """Whether each lot has been held long enough for LTCG."""
+        return (np.datetime64(pd.Timestamp(as_of).date(), 'D') - self.date[lots]).astype(int) > LONG_TERM_DAYS
+
+    def tax_per_unit(self, prices, as_of, stcg_rate=STCG_RATE, ltcg_rate=LTCG_RATE, lots=slice(None)):
+        """
+        Marginal capital-gains tax per unit sold from each lot.
+
+        Losses give a negative tax (the saving from offsetting other gains).
+
+        Args:
+            prices (pd.Series or dict): Current price by ticker.
+            as_of (date-like): Sale date.
+            stcg_rate (float): Short-term rate.
+            ltcg_rate (float): Long-term rate.
+            lots (slice): Lots to price (default all).
+
+        Returns:
+            np.ndarray: Tax per unit for every lot in lots.
+        """
+        gain = self.lot_prices(prices, lots) - self.cost[lots]
+        return gain * np.where(self.long_term(as_of, lots), ltcg_rate, stcg_rate)
+
+    def select_lots(self, units, prices, as_of):
+        """
+        Choose lots for given sales, lowest tax per unit first.
+
+        With a linear tax per unit this greedy order is optimal for each
+        (account, ticker) sale, and it runs for every sale at once.
+
+        Args:
+            units (pd.DataFrame): Accounts x tickers units to sell.
+            prices (pd.Series or dict): Current price by ticker.
+            as_of (date-like): Sale date.
+
+        Returns:
+            np.ndarray: Units sold from each lot.
+        """
+        need = units.reindex(index=self.accounts, columns=self.tickers).fillna(0.0).to_numpy().ravel()
+        order = np.lexsort((self.tax_per_unit(prices, as_of), self.group))
+        quantity = self.quantity[order]
+        group = self.group[order]
+        cumulative = np.cumsum(quantity)
+        before = cumulative - quantity - (cumulative - quantity)[self.group_offsets[group]]
+        sold = np.zeros(len(self))
+        sold[order] = np.clip(need[group] - before, 0.0, quantity)
+        return sold
+
+    def realized_tax(self, sold, prices, as_of):
+        """
+        Capital-gains tax per account for a set of lot sales.
+
+        Short-term losses offset short-term then long-term gains, long-term
+        losses offset only long-term gains, and net long-term gains above
+        LTCG_EXEMPTION are taxed.
+
+        Args:
+            sold (np.ndarray): Units sold from each lot.
+            prices (pd.Series or dict): Current price by ticker.
+            as_of (date-like): Sale date.
+
+        Returns:
+            pd.DataFrame: 'STCG', 'LTCG' (net taxable gains) and 'Tax' per account.
+        """
+        gain = sold * (self.lot_prices(prices) - self.cost)
+        long_term = self.long_term(as_of)
+        size = len(self.accounts)
+        short = np.bincount(self.account, weights=np.where(long_term, 0.0, gain), minlength=size)
+        long = np.bincount(self.account, weights=np.where(long_term, gain, 0.0), minlength=size)
+        short, long, tax = _capital_gains_tax(short, long)
+        return pd.DataFrame({'STCG': short, 'LTCG': long, 'Tax': tax}, index=self.accounts)
+
+
+def _capital_gains_tax(short, long):
+    """Set off losses and apply rates and the LTCG exemption to net gains."""
+    # Net short-term loss carries into long-term gains; long-term losses stay there
+    long = np.maximum(long + np.minimum(short, 0.0), 0.0)
+    short = np.maximum(short, 0.0)
+    return short, long, STCG_RATE * short + LTCG_RATE * np.maximum(long - LTCG_EXEMPTION, 0.0)
+
+
+@traced('solve')
+def optimize_portfolio_tax_aware(expected_returns, cov_matrix, ledger, account, prices, bounds, as_of,
+                                 max_turnover=0.10, trade_limits=None, min_trade=0.0, risk_aversion=2.5,
+                                 tax_weight=1.0, cost_rate=0.0, sector_constraints=None, sector_indices=None):
+    """
+    Rebalance one account, choosing which lots to sell.
+
+    Over x = [w, buy, s, t] with s the fraction of the portfolio sold from
+    each lot (0 <= s_k <= lot value / portfolio value):
+
+        minimize    (risk_aversion / 2) w' Sigma w - mu' w
+                    + cost_rate * (sum(buy) + sum(s)) + tax_weight * t
+        subject to  w = w0 + buy - L s,  sum(w) = 1,  (sum(buy) + sum(s)) / 2 <= max_turnover
+                    buy <= trade_limit,  L s <= trade_limit
+                    t >= tax on the net short- and long-term gains of s
+                    bounds and sector limits on w
+
+    where L maps lots to names and t is the account's capital-gains tax
+    after set-off and the LTCG exemption, as a fraction of the portfolio.
+    A loss is worth only the tax it saves on gains realized in the same
+    rebalance. No name is both bought and sold, and trades below min_trade
+    are frozen as in optimize_portfolio_rebalance. Lots of names outside
+    the universe are left untouched.
+
+    Args:
+        expected_returns (pd.Series): Expected returns.
+        cov_matrix (pd.DataFrame): Covariance matrix.
+        ledger (LotLedger): Lot ledger.
+        account: Account to rebalance.
+        prices (pd.Series or dict): Current price by ticker.
+        bounds (tuple): Bounds for weights.
+        as_of (date-like): Trade date, for holding periods.
+        max_turnover (float): One-way turnover budget as a fraction.
+        trade_limits (float, dict or np.ndarray): Max absolute trade per name.
+        min_trade (float): Trades smaller than this are suppressed.
+        risk_aversion (float): Weight on variance in the objective.
+        tax_weight (float): Weight on tax in the objective (0 ignores tax).
+        cost_rate (float): Linear cost per unit of weight traded.
+        sector_constraints (dict): Sector constraints.
+        sector_indices (dict): Sector indices.
+
+    Returns:
+        tuple: (weights_df, info)
+            weights_df (pd.DataFrame): Target weights, or None if infeasible.
+            info (dict): 'status' ('optimal', 'min_trade_relaxed',
+                'infeasible' or 'failed'), 'turnover' (one-way, buys plus sales),
+                'trades' (pd.Series of weight changes), 'lot_sales'
+                (pd.DataFrame of lots sold with units and marginal tax) and
+                'tax' (tax on the sales, INR).
+
+    Raises:
+        ValueError: If a lot in the universe has no current price, or the
+            account holds nothing in the universe.
+    """
+    tickers = expected_returns.index.tolist()
+    mu = np.asarray(expected_returns, dtype=float)
+    cov = np.asarray(cov_matrix, dtype=float)
+    n = len(mu)
+
+    lots = ledger.account_slice(account)
+    position = {ticker: i for i, ticker in enumerate(tickers)}
+    lot_name = np.array([position.get(ledger.tickers[t], -1) for t in ledger.ticker[lots]], dtype=int)
+    in_universe = np.flatnonzero(lot_name >= 0)
+    lot_name = lot_name[in_universe]
+    lot_price = ledger.lot_prices(prices, lots)[in_universe]
+    unpriced = ~np.isfinite(lot_price) | (lot_price <= 0)
+    if unpriced.any():
+        names = sorted({tickers[i] for i in lot_name[unpriced]})
+        raise ValueError(f"Account {account} holds lots without a current price: {', '.join(names)}.")
+    lot_value = ledger.quantity[lots][in_universe] * lot_price
+    total = lot_value.sum()
+    if total <= 0:
+        raise ValueError(f"Account {account} holds nothing priced in the selected universe.")
+    current = np.bincount(lot_name, weights=lot_value, minlength=n) / total
+    tax = ledger.tax_per_unit(prices, as_of, lots=lots)[in_universe] / lot_price
+    gain = (lot_price - ledger.cost[lots][in_universe]) / lot_price
+    long_term = ledger.long_term(as_of, lots)[in_universe]
+    short_gain = np.where(long_term, 0.0, gain)
+    long_gain = np.where(long_term, gain, 0.0)
+    m = len(in_universe)
+
+    # QP data over x = [w (n), buy (n), s (m), t]
+    size = 2 * n + m + 1
+    P = np.zeros((size, size))
+    P[:n, :n] = risk_aversion * cov
+    q = np.concatenate([-mu, np.full(n + m, cost_rate + _TRADE_EPS), [tax_weight]])
+    lot_map = np.zeros((n, m))
+    lot_map[lot_name, np.arange(m)] = 1.0
+    A_eq = np.vstack([
+        np.hstack([np.eye(n), -np.eye(n), lot_map, np.zeros((n, 1))]),
+        np.concatenate([np.ones(n), np.zeros(n + m + 1)]),
+    ])
+    b_eq = np.concatenate([current, [1.0]])
+
+    # t is the tax as a fraction of the portfolio: the largest of the
+    # set-off cases in _capital_gains_tax, which makes it convex in s
+    exemption = LTCG_EXEMPTION / total
+    tax_rows = np.array([
+        STCG_RATE * short_gain + LTCG_RATE * long_gain,
+        STCG_RATE * short_gain,
+        LTCG_RATE * (short_gain + long_gain),
+        np.zeros(m),
+    ])
+    lower = np.array([b[0] for b in bounds], dtype=float)
+    upper = np.array([b[1] for b in bounds], dtype=float)
+    A_sector, b_sector = _sector_matrix(n, sector_constraints, sector_indices)
+    G = np.vstack([
+        np.concatenate([np.zeros(n), np.full(n + m, 0.5), [0.0]]),
+        np.hstack([-np.eye(n), np.zeros((n, n + m + 1))]),
+        np.hstack([np.eye(n), np.zeros((n, n + m + 1))]),
+        np.hstack([np.zeros((n + m, n)), -np.eye(n + m), np.zeros((n + m, 1))]),
+        np.hstack([np.zeros((n, n)), np.eye(n), np.zeros((n, m + 1))]),
+        np.hstack([np.zeros((n, 2 * n)), lot_map, np.zeros((n, 1))]),
+        np.hstack([np.zeros((m, 2 * n)), np.eye(m), np.zeros((m, 1))]),
+        np.hstack([np.zeros((4, 2 * n)), tax_rows, np.full((4, 1), -1.0)]),
+        np.hstack([A_sector, np.zeros((len(b_sector), n + m + 1))]),
+    ])
+    h_fixed = np.concatenate([[max_turnover], -lower, upper, np.zeros(n + m)])
+    h_lots = lot_value / total
+    h_tax = np.array([LTCG_RATE * exemption, 0.0, LTCG_RATE * exemption, 0.0])
+
+    def solve(buy_limits, sell_limits):
+        h = np.concatenate([h_fixed, buy_limits, sell_limits, h_lots, h_tax, b_sector])
+        x, status = _solve_qp(P, q, A_eq, b_eq, G, h)
+        return (None, status) if x is None else (_zero_small(x[:-1]), status)
+
+    # A name is never bought and sold in one rebalance: where the solution
+    # does both, the leg against its net trade is closed. Names trading less
+    # than min_trade are frozen. Either way the QP is re-solved, until no
+    # name needs closing (at most 2N passes, as limits only ever close).
+    buy_limits = _trade_limits(trade_limits, tickers)
+    sell_limits = buy_limits.copy()
+    x, status = solve(buy_limits, sell_limits)
+    if x is None:
+        return None, {'status': status, 'turnover': None, 'trades': None, 'lot_sales': None, 'tax': None}
+    while True:
+        buy, sold = x[n:2 * n], x[2 * n:]
+        sold_by_name = np.bincount(lot_name, weights=sold, minlength=n)
+        both = (buy > 0) & (sold_by_name > 0)
+        trades = np.abs(x[:n] - current)
+        small = (trades > 1e-9) & (trades < min_trade - 1e-9)
+        newly_small = small & ((buy_limits > 0) | (sell_limits > 0))
+        if not both.any() and not newly_small.any():
+            break
+        buying = both & (buy > sold_by_name)
+        buy_limits[(both & ~buying) | newly_small] = 0.0
+        sell_limits[buying | newly_small] = 0.0
+        resolved, _ = solve(buy_limits, sell_limits)
+        if resolved is None:
+            break
+        x = resolved
+    if small.any():
+        status = 'min_trade_relaxed'
+
+    weights = x[:n]
+    buy, sold = x[n:2 * n], x[2 * n:]
+    sold_units = sold * total / lot_price
+    sold_units[sold_units < 1e-9 * ledger.quantity[lots][in_universe]] = 0.0
+    lot_sales = ledger.to_frame(lots).iloc[in_universe].assign(Sold=sold_units, Tax=sold_units * tax * lot_price)
+    realized_gain = sold_units * gain * lot_price
+    _, _, realized = _capital_gains_tax(realized_gain[~long_term].sum(), realized_gain[long_term].sum())
+    trades = weights - current
+    return transform_weights_to_df(weights, tickers), {
+        'status': status,
+        'turnover': 0.5 * (buy.sum() + sold.sum()),
+        'trades': pd.Series(trades, index=tickers),
+        'lot_sales': lot_sales[lot_sales['Sold'] > 0],
+        'tax': float(realized),
+    }
+
+
+def rebalance_ledger(expected_returns, cov_matrix, ledger, prices, bounds, as_of, **kwargs):
+    """
+    Tax-aware rebalance of every account in a ledger (nightly batch).
+
+    Args:
+        Same as optimize_portfolio_tax_aware, without account.
+
+    Returns:
+        tuple: (targets, summary)
+            targets (pd.DataFrame): Target weights, one row per account (NaN
+                where infeasible).
+            summary (pd.DataFrame): 'status', 'turnover', 'tax' and 'lots_sold'
+                per account.
+    """
+    tickers = expected_returns.index.tolist()
+    targets = np.full((len(ledger.accounts), len(tickers)), np.nan)
+    rows = []
+    for i, account in enumerate(ledger.accounts):
+        try:
+            weights, info = optimize_portfolio_tax_aware(expected_returns, cov_matrix, ledger, account,
+                                                         prices, bounds, as_of, **kwargs)
+        except ValueError:
+            weights, info = None, {'status': 'empty', 'turnover': None, 'tax': None, 'lot_sales': None}
+        if weights is not None:
+            targets[i] = weights['Weight'].values
+        rows.append({
+            'status': info['status'],
+            'turnover': info['turnover'],
+            'tax': info['tax'],
+            'lots_sold': None if info['lot_sales'] is None else len(info['lot_sales']),
+        })
+    return (
+        pd.DataFrame(targets, index=ledger.accounts, columns=tickers),
+        pd.DataFrame(rows, index=ledger.accounts),
+    )
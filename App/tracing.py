@@ -0,0 +1,284 @@
+# =========================
+# Tracing Spans
+# =========================
+# Lightweight timing of the Results-tab pipeline (fetch, moments, solve,
+# frontier, render). Spans are opened with the span() context manager or
+# the traced() decorator and recorded into the Recorder of the current run.
+# The recorder lives in a context variable set by start() at the top of a
+# Streamlit run, so concurrent sessions in one process never share a switch
+# or a buffer. Without a recorder span() hands back a shared no-op object
+# and traced() calls straight through, so the instrumentation costs one
+# lookup. Recorded spans export to the Chrome trace format (chrome://tracing
+# or https://ui.perfetto.dev) and render as a waterfall chart.
+
+import contextvars
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from datetime import datetime
+import plotly.graph_objs as go
+
+TRACE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Data", "traces")
+
+
+class Recorder:
+    """Spans of one run, timed from when the recorder was created or reset."""
+
+    def __init__(self):
+        self.records = []
+        self.local = threading.local()
+        self.origin = time.perf_counter_ns()
+
+
+_recorder = contextvars.ContextVar('trace_recorder', default=None)
+
+
+def start(enabled=True):
+    """
+    Begin a run: record into a fresh Recorder if enabled, else record nothing.
+
+    Only code running in the calling context (this thread, and tasks or
+    threads started from a copy of its context) records into it.
+
+    Args:
+        enabled (bool): Whether to trace this run.
+
+    Returns:
+        Recorder or None: The run's recorder.
+    """
+    recorder = Recorder() if enabled else None
+    _recorder.set(recorder)
+    return recorder
+
+
+def reset(recorder):
+    """Drop a recorder's spans and restart its clock."""
+    recorder.records.clear()
+    recorder.local = threading.local()
+    recorder.origin = time.perf_counter_ns()
+
+
+def spans(recorder):
+    """
+    Args:
+        recorder (Recorder): Recorder of the run.
+
+    Returns:
+        list: Recorded spans as dicts with 'name', 'category', 'start' and
+            'duration' (seconds since the recorder started), 'depth',
+            'thread' and 'args', ordered by start.
+    """
+    return sorted(recorder.records, key=lambda s: s['start'])
+
+
+class _NullSpan:
+    """Returned by span() while not tracing."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **args):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    def __init__(self, recorder, name, category, args):
+        self.recorder = recorder
+        self.name = name
+        self.category = category
+        self.args = args
+
+    def __enter__(self):
+        local = self.recorder.local
+        self.depth = getattr(local, 'depth', 0)
+        local.depth = self.depth + 1
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter_ns()
+        recorder = self.recorder
+        recorder.local.depth = self.depth
+        if exc_type is not None:
+            self.args['error'] = exc_type.__name__
+        recorder.records.append({
+            'name': self.name,
+            'category': self.category,
+            'start': (self.start - recorder.origin) / 1e9,
+            'duration': (end - self.start) / 1e9,
+            'depth': self.depth,
+            'thread': threading.get_ident(),
+            'args': self.args,
+        })
+        return False
+
+    def set(self, **args):
+        """Attach extra arguments (sizes, statuses) to the span."""
+        self.args.update(args)
+
+
+def span(name, category='app', **args):
+    """
+    Time a block into the current run's recorder.
+
+    Args:
+        name (str): Span name.
+        category (str): Stage, e.g. 'fetch', 'moments', 'solve', 'frontier' or 'render'.
+        **args: Extra values shown with the span.
+
+    Returns:
+        Context manager; its set(**args) adds values once they are known.
+    """
+    recorder = _recorder.get()
+    if recorder is None:
+        return _NULL_SPAN
+    return _Span(recorder, name, category, args)
+
+
+def traced(category='app', name=None):
+    """
+    Decorator that wraps every call in a span named after the function.
+
+    Generator functions are timed from the first item to exhaustion.
+
+    Args:
+        category (str): Stage of the span.
+        name (str): Span name (default the function name).
+    """
+    def decorate(func):
+        label = name or func.__name__
+        if inspect.isgeneratorfunction(func):
+            @functools.wraps(func)
+            def generator(*args, **kwargs):
+                recorder = _recorder.get()
+                if recorder is None:
+                    return (yield from func(*args, **kwargs))
+                with _Span(recorder, label, category, {}):
+                    return (yield from func(*args, **kwargs))
+            return generator
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            recorder = _recorder.get()
+            if recorder is None:
+                return func(*args, **kwargs)
+            with _Span(recorder, label, category, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+class Stages:
+    """
+    Consecutive spans without nesting the code: next(name) closes the open
+    stage and starts another, close() ends the last one. Used for page
+    sections that run one after another.
+
+    Args:
+        category (str): Stage of every span.
+    """
+
+    def __init__(self, category='render'):
+        self.category = category
+        self.current = None
+
+    def next(self, name, **args):
+        self.close()
+        self.current = span(name, self.category, **args)
+        self.current.__enter__()
+
+    def close(self):
+        if self.current is not None:
+            self.current.__exit__(None, None, None)
+            self.current = None
+
+
+def chrome_trace(recorded):
+    """
+    Spans as a Chrome trace ('X' complete events, microsecond timestamps).
+
+    Args:
+        recorded (list): Spans from spans().
+
+    Returns:
+        dict: {'traceEvents': [...], 'displayTimeUnit': 'ms'}.
+    """
+    pid = os.getpid()
+    return {
+        'traceEvents': [
+            {
+                'name': s['name'],
+                'cat': s['category'],
+                'ph': 'X',
+                'ts': s['start'] * 1e6,
+                'dur': s['duration'] * 1e6,
+                'pid': pid,
+                'tid': s['thread'],
+                'args': {key: str(value) for key, value in s['args'].items()},
+            }
+            for s in recorded
+        ],
+        'displayTimeUnit': 'ms',
+    }
+
+
+def export_chrome_trace(recorded, path=None):
+    """
+    Write spans to a Chrome trace JSON file.
+
+    Args:
+        recorded (list): Spans from spans().
+        path (str): Output file (default a timestamped file under TRACE_DIR).
+
+    Returns:
+        str: Path written.
+    """
+    if path is None:
+        os.makedirs(TRACE_DIR, exist_ok=True)
+        path = os.path.join(TRACE_DIR, f"trace_{datetime.now():%Y%m%d_%H%M%S}.json")
+    with open(path, 'w') as f:
+        json.dump(chrome_trace(recorded), f)
+    return path
+
+
+def waterfall_figure(recorded):
+    """
+    Horizontal timing waterfall, one bar per span in start order, indented
+    by nesting depth and coloured by stage.
+
+    Args:
+        recorded (list): Spans from spans().
+
+    Returns:
+        go.Figure: Waterfall chart (seconds on the x axis).
+    """
+    labels = [f"{'  ' * s['depth']}{s['name']} ({i + 1})" for i, s in enumerate(recorded)]
+    fig = go.Figure()
+    for category in dict.fromkeys(s['category'] for s in recorded):
+        rows = [(label, s) for label, s in zip(labels, recorded) if s['category'] == category]
+        fig.add_trace(go.Bar(
+            name=category,
+            y=[label for label, _ in rows],
+            x=[s['duration'] for _, s in rows],
+            base=[s['start'] for _, s in rows],
+            orientation='h',
+            hovertemplate="%{y}<br>start %{base:.3f}s, %{x:.3f}s<extra>" + category + "</extra>"
+        ))
+    fig.update_layout(
+        title="Timing Waterfall",
+        template="plotly_dark",
+        barmode='overlay',
+        height=max(300, 22 * len(recorded) + 120),
+        xaxis=dict(title="Seconds"),
+        yaxis=dict(categoryorder='array', categoryarray=labels, autorange="reversed")
+    )
+    return fig
@@ -0,0 +1,217 @@
+# =========================
+# Benchmark-Relative Optimization
+# =========================
+# Active-risk objectives against the Nifty 50: minimum tracking error for a
+# target active return, and maximum information ratio. Both are QPs in the
+# weights with linear constraints (bounds, per-stock and sector active-weight
+# bands, sector limits), solved by Clarabel. The information ratio is a ratio of a
+# linear to a quadratic term; the Charnes-Cooper substitution turns it into
+# a single QP, as for the maximum Sharpe portfolio.
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sparse
+import clarabel
+
+from optimizer import _sector_matrix, transform_weights_to_df
+from black_litterman import MARKET_CAPS_FILE
+from tracing import traced
+
+# Benchmark weights default to the Nifty 50 market caps on file
+BENCHMARK_FILE = MARKET_CAPS_FILE
+
+
+def load_benchmark(path=BENCHMARK_FILE):
+    """
+    Read benchmark weights from a local CSV.
+
+    Args:
+        path (str): CSV with a 'Ticker' column and either 'Weight' or
+            'MarketCap' (weights are then proportional to market cap).
+
+    Returns:
+        pd.Series: Weights summing to one, indexed by ticker.
+    """
+    table = pd.read_csv(path).set_index('Ticker')
+    column = 'Weight' if 'Weight' in table.columns else 'MarketCap'
+    weights = table[column].astype(float)
+    return weights / weights.sum()
+
+
+def benchmark_weights(tickers, benchmark=None):
+    """
+    Benchmark weights restricted to the selected universe and renormalized,
+    so tracking error is measured against the part of the index the
+    portfolio can hold.
+
+    Args:
+        tickers (list): Ticker symbols.
+        benchmark (pd.Series): Index weights by ticker (default load_benchmark()).
+
+    Returns:
+        pd.Series: Weights over tickers summing to one (zero for names outside the index).
+
+    Raises:
+        ValueError: If none of the tickers are in the benchmark.
+    """
+    benchmark = load_benchmark() if benchmark is None else benchmark
+    weights = benchmark.reindex(tickers).fillna(0.0)
+    if weights.sum() <= 0:
+        raise ValueError("None of the selected stocks are in the benchmark.")
+    return weights / weights.sum()
+
+
+def _bands(bands, tickers):
+    """Per-name active-weight bands as an array (scalar, dict or None for no band)."""
+    if bands is None:
+        return np.full(len(tickers), np.inf)
+    if isinstance(bands, dict):
+        return np.array([bands.get(ticker, np.inf) for ticker in tickers], dtype=float)
+    return np.broadcast_to(np.asarray(bands, dtype=float), (len(tickers),)).copy()
+
+
+def _active_constraints(bench, bounds, active_bands, sector_active_bands, sector_constraints, sector_indices, tickers):
+    """
+    All linear constraints on the weights as G @ w <= h: bounds, per-stock
+    and sector active-weight bands and sector limits. Rows with an infinite
+    right-hand side are dropped.
+    """
+    n = len(bench)
+    eye = np.eye(n)
+    lower = np.array([b[0] for b in bounds], dtype=float)
+    upper = np.array([b[1] for b in bounds], dtype=float)
+    band = _bands(active_bands, tickers)
+    rows = [-eye, eye, eye, -eye]
+    rhs = [-lower, upper, bench + band, band - bench]
+
+    if sector_active_bands is not None and sector_indices:
+        for sector, indices in sector_indices.items():
+            sector_band = (sector_active_bands.get(sector) if isinstance(sector_active_bands, dict)
+                           else sector_active_bands)
+            if sector_band is None:
+                continue
+            row = np.zeros(n)
+            row[list(indices)] = 1.0
+            rows += [row[None, :], -row[None, :]]
+            rhs += [[row @ bench + sector_band], [sector_band - row @ bench]]
+
+    A_sector, b_sector = _sector_matrix(n, sector_constraints, sector_indices)
+    G = np.vstack(rows + [A_sector])
+    h = np.concatenate([np.concatenate([np.atleast_1d(r) for r in rhs]), b_sector])
+    finite = np.isfinite(h)
+    return G[finite], h[finite]
+
+
+def _solve_qp(P, q, A_eq, b_eq, G, h):
+    """
+    minimize x' P x / 2 + q' x  subject to  A_eq x = b_eq, G x <= h.
+
+    Returns:
+        tuple: (x, status) with x None unless status is 'optimal'.
+    """
+    settings = clarabel.DefaultSettings()
+    settings.verbose = False
+    A = sparse.csc_matrix(np.vstack([A_eq, G]))
+    cones = [clarabel.ZeroConeT(len(b_eq)), clarabel.NonnegativeConeT(len(h))]
+    solver = clarabel.DefaultSolver(sparse.csc_matrix(np.triu(P)), q, A, np.concatenate([b_eq, h]), cones, settings)
+    result = solver.solve()
+    status = str(result.status)
+    if status not in ('Solved', 'AlmostSolved'):
+        return None, 'infeasible' if 'Infeasible' in status else 'failed'
+    return np.array(result.x), 'optimal'
+
+
+def _active_info(weights, bench, mu, cov, tickers, status):
+    """Tracking error, active return and information ratio of a solution."""
+    active = weights - bench
+    tracking_error = float(np.sqrt(max(active @ cov @ active, 0.0)))
+    active_return = float(mu @ active)
+    return {
+        'status': status,
+        'tracking_error': tracking_error,
+        'active_return': active_return,
+        'information_ratio': active_return / tracking_error if tracking_error > 1e-12 else np.nan,
+        'active_weights': pd.Series(active, index=tickers),
+    }
+
+
+@traced('solve')
+def optimize_portfolio_tracking_error(expected_returns, cov_matrix, bounds, benchmark=None, target_active_return=0.0,
+                                      active_bands=None, sector_active_bands=None,
+                                      sector_constraints=None, sector_indices=None):
+    """
+    Minimize tracking error (w - b)' Sigma (w - b) subject to an active return
+    of at least target_active_return.
+
+    Args:
+        expected_returns (pd.Series): Expected returns.
+        cov_matrix (pd.DataFrame): Covariance matrix.
+        bounds (tuple): Bounds for weights.
+        benchmark (pd.Series): Benchmark weights by ticker (default Nifty 50
+            market-cap weights, see benchmark_weights).
+        target_active_return (float): Minimum expected return over the benchmark.
+        active_bands (float, dict or np.ndarray): Max |w - b| per stock.
+        sector_active_bands (float or dict): Max |sector weight - benchmark sector weight|.
+        sector_constraints (dict): Sector constraints.
+        sector_indices (dict): Sector indices.
+
+    Returns:
+        tuple: (weights_df, info)
+            weights_df (pd.DataFrame): Optimized weights, or None if infeasible.
+            info (dict): 'status', 'tracking_error', 'active_return',
+                'information_ratio' and 'active_weights' (pd.Series).
+    """
+    tickers = expected_returns.index.tolist()
+    mu = np.asarray(expected_returns, dtype=float)
+    cov = np.asarray(cov_matrix, dtype=float)
+    bench = benchmark_weights(tickers, benchmark).values
+    G, h = _active_constraints(bench, bounds, active_bands, sector_active_bands,
+                               sector_constraints, sector_indices, tickers)
+    G = np.vstack([G, -mu])
+    h = np.append(h, -(mu @ bench + target_active_return))
+
+    n = len(mu)
+    weights, status = _solve_qp(2.0 * cov, -2.0 * cov @ bench, np.ones((1, n)), np.array([1.0]), G, h)
+    if weights is None:
+        return None, {'status': status, 'tracking_error': None, 'active_return': None,
+                      'information_ratio': None, 'active_weights': None}
+    return transform_weights_to_df(weights, tickers), _active_info(weights, bench, mu, cov, tickers, status)
+
+
+@traced('solve')
+def optimize_portfolio_information_ratio(expected_returns, cov_matrix, bounds, benchmark=None, active_bands=None,
+                                         sector_active_bands=None, sector_constraints=None, sector_indices=None):
+    """
+    Maximize the information ratio mu'(w - b) / sqrt((w - b)' Sigma (w - b)).
+
+    With a = w - b, substitute y = kappa * a and fix mu'y = 1; the problem
+    becomes minimize y' Sigma y over (y, kappa >= 0) subject to 1'y = 0 and
+    G y <= kappa (h - G b), and a = y / kappa.
+
+    Args:
+        Same as optimize_portfolio_tracking_error, without target_active_return.
+
+    Returns:
+        tuple: (weights_df, info) as in optimize_portfolio_tracking_error;
+            status is 'infeasible' when no allowed portfolio beats the
+            benchmark's expected return.
+    """
+    tickers = expected_returns.index.tolist()
+    mu = np.asarray(expected_returns, dtype=float)
+    cov = np.asarray(cov_matrix, dtype=float)
+    bench = benchmark_weights(tickers, benchmark).values
+    G, h = _active_constraints(bench, bounds, active_bands, sector_active_bands,
+                               sector_constraints, sector_indices, tickers)
+    n = len(mu)
+    slack = h - G @ bench
+
+    P = np.zeros((n + 1, n + 1))
+    P[:n, :n] = 2.0 * cov
+    A_eq = np.vstack([np.append(np.ones(n), 0.0), np.append(mu, 0.0)])
+    G_y = np.vstack([np.hstack([G, -slack[:, None]]), np.append(np.zeros(n), -1.0)])
+    x, status = _solve_qp(P, np.zeros(n + 1), A_eq, np.array([0.0, 1.0]), G_y, np.zeros(len(G_y)))
+    if x is None or x[n] <= 1e-12:
+        return None, {'status': 'infeasible' if x is None else 'unbounded', 'tracking_error': None,
+                      'active_return': None, 'information_ratio': None, 'active_weights': None}
+    weights = bench + x[:n] / x[n]
+    return transform_weights_to_df(weights, tickers), _active_info(weights, bench, mu, cov, tickers, status)